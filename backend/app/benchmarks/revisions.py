@@ -0,0 +1,172 @@
+# backend/benchmarks/revisions.py
+
+"""
+Measure the storage cost of note revision history.
+
+Simulates autosaving editors on a fresh database: every note is saved many
+times with small edits (typing at the end, changing a line, now and then a
+larger rewrite), spread over the last `days` days. Reports the size of the
+history against keeping a full copy per save, the time to record a save and
+to rebuild a version, and the size left after thinning. Run from backend/:
+
+    python -m app.benchmarks.revisions --notes 50 --saves 200 --output revisions.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.core.database import create_tables
+from app.services import revision_service
+
+_WORDS = (
+    "deploy review fixed the migration timeout for staging after checking logs "
+    "meeting notes about the release plan and open questions on caching"
+).split()
+
+
+def _sentence(rng: random.Random) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(6, 16))).capitalize() + "."
+
+
+def _edit(rng: random.Random, content: str) -> str:
+    lines = content.split("\n")
+    roll = rng.random()
+    if roll < 0.7:
+        # Typing at the end, as most autosaves do
+        lines[-1] = (lines[-1] + " " + _sentence(rng)).strip()
+        if rng.random() < 0.2:
+            lines.append("")
+    elif roll < 0.95:
+        lines[rng.randrange(len(lines))] = _sentence(rng)
+    else:
+        start = rng.randrange(len(lines))
+        lines[start:start + 10] = [_sentence(rng) for _ in range(rng.randint(3, 12))]
+    return "\n".join(lines)
+
+
+def _percentile(values: list[float], share: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+async def _stored_bytes(conn: AsyncSession) -> dict:
+    result = await conn.execute(
+        text(
+            "SELECT kind, COUNT(*) AS revisions, SUM(LENGTH(data)) AS bytes "
+            "FROM note_revisions GROUP BY kind"
+        )
+    )
+    by_kind = {row["kind"]: dict(row) for row in result.mappings().all()}
+    return {
+        "snapshots": by_kind.get(revision_service.SNAPSHOT, {}).get("revisions", 0),
+        "deltas": by_kind.get(revision_service.DELTA, {}).get("revisions", 0),
+        "bytes": sum(kind["bytes"] for kind in by_kind.values()),
+    }
+
+
+async def run(notes: int, saves: int, days: float, seed: int, path: Path) -> dict:
+    rng = random.Random(seed)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    await create_tables(engine)
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    start = datetime.now(timezone.utc) - timedelta(days=days)
+    step = timedelta(days=days) / saves
+    full_copy_bytes = 0
+    record_seconds: list[float] = []
+    versions: dict[tuple[int, int], str] = {}
+    async with sessions() as conn:
+        for note_id in range(1, notes + 1):
+            content = "\n".join(_sentence(rng) for _ in range(rng.randint(5, 40)))
+            for version in range(1, saves + 1):
+                saved_at = (start + step * version).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+                started = time.perf_counter()
+                await revision_service.record(conn, note_id, version, "Note", content, saved_at)
+                record_seconds.append(time.perf_counter() - started)
+                full_copy_bytes += len(content.encode())
+                versions[(note_id, version)] = content
+                content = _edit(rng, content)
+            await conn.commit()
+        history = await _stored_bytes(conn)
+
+        rebuild_seconds: list[float] = []
+        for (note_id, version), expected in rng.sample(
+            sorted(versions.items()), min(500, len(versions))
+        ):
+            started = time.perf_counter()
+            revision = await revision_service.get_revision(conn, note_id, version)
+            rebuild_seconds.append(time.perf_counter() - started)
+            if revision["content"] != expected:
+                raise AssertionError(f"note {note_id} version {version} rebuilt wrongly")
+
+        started = time.perf_counter()
+        thinned = await revision_service.thin(conn)
+        thin_seconds = time.perf_counter() - started
+        after_thinning = await _stored_bytes(conn)
+        result = await conn.execute(text("SELECT note_id, version FROM note_revisions"))
+        remaining = result.all()
+        for note_id, version in rng.sample(remaining, min(500, len(remaining))):
+            revision = await revision_service.get_revision(conn, note_id, version)
+            if revision["content"] != versions[(note_id, version)]:
+                raise AssertionError(f"note {note_id} version {version} lost its base in thinning")
+    await engine.dispose()
+
+    return {
+        "notes": notes,
+        "saves_per_note": saves,
+        "days": days,
+        "snapshot_interval": settings.REVISION_SNAPSHOT_INTERVAL,
+        "full_copy_bytes": full_copy_bytes,
+        "history": history,
+        "history_share_of_full_copies": round(history["bytes"] / full_copy_bytes, 4),
+        "record_ms": {
+            "mean": round(statistics.mean(record_seconds) * 1000, 3),
+            "p95": round(_percentile(record_seconds, 0.95) * 1000, 3),
+        },
+        "rebuild_ms": {
+            "mean": round(statistics.mean(rebuild_seconds) * 1000, 3),
+            "max": round(max(rebuild_seconds) * 1000, 3),
+        },
+        "thinning": {
+            "removed": thinned,
+            "seconds": round(thin_seconds, 3),
+            "left": after_thinning,
+        },
+        "database_bytes": path.stat().st_size,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--notes", type=int, default=50)
+    parser.add_argument("--saves", type=int, default=200, help="Saves per note")
+    parser.add_argument("--days", type=float, default=14.0, help="Days the saves are spread over")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the JSON here instead of stdout")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="journal-revisions-") as workdir:
+        report = asyncio.run(
+            run(args.notes, max(1, args.saves), args.days, args.seed, Path(workdir) / "bench.db")
+        )
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+    print(
+        f"History is {report['history_share_of_full_copies']:.1%} of full copies",
+        file=sys.stderr,
+    )
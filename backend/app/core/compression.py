@@ -0,0 +1,152 @@
+# backend/core/compression.py
+
+"""
+Compression of API responses, negotiated through `Accept-Encoding`.
+
+Brotli is preferred when the client accepts it and the optional `brotli`
+package is installed, otherwise gzip. Only complete JSON and text bodies of
+at least COMPRESSION_MIN_BYTES are compressed; streamed responses, such as
+attachment downloads, are passed through as they are.
+
+A compressed response is a different representation, so its strong ETag
+gets the coding appended (`"<tag>-br"`). When a request would get that
+same coding, the suffix is removed again from its `If-None-Match` before it
+reaches the routes, which therefore only ever deal with their own tags.
+"""
+
+import asyncio
+import gzip
+from typing import List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies at least this large are compressed in a thread, off the event loop
+_THREAD_MIN_BYTES = 128 * 1024
+_COMPRESSIBLE = ("application/json", "text/")
+
+
+def _accepted(accept_encoding: str) -> List[str]:
+    """Codings the client accepts, in order of its preference (q-values)."""
+    codings = []
+    for i, item in enumerate(accept_encoding.split(",")):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name and q > 0:
+            codings.append((-q, i, name.lower()))
+    return [name for _, _, name in sorted(codings)]
+
+
+class CompressionMiddleware:
+    def __init__(
+        self, app: ASGIApp, minimum_size: int, gzip_level: int, brotli_quality: int
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _choose(self, accept_encoding: str) -> Optional[str]:
+        for coding in _accepted(accept_encoding):
+            if coding == "br" and brotli is not None:
+                return "br"
+            if coding in ("gzip", "*"):
+                return "gzip"
+        return None
+
+    def _compress(self, coding: str, body: bytes) -> bytes:
+        if coding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        coding = self._choose(request_headers.get("accept-encoding", ""))
+        # A tag of the variant this request would get is matched without its suffix
+        suffix = f'-{coding}"' if coding else None
+        if_none_match = request_headers.get("if-none-match")
+        if suffix and if_none_match and suffix in if_none_match:
+            scope = dict(scope)
+            scope["headers"] = [
+                (k, v.replace(suffix.encode(), b'"')) if k == b"if-none-match" else (k, v)
+                for k, v in scope["headers"]
+            ]
+        start: Optional[Message] = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start" and message["status"] == 304:
+                # Confirm the variant the client holds, compressed or not
+                headers = MutableHeaders(raw=message["headers"])
+                etag = headers.get("etag")
+                if suffix and etag and if_none_match and f"{etag[:-1]}{suffix}" in if_none_match:
+                    headers["ETag"] = f"{etag[:-1]}{suffix}"
+                    headers.add_vary_header("Accept-Encoding")
+                passthrough = True
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                if (
+                    "content-encoding" in headers
+                    or message["status"] == 206
+                    or not content_type.startswith(_COMPRESSIBLE)
+                ):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # Held back until the body shows whether it gets compressed
+                    start = message
+                return
+            if passthrough or start is None:
+                await send(message)
+                return
+            if message["type"] != "http.response.body":
+                # e.g. a file sent with the server's pathsend extension
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            response_start, start = start, None
+            headers = MutableHeaders(raw=response_start["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if coding is None or more_body or len(body) < self.minimum_size:
+                passthrough = True
+                await send(response_start)
+                await send(message)
+                return
+
+            if len(body) >= _THREAD_MIN_BYTES:
+                body = await asyncio.to_thread(self._compress, coding, body)
+            else:
+                body = self._compress(coding, body)
+            headers["Content-Encoding"] = coding
+            headers["Content-Length"] = str(len(body))
+            etag = headers.get("etag")
+            if etag and etag.endswith('"') and not etag.startswith("W/"):
+                headers["ETag"] = f"{etag[:-1]}{suffix}"
+            await send(response_start)
+            await send({**message, "body": body})
+
+        await self.app(scope, receive, send_compressed)
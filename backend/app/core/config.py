@@ -15,6 +15,87 @@ class Settings(BaseSettings):
     APP_NAME: str = "The Journal"
     DATABASE_URL: str = "sqlite+aiosqlite:///./journal.db"
 
+    ##### Notebooks #####
+
+    # Directory holding one SQLite file per notebook besides the default one at DATABASE_URL.
+    NOTEBOOKS_DIR: str = "./notebooks"
+
+    # A notebook's database is closed after this many seconds without use.
+    NOTEBOOK_IDLE_SECONDS: float = 300.0
+
+    # Upper bound on notebook databases open at once; least recently used are closed first.
+    NOTEBOOK_MAX_OPEN: int = 16
+
+    ##### Workers #####
+
+    # Milliseconds a write waits for another process's write to finish before failing.
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+
+    # Seconds between checks for notes changed by other worker processes.
+    CHANGE_POLL_SECONDS: float = 1.0
+
+    ##### Compression #####
+
+    # Responses smaller than this many bytes are sent uncompressed.
+    COMPRESSION_MIN_BYTES: int = 1024
+
+    # gzip level, from 1 (fastest) to 9 (smallest).
+    GZIP_LEVEL: int = 6
+
+    # Brotli quality, from 0 (fastest) to 11 (smallest). Brotli is only
+    # offered when the optional `brotli` package is installed.
+    BROTLI_QUALITY: int = 5
+
+    ##### Near-duplicate detection #####
+
+    # Estimated similarity (0-1) at which two notes count as near-duplicates.
+    # Values below 0.5 are not reliably detected by the LSH index.
+    NOTE_SIMILARITY_THRESHOLD: float = 0.8
+
+    ##### Title quick-switcher #####
+
+    # Titles are truncated to this many characters before indexing.
+    TITLE_INDEX_MAX_TITLE_CHARS: int = 200
+
+    # Upper bound on indexed titles; least recently updated notes are dropped first.
+    TITLE_INDEX_MAX_ENTRIES: int = 200_000
+
+    ##### Attachments #####
+
+    # Directory holding attachment blobs, one file per distinct content (SHA-256).
+    ATTACHMENTS_DIR: str = "./attachments"
+
+    # Uploads larger than this many bytes are rejected.
+    ATTACHMENT_MAX_BYTES: int = 50 * 1024 * 1024
+
+    ##### Revisions #####
+
+    # A full copy of a note is kept every this many revisions; the ones in
+    # between are stored as deltas against it.
+    REVISION_SNAPSHOT_INTERVAL: int = 20
+
+    # Revisions of notes longer than this many characters are always stored
+    # as full copies, as diffing them would take too long.
+    REVISION_DELTA_MAX_CHARS: int = 1_000_000
+
+    # Revisions older than this many hours are thinned to one per hour...
+    REVISION_HOURLY_AFTER_HOURS: int = 24
+
+    # ...and older than this many days to one per day.
+    REVISION_DAILY_AFTER_DAYS: int = 7
+
+    # Seconds between thinning passes.
+    REVISION_THIN_INTERVAL_SECONDS: float = 3600.0
+
+    ##### Digests #####
+
+    # Notes longer than this many tokens are summarized on their own (and the
+    # summary cached) before going into a digest; shorter ones go in verbatim.
+    DIGEST_NOTE_SUMMARY_MIN_TOKENS: int = 300
+
+    # Budget in tokens for the text of one digest prompt.
+    DIGEST_PROMPT_TOKENS: int = 3000
+
     ##### LLM #####
 
     # Model name structure is provider/model:version
@@ -28,6 +109,9 @@ class Settings(BaseSettings):
     # Base URL for the Ollama API. Required if using Ollama models.
     OLLAMA_BASE_URL: Optional[str] = "http://localhost:11434"
 
+    # LLM requests in flight at once, across all endpoints.
+    LLM_MAX_CONCURRENCY: int = 2
+
     @property
     def IS_OLLAMA_MODEL(self) -> bool:
         return self.LLM_MODEL_NAME.startswith("ollama/")
@@ -1,9 +1,27 @@
 # backend/database.py
 
 
-from typing import AsyncGenerator
+import asyncio
+import os
+import re
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import (
+    AsyncGenerator,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    TypeVar,
+)
 
 from app.core.config import settings
+from fastapi import HTTPException, Query
+from sqlalchemy import event, text
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
@@ -11,20 +29,285 @@ from sqlalchemy.ext.asyncio import (
     create_async_engine,
 )
 
-engine: AsyncEngine = create_async_engine(settings.DATABASE_URL, echo=True)
+
+def _configure_sqlite(dbapi_connection, connection_record) -> None:
+    # Several worker processes may share a database: under WAL their readers
+    # never block on a writer, and a writer waits its turn instead of failing
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+def create_sqlite_engine(url: str, echo: bool = False) -> AsyncEngine:
+    new_engine = create_async_engine(url, echo=echo)
+    event.listen(new_engine.sync_engine, "connect", _configure_sqlite)
+    return new_engine
+
+
+engine: AsyncEngine = create_sqlite_engine(settings.DATABASE_URL, echo=True)
 AsyncLocalSession = async_sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
 )
 
+# The notebook stored at DATABASE_URL; every other notebook is its own file
+# in NOTEBOOKS_DIR
+DEFAULT_NOTEBOOK = "default"
+_NOTEBOOK_NAME_RE = re.compile(r"[a-z0-9][a-z0-9_-]{0,63}")
+
+# 'journal_meta' key of the number of writes to notes, kept by triggers
+NOTES_GENERATION_KEY = "notes_generation"
+
+T = TypeVar("T")
+
+
+class NotebookNotFound(LookupError):
+    pass
+
+
+@dataclass
+class _OpenNotebook:
+    engine: AsyncEngine
+    sessions: async_sessionmaker
+    active: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class NotebookRegistry:
+    """
+    Engines for the notebooks in use. A notebook's database is opened on
+    first use and closed again once it has been idle for
+    NOTEBOOK_IDLE_SECONDS, or to stay within NOTEBOOK_MAX_OPEN.
+    """
+
+    def __init__(self, root: Path, idle_seconds: float, max_open: int):
+        self.root = root
+        self.idle_seconds = idle_seconds
+        self.max_open = max(1, max_open)
+        self._open: Dict[str, _OpenNotebook] = {
+            DEFAULT_NOTEBOOK: _OpenNotebook(engine, AsyncLocalSession)
+        }
+        # Held while notebooks are added to or closed from `_open`
+        self._open_lock = asyncio.Lock()
+        # Notebooks being opened, so that their callers share one opening
+        self._opening: Dict[str, asyncio.Task] = {}
+        self._reaper: Optional[asyncio.Task] = None
+        # Run on a session of each notebook when it is opened, e.g. to backfill indexes
+        self.open_hooks: List[Callable[[AsyncSession], Awaitable[object]]] = []
+
+    def path(self, name: str) -> Path:
+        return self.root / f"{name}.db"
+
+    def names(self) -> List[str]:
+        """
+        The default notebook first, then the others by name. Files in the
+        directory that are not named like a notebook are left out.
+        """
+        stems = sorted(p.stem for p in self.root.glob("*.db")) if self.root.is_dir() else []
+        return [DEFAULT_NOTEBOOK] + [
+            n for n in stems if n != DEFAULT_NOTEBOOK and _NOTEBOOK_NAME_RE.fullmatch(n)
+        ]
+
+    def exists(self, name: str) -> bool:
+        return name in self._open or (
+            _NOTEBOOK_NAME_RE.fullmatch(name) is not None and self.path(name).exists()
+        )
+
+    def is_open(self, name: str) -> bool:
+        return name in self._open
+
+    def open_names(self) -> List[str]:
+        """The notebooks open at the moment, the default one first."""
+        return [n for n in self.names() if n in self._open]
+
+    async def create(self, name: str) -> None:
+        """Create a notebook's database. Raises ValueError if the name is invalid or taken."""
+        if not _NOTEBOOK_NAME_RE.fullmatch(name) or name == DEFAULT_NOTEBOOK:
+            raise ValueError(
+                "notebook names are 1-64 lowercase letters, digits, '-' or '_'"
+                f" and cannot be '{DEFAULT_NOTEBOOK}'"
+            )
+        self.root.mkdir(parents=True, exist_ok=True)
+        # Claimed atomically, so of two concurrent creations only one succeeds
+        try:
+            os.close(os.open(self.path(name), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644))
+        except FileExistsError:
+            raise ValueError(f"notebook '{name}' already exists") from None
+        async with self.session(name):
+            pass
+
+    async def _get(self, name: str) -> _OpenNotebook:
+        notebook = self._open.get(name)
+        if notebook is not None:
+            return notebook
+        opening = self._opening.get(name)
+        if opening is None:
+            if not _NOTEBOOK_NAME_RE.fullmatch(name) or not self.path(name).exists():
+                raise NotebookNotFound(name)
+            opening = asyncio.create_task(self._open_notebook(name))
+            self._opening[name] = opening
+        # Shielded so that a caller giving up does not abort it for the others
+        return await asyncio.shield(opening)
+
+    async def _open_notebook(self, name: str) -> _OpenNotebook:
+        """
+        Open a notebook's database and run the open hooks on it. Only adding
+        it to the open notebooks takes the lock, so a notebook with slow
+        backfills does not hold up the others.
+        """
+        notebook_engine = create_sqlite_engine(
+            f"sqlite+aiosqlite:///{self.path(name)}", echo=engine.echo
+        )
+        registered = False
+        try:
+            await create_tables(notebook_engine)
+            notebook = _OpenNotebook(
+                notebook_engine,
+                async_sessionmaker(notebook_engine, class_=AsyncSession, expire_on_commit=False),
+            )
+            async with notebook.sessions() as session:
+                session.info["notebook"] = name
+                for hook in self.open_hooks:
+                    await hook(session)
+            async with self._open_lock:
+                notebook.last_used = time.monotonic()
+                self._open[name] = notebook
+                registered = True
+                if len(self._open) > self.max_open:
+                    await self._close_idle(keep=self.max_open, spare=name)
+            return notebook
+        finally:
+            del self._opening[name]
+            if not registered:
+                await notebook_engine.dispose()
+
+    @asynccontextmanager
+    async def session(self, name: str) -> AsyncIterator[AsyncSession]:
+        """A session on the named notebook. Raises NotebookNotFound."""
+        notebook = await self._get(name)
+        notebook.active += 1
+        try:
+            async with notebook.sessions() as session:
+                session.info["notebook"] = name
+                yield session
+        finally:
+            notebook.active -= 1
+            notebook.last_used = time.monotonic()
+
+    async def fan_out(
+        self,
+        query: Callable[[AsyncSession], Awaitable[T]],
+        names: Optional[List[str]] = None,
+    ) -> Dict[str, T]:
+        """
+        Run `query` on every notebook (or the named ones) at once; results are
+        keyed by notebook.
+        """
+        names = self.names() if names is None else names
+
+        async def run(name: str) -> T:
+            async with self.session(name) as session:
+                return await query(session)
+
+        return dict(zip(names, await asyncio.gather(*(run(name) for name in names))))
+
+    async def _close_idle(self, keep: Optional[int] = None, spare: Optional[str] = None) -> None:
+        """
+        Close notebooks idle for longer than idle_seconds or, with `keep`,
+        the least recently used idle ones until at most `keep` are open.
+        `spare` is never closed, e.g. a notebook about to be used.
+        """
+        now = time.monotonic()
+        idle = sorted(
+            (n.last_used, name) for name, n in self._open.items()
+            if name not in (DEFAULT_NOTEBOOK, spare) and n.active == 0
+        )
+        excess = len(self._open) - keep if keep is not None else 0
+        for last_used, name in idle:
+            if excess <= 0 and now - last_used < self.idle_seconds:
+                break
+            notebook = self._open.pop(name)
+            excess -= 1
+            await notebook.engine.dispose()
+
+    async def _reap(self) -> None:
+        while True:
+            await asyncio.sleep(max(1.0, self.idle_seconds / 2))
+            async with self._open_lock:
+                await self._close_idle()
+
+    def start(self) -> None:
+        """Start closing idle notebooks in the background."""
+        if self._reaper is None:
+            self._reaper = asyncio.create_task(self._reap())
+
+    async def stop(self) -> None:
+        """Stop the background task and close every notebook but the default."""
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        openings = list(self._opening.values())
+        for opening in openings:
+            opening.cancel()
+        await asyncio.gather(*openings, return_exceptions=True)
+        async with self._open_lock:
+            for name in [n for n in self._open if n != DEFAULT_NOTEBOOK]:
+                await self._open.pop(name).engine.dispose()
+
+
+notebooks = NotebookRegistry(
+    Path(settings.NOTEBOOKS_DIR), settings.NOTEBOOK_IDLE_SECONDS, settings.NOTEBOOK_MAX_OPEN
+)
+
+
+def database_path(name: str = DEFAULT_NOTEBOOK) -> Optional[Path]:
+    """The file holding a notebook, or None if DATABASE_URL is not a SQLite file."""
+    if name != DEFAULT_NOTEBOOK:
+        return notebooks.path(name)
+    prefix = "sqlite+aiosqlite:///"
+    if settings.DATABASE_URL.startswith(prefix):
+        return Path(settings.DATABASE_URL[len(prefix):])
+    return None
+
+
+def notebook_of(conn: AsyncSession) -> str:
+    """The notebook a session was opened on."""
+    return conn.info.get("notebook", DEFAULT_NOTEBOOK)
 
-async def get_db_connection() -> AsyncGenerator[AsyncSession, None]:
+
+async def get_db_connection(
+    notebook: Optional[str] = Query(None, description="Notebook to use instead of the default one"),
+) -> AsyncGenerator[AsyncSession, None]:
     """Establishes a connection to the SQLite database and returns the connection object."""
-    async with AsyncLocalSession() as session:
+    name = notebook or DEFAULT_NOTEBOOK
+    if not notebooks.exists(name):
+        raise HTTPException(status_code=404, detail=f"Notebook '{name}' not found")
+    async with notebooks.session(name) as session:
         yield session
 
 
-async def create_tables():
-    """Creates the 'notes' table and a trigger to update the 'updated_at' timestamp."""
+async def get_meta(conn: AsyncSession, key: str) -> Optional[str]:
+    """Read a value from the 'journal_meta' key/value table."""
+    result = await conn.execute(
+        text("SELECT value FROM journal_meta WHERE key = :key"), {"key": key}
+    )
+    return result.scalar_one_or_none()
+
+
+async def set_meta(conn: AsyncSession, key: str, value: str) -> None:
+    """Write a value to the 'journal_meta' key/value table. Does not commit."""
+    await conn.execute(
+        text(
+            "INSERT INTO journal_meta (key, value) VALUES (:key, :value) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value"
+        ),
+        {"key": key, "value": value},
+    )
+
+
+async def create_tables(bind: Optional[AsyncEngine] = None):
+    """Creates the 'notes' table, its 'updated_at' trigger and the note index tables."""
 
     def _create_tables(conn):
         conn.exec_driver_sql("""
@@ -34,9 +317,24 @@ async def create_tables():
                 content TEXT,
                 created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
                 updated_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
-                is_deleted INTEGER NOT NULL DEFAULT 0
+                is_deleted INTEGER NOT NULL DEFAULT 0,
+                version INTEGER NOT NULL DEFAULT 1
             )
         """)
+        # Databases created before notes were versioned
+        columns = {row[1] for row in conn.exec_driver_sql("PRAGMA table_info(notes)")}
+        if "version" not in columns:
+            conn.exec_driver_sql(
+                "ALTER TABLE notes ADD COLUMN version INTEGER NOT NULL DEFAULT 1"
+            )
+        # Covers the filter and order of listings. Databases from before
+        # listing ETags used notes_generation have it with `version` as well
+        indexed = {row[2] for row in conn.exec_driver_sql("PRAGMA index_info(idx_notes_listing)")}
+        if "version" in indexed:
+            conn.exec_driver_sql("DROP INDEX idx_notes_listing")
+        conn.exec_driver_sql(
+            "CREATE INDEX IF NOT EXISTS idx_notes_listing ON notes (is_deleted, updated_at)"
+        )
         conn.exec_driver_sql("""
             CREATE TRIGGER IF NOT EXISTS update_notes_updated_at
             AFTER UPDATE ON notes
@@ -47,7 +345,160 @@ async def create_tables():
                 WHERE id = OLD.id;
             END;
         """)
+        # Log of note changes that other worker processes replay into their
+        # in-memory state, which only the default notebook has. Only the
+        # columns they cache are watched, which also leaves out the nested
+        # update of updated_at above
+        conn.exec_driver_sql("""
+            CREATE TABLE IF NOT EXISTS note_changes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                note_id INTEGER NOT NULL
+            )
+        """)
+        if bind is None:
+            conn.exec_driver_sql("""
+                CREATE TRIGGER IF NOT EXISTS log_note_insert AFTER INSERT ON notes
+                BEGIN
+                    INSERT INTO note_changes (note_id) VALUES (NEW.id);
+                END;
+            """)
+            conn.exec_driver_sql("""
+                CREATE TRIGGER IF NOT EXISTS log_note_update
+                AFTER UPDATE OF title, is_deleted ON notes
+                BEGIN
+                    INSERT INTO note_changes (note_id) VALUES (NEW.id);
+                END;
+            """)
+            conn.exec_driver_sql("""
+                CREATE TRIGGER IF NOT EXISTS log_note_delete AFTER DELETE ON notes
+                BEGIN
+                    INSERT INTO note_changes (note_id) VALUES (OLD.id);
+                END;
+            """)
+        conn.exec_driver_sql("""
+            CREATE TABLE IF NOT EXISTS journal_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            )
+        """)
+        # Counts writes to notes, so that listings can tell they are unchanged
+        # without comparing their contents (see note_service.get_listing_stamp)
+        conn.exec_driver_sql(
+            "INSERT OR IGNORE INTO journal_meta (key, value) "
+            f"VALUES ('{NOTES_GENERATION_KEY}', '0')"
+        )
+        for operation in ("INSERT", "UPDATE", "DELETE"):
+            conn.exec_driver_sql(f"""
+                CREATE TRIGGER IF NOT EXISTS count_note_{operation.lower()}
+                AFTER {operation} ON notes
+                BEGIN
+                    UPDATE journal_meta SET value = CAST(value AS INTEGER) + 1
+                    WHERE key = '{NOTES_GENERATION_KEY}';
+                END;
+            """)
+        conn.exec_driver_sql("""
+            CREATE TABLE IF NOT EXISTS note_minhash (
+                note_id INTEGER PRIMARY KEY,
+                signature BLOB NOT NULL
+            )
+        """)
+        conn.exec_driver_sql("""
+            CREATE TABLE IF NOT EXISTS note_lsh_buckets (
+                band INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                note_id INTEGER NOT NULL,
+                PRIMARY KEY (band, bucket, note_id)
+            ) WITHOUT ROWID
+        """)
+        conn.exec_driver_sql(
+            "CREATE INDEX IF NOT EXISTS idx_note_lsh_buckets_note_id "
+            "ON note_lsh_buckets (note_id)"
+        )
+        conn.exec_driver_sql("""
+            CREATE TABLE IF NOT EXISTS note_tags (
+                tag TEXT NOT NULL,
+                note_id INTEGER NOT NULL,
+                PRIMARY KEY (tag, note_id)
+            ) WITHOUT ROWID
+        """)
+        conn.exec_driver_sql(
+            "CREATE INDEX IF NOT EXISTS idx_note_tags_note_id ON note_tags (note_id)"
+        )
+        conn.exec_driver_sql("""
+            CREATE TABLE IF NOT EXISTS note_links (
+                target_key TEXT NOT NULL,
+                source_id INTEGER NOT NULL,
+                PRIMARY KEY (target_key, source_id)
+            ) WITHOUT ROWID
+        """)
+        conn.exec_driver_sql(
+            "CREATE INDEX IF NOT EXISTS idx_note_links_source_id ON note_links (source_id)"
+        )
+        conn.exec_driver_sql("""
+            CREATE TABLE IF NOT EXISTS attachments (
+                sha256 TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                content_type TEXT NOT NULL,
+                created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+            ) WITHOUT ROWID
+        """)
+        conn.exec_driver_sql("""
+            CREATE TABLE IF NOT EXISTS note_attachments (
+                note_id INTEGER NOT NULL,
+                sha256 TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                PRIMARY KEY (note_id, sha256)
+            ) WITHOUT ROWID
+        """)
+        conn.exec_driver_sql(
+            "CREATE INDEX IF NOT EXISTS idx_note_attachments_sha256 ON note_attachments (sha256)"
+        )
+        conn.exec_driver_sql("""
+            CREATE TABLE IF NOT EXISTS note_stats (
+                note_id INTEGER PRIMARY KEY,
+                words INTEGER NOT NULL,
+                chars INTEGER NOT NULL,
+                is_deleted INTEGER NOT NULL
+            )
+        """)
+        conn.exec_driver_sql("""
+            CREATE TABLE IF NOT EXISTS journal_totals (
+                is_deleted INTEGER PRIMARY KEY,
+                notes INTEGER NOT NULL,
+                words INTEGER NOT NULL,
+                chars INTEGER NOT NULL
+            )
+        """)
+        conn.exec_driver_sql("""
+            CREATE TABLE IF NOT EXISTS note_revisions (
+                note_id INTEGER NOT NULL,
+                version INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                base_version INTEGER,
+                title TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                data BLOB NOT NULL,
+                saved_at TEXT NOT NULL,
+                PRIMARY KEY (note_id, version)
+            )
+        """)
+        conn.exec_driver_sql("""
+            CREATE TABLE IF NOT EXISTS note_summaries (
+                note_id INTEGER PRIMARY KEY,
+                version INTEGER NOT NULL,
+                generator TEXT NOT NULL,
+                summary TEXT NOT NULL
+            )
+        """)
+        conn.exec_driver_sql("""
+            CREATE TABLE IF NOT EXISTS journal_daily_stats (
+                day TEXT PRIMARY KEY,
+                created INTEGER NOT NULL DEFAULT 0,
+                updated INTEGER NOT NULL DEFAULT 0,
+                words_written INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+        """)
 
-    async with engine.begin() as conn:
+    async with (bind or engine).begin() as conn:
         await conn.run_sync(_create_tables)
         print("Database and tables verified successfully.")
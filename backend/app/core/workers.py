@@ -0,0 +1,98 @@
+# backend/core/workers.py
+
+"""
+Coordination between worker processes serving the same database
+(`uvicorn --workers N`).
+
+Startup side effects (creating tables, backfills, sweeping attachments,
+starting Ollama, scheduled maintenance) must run once, not once per worker.
+The first worker to start takes the leader lock, which it holds until it
+exits; the others wait until it has prepared the database. If the leader
+dies, the next worker that starts takes over.
+
+Locks are `flock` locks on files next to the database, released by the OS
+when a process exits. Where `fcntl` is unavailable (Windows) every process
+acts as the leader, so run a single worker there.
+"""
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+from app.core.database import database_path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+class FileLock:
+    """An exclusive lock on a file, shared by every process that opens the same path."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """Take the lock, waiting for it unless `blocking` is false. Returns whether it was taken."""
+        if fcntl is None:
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+
+@asynccontextmanager
+async def file_lock(path: Path) -> AsyncIterator[None]:
+    """Hold a FileLock, waiting for it in a thread rather than on the event loop."""
+    lock = FileLock(path)
+    await asyncio.to_thread(lock.acquire)
+    try:
+        yield
+    finally:
+        lock.release()
+
+
+class WorkerRole:
+    def __init__(self, base: Path):
+        self._startup = FileLock(base.with_name(f"{base.name}.startup.lock"))
+        self._leader = FileLock(base.with_name(f"{base.name}.leader.lock"))
+        self.is_leader = False
+
+    async def start(self) -> bool:
+        """
+        Wait until no other worker is starting up, then return whether this
+        worker is the leader. The leader must call `ready` once the database
+        is prepared; until then the other workers wait here.
+        """
+        await asyncio.to_thread(self._startup.acquire)
+        self.is_leader = self._leader.acquire(blocking=False)
+        if not self.is_leader:
+            self._startup.release()
+        return self.is_leader
+
+    def ready(self) -> None:
+        """Let the workers waiting in `start` continue."""
+        self._startup.release()
+
+    def stop(self) -> None:
+        self._startup.release()
+        self._leader.release()
+        self.is_leader = False
+
+
+worker_role = WorkerRole(database_path() or Path("journal.db"))
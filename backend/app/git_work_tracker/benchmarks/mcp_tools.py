@@ -0,0 +1,170 @@
+"""
+benchmarks/mcp_tools.py
+Time the MCP tools on a synthetic repository and count the git commands they run
+
+Builds a repository of the given shape, calls each tool through an in-memory
+MCP session (cold first, then warm) and prints the results as JSON, so runs
+with different shapes, settings or code can be compared. Run from backend/app:
+
+    python -m git_work_tracker.benchmarks.mcp_tools --commits 2000 --files 500 --output before.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from copy import deepcopy
+from pathlib import Path
+
+from git_work_tracker.benchmarks.synthetic_repo import RepoShape, build_repo
+
+
+def _cases(repo: str, shape: RepoShape, page_size: int) -> list[tuple[str, dict]]:
+    """The tool calls to time, as (tool name, arguments)."""
+    since = f"{shape.days:g} days ago"
+    return [
+        ("generate_work_note", {"repo_path": repo}),
+        ("generate_work_note", {"repo_path": repo, "since": since, "page_size": page_size}),
+        ("generate_work_note", {
+            "repo_path": repo, "since": since, "page_size": page_size, "token_budget": 8000,
+        }),
+        ("list_todays_commits", {"repo_path": repo}),
+        ("list_commits", {"repo_path": repo, "since": since}),
+        ("get_commit_details", {"repo_path": repo, "commit_hash": "HEAD"}),
+        ("check_git_status", {"repo_path": repo}),
+        ("generate_workspace_work_note", {"roots": [str(Path(repo).parent)]}),
+    ]
+
+
+def _git_delta(before: dict, after: dict) -> dict:
+    """Git commands run between two snapshots of `git_stats.commands`."""
+    delta = {}
+    for name, stats in after.items():
+        previous = before.get(name)
+        calls = stats.calls - (previous.calls if previous else 0)
+        if calls:
+            delta[name] = {
+                "calls": calls,
+                "seconds": round(stats.seconds - (previous.seconds if previous else 0), 4),
+                "output_bytes": stats.output_bytes - (previous.output_bytes if previous else 0),
+            }
+    return delta
+
+
+def _environment() -> dict:
+    git_version = subprocess.run(["git", "--version"], capture_output=True, text=True).stdout.strip()
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "git": git_version,
+        "settings": {
+            key: value for key, value in sorted(os.environ.items())
+            if key.startswith("GIT_TRACKER_") and key != "GIT_TRACKER_DATA_DIR"
+        },
+    }
+
+
+async def run(shape: RepoShape, repeat: int, page_size: int, workdir: str) -> dict:
+    # Fresh server state, so the first call of each tool is a cold one
+    os.environ["GIT_TRACKER_DATA_DIR"] = str(Path(workdir) / "data")
+    from git_work_tracker.server import mcp
+    from git_work_tracker.tools.git_stats import git_stats
+    from git_work_tracker.tools.git_tracker import peak_memory_mb
+    from mcp.shared.memory import create_connected_server_and_client_session
+
+    repo = str(Path(workdir) / "workspace" / "repo")
+    Path(repo).parent.mkdir(parents=True)
+    print(f"Building {shape.commits} commits in {repo}...", file=sys.stderr)
+    repo_info = build_repo(repo, shape)
+    print(f"Built in {repo_info['build_seconds']}s", file=sys.stderr)
+
+    results = []
+    async with create_connected_server_and_client_session(mcp._mcp_server) as client:
+        for tool, args in _cases(repo, shape, page_size):
+            runs = []
+            for _ in range(repeat):
+                before = deepcopy(git_stats.commands)
+                started = time.perf_counter()
+                result = await client.call_tool(tool, args)
+                seconds = time.perf_counter() - started
+                git = _git_delta(before, git_stats.commands)
+                runs.append({
+                    "seconds": round(seconds, 4),
+                    "git_calls": sum(entry["calls"] for entry in git.values()),
+                    "git_seconds": round(sum(entry["seconds"] for entry in git.values()), 4),
+                    "git": git,
+                    "result_bytes": sum(len(getattr(part, "text", "")) for part in result.content),
+                    "error": result.isError,
+                })
+            warm = [run["seconds"] for run in runs[1:]] or [runs[0]["seconds"]]
+            results.append({
+                "tool": tool,
+                "args": {key: value for key, value in args.items() if key not in ("repo_path", "roots")},
+                "cold_seconds": runs[0]["seconds"],
+                "warm_median_seconds": round(statistics.median(warm), 4),
+                "runs": runs,
+            })
+            print(
+                f"  {tool:<30} cold {runs[0]['seconds'] * 1000:9.1f} ms "
+                f"({runs[0]['git_calls']} git)   warm {statistics.median(warm) * 1000:9.1f} ms "
+                f"({runs[-1]['git_calls']} git)",
+                file=sys.stderr,
+            )
+
+    return {
+        "environment": _environment(),
+        "repo": repo_info,
+        "repeat": repeat,
+        "tools": results,
+        "git_totals": git_stats.to_dict()["by_subcommand"],
+        "peak_memory_mb": round(peak_memory_mb(), 1),
+    }
+
+
+if __name__ == "__main__":
+    defaults = RepoShape()
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--commits", type=int, default=defaults.commits)
+    parser.add_argument("--files", type=int, default=defaults.files, help="Text files in the first commit")
+    parser.add_argument("--file-lines", type=int, default=defaults.file_lines, help="Lines per new text file")
+    parser.add_argument("--files-per-commit", type=int, default=defaults.files_per_commit)
+    parser.add_argument("--lines-per-change", type=int, default=defaults.lines_per_change,
+                        help="Lines replaced in each touched text file (diff size)")
+    parser.add_argument("--hunks-per-change", type=int, default=defaults.hunks_per_change)
+    parser.add_argument("--binary-ratio", type=float, default=defaults.binary_ratio)
+    parser.add_argument("--new-file-ratio", type=float, default=defaults.new_file_ratio)
+    parser.add_argument("--days", type=float, default=defaults.days, help="Days the commits are spread over")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--repeat", type=int, default=3, help="Calls per tool; the first one is cold")
+    parser.add_argument("--page-size", type=int, default=50, help="page_size for range notes")
+    parser.add_argument("--output", help="Write the JSON here instead of stdout")
+    parser.add_argument("--keep", action="store_true", help="Keep the repository and server state")
+    args = parser.parse_args()
+
+    shape = RepoShape(
+        commits=args.commits, files=args.files, file_lines=args.file_lines,
+        files_per_commit=args.files_per_commit, lines_per_change=args.lines_per_change,
+        hunks_per_change=args.hunks_per_change, binary_ratio=args.binary_ratio,
+        new_file_ratio=args.new_file_ratio, days=args.days, seed=args.seed,
+    )
+    workdir = tempfile.mkdtemp(prefix="git-tracker-bench-")
+    try:
+        report = asyncio.run(run(shape, max(1, args.repeat), args.page_size, workdir))
+    finally:
+        if args.keep:
+            print(f"Kept {workdir}", file=sys.stderr)
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
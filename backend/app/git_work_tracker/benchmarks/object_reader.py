@@ -0,0 +1,109 @@
+"""
+benchmarks/object_reader.py
+Compare the in-process object reader with the git CLI on a real repository
+
+Checks that both backends agree on commit lists and per-commit file stats,
+then times each of them. Run from backend/app:
+
+    python -m git_work_tracker.benchmarks.object_reader /path/to/repo --commits 200
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime
+
+from git_work_tracker.tools import git_objects
+from git_work_tracker.tools.git_tracker import (
+    _resolve_repo,
+    iter_commits_with_changes,
+    run_git_command,
+)
+from git_work_tracker.tools.path_filters import PathFilter
+
+
+async def _timed(func, repeat: int) -> list[float]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await func()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def _report(label: str, timings: list[float]) -> None:
+    print(
+        f"  {label:<10} median {statistics.median(timings) * 1000:8.1f} ms"
+        f"   min {min(timings) * 1000:8.1f} ms"
+    )
+
+
+async def main(repo_path: str, commits: int, repeat: int, concurrency: int) -> None:
+    root, git_dir = await _resolve_repo(repo_path)
+    path_filter = PathFilter()
+    matches = path_filter.matcher()
+
+    # Choose a --since date that covers roughly the requested number of commits
+    stdout, _, _ = await run_git_command(
+        ["git", "log", "--format=%ct", f"--max-count={commits}"], root
+    )
+    oldest = int(stdout.split()[-1])
+    log_args = [f"--since={datetime.fromtimestamp(oldest).strftime('%Y-%m-%d %H:%M:%S')}"]
+
+    async def cli_list():
+        out, _, _ = await run_git_command(["git", "log", "--format=%H", *log_args], root)
+        return out.split()
+
+    async def native_list():
+        return await asyncio.to_thread(git_objects.list_commits, git_dir, log_args)
+
+    async def cli_changes():
+        return [
+            c async for c in iter_commits_with_changes(
+                root, hashes, include_patch=False, path_filter=path_filter
+            )
+        ]
+
+    async def native_changes():
+        return await asyncio.to_thread(
+            git_objects.commits_changes, git_dir, hashes, matches, path_filter.detect_renames
+        )
+
+    hashes = await cli_list()
+    native_hashes = await native_list()
+    print(f"Repository: {root}")
+    print(f"Commits since {log_args[0][8:]}: {len(hashes)}")
+    print(f"Commit lists match: {hashes == native_hashes}")
+
+    expected = {c["hash"]: c for c in await cli_changes()}
+    native = await native_changes()
+    mismatched = [
+        h for h, (header, files) in native.items()
+        if files != expected[h]["files"]
+        or any(header[key] != expected[h][key] for key in ("author", "email", "date", "message"))
+    ]
+    print(f"Handled in-process: {len(native)} of {len(hashes)} commits (rest fall back to git)")
+    print(f"Mismatching commits: {len(mismatched)} {mismatched[:5]}")
+
+    print(f"\nCommit list ({repeat} runs):")
+    _report("git", await _timed(cli_list, repeat))
+    _report("native", await _timed(native_list, repeat))
+
+    print(f"\nFile stats of {len(hashes)} commits ({repeat} runs):")
+    _report("git", await _timed(cli_changes, repeat))
+    _report("native", await _timed(native_changes, repeat))
+
+    print(f"\nCommit list, {concurrency} concurrent callers ({repeat} runs):")
+    _report("git", await _timed(lambda: asyncio.gather(*(cli_list() for _ in range(concurrency))), repeat))
+    _report("native", await _timed(lambda: asyncio.gather(*(native_list() for _ in range(concurrency))), repeat))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("repo", help="Path to a git repository")
+    parser.add_argument("--commits", type=int, default=200, help="Approximate number of commits to cover")
+    parser.add_argument("--repeat", type=int, default=10, help="Timed runs per measurement")
+    parser.add_argument("--concurrency", type=int, default=16, help="Simultaneous callers in the load test")
+    args = parser.parse_args()
+    asyncio.run(main(args.repo, args.commits, args.repeat, args.concurrency))
@@ -0,0 +1,140 @@
+"""
+benchmarks/synthetic_repo.py
+Build reproducible git repositories of a chosen shape for benchmarks
+
+Commits are written with `git fast-import`, so even tens of thousands of
+commits take seconds. Their dates are spread evenly over the last `days`
+days up to now, so "today" covers the newest 1/`days` of them.
+"""
+
+import random
+import subprocess
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+_EXTENSIONS = (".py", ".ts", ".go", ".md", ".json")
+_BINARY_EXTENSIONS = (".png", ".bin")
+
+
+@dataclass(frozen=True)
+class RepoShape:
+    """What a synthetic repository looks like."""
+    commits: int = 500
+    files: int = 200               # text files in the first commit
+    file_lines: int = 200          # lines per new text file
+    files_per_commit: int = 4      # files each later commit touches
+    lines_per_change: int = 10     # lines replaced per touched text file
+    hunks_per_change: int = 2      # places in the file those lines are spread over
+    binary_ratio: float = 0.05     # share of touched files that are binary
+    new_file_ratio: float = 0.1    # share of touched files that are new
+    days: float = 7.0
+    seed: int = 1
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def _line(rng: random.Random) -> bytes:
+    name = f"value_{rng.randrange(10**6)}"
+    return rng.choice((
+        f"    {name} = compute({rng.randrange(1000)}, {rng.randrange(1000)})\n",
+        f"def {name}(arg):\n",
+        f"    return {name} + {rng.randrange(100)}  # adjusted\n",
+        f"    if {name} > {rng.randrange(1000)}:\n",
+        f"import module_{rng.randrange(50)}\n",
+    )).encode()
+
+
+def _data(payload: bytes) -> bytes:
+    return b"data %d\n%s\n" % (len(payload), payload)
+
+
+def build_repo(path: str, shape: RepoShape) -> dict:
+    """
+    Create a repository at `path` (which must not exist) with one branch,
+    `main`, shaped like `shape`. Returns a summary of what was written.
+    """
+    rng = random.Random(shape.seed)
+    started = time.perf_counter()
+    subprocess.run(["git", "init", "-q", "-b", "main", path], check=True)
+
+    texts: dict[str, list[bytes]] = {}
+    binaries: list[str] = []
+    counter = 0
+
+    def new_path(binary: bool) -> str:
+        nonlocal counter
+        counter += 1
+        extension = rng.choice(_BINARY_EXTENSIONS if binary else _EXTENSIONS)
+        return f"pkg{counter % 17}/mod{counter % 5}/file{counter}{extension}"
+
+    def new_text() -> list[bytes]:
+        return [_line(rng) for _ in range(shape.file_lines)]
+
+    def new_binary() -> bytes:
+        return bytes(rng.randrange(256) for _ in range(shape.file_lines * 8)) + b"\0"
+
+    now = int(time.time())
+    first = now - int(shape.days * 86400)
+    step = (now - first) / max(1, shape.commits)
+    stream = []
+    written = {"text_changes": 0, "binary_changes": 0, "new_files": 0}
+
+    for index in range(shape.commits):
+        changes = []
+        if index == 0:
+            for _ in range(shape.files):
+                file_path = new_path(binary=False)
+                texts[file_path] = new_text()
+                changes.append((file_path, b"".join(texts[file_path])))
+        else:
+            for _ in range(shape.files_per_commit):
+                binary = rng.random() < shape.binary_ratio
+                if rng.random() < shape.new_file_ratio or (binary and not binaries) or not texts:
+                    file_path = new_path(binary)
+                    written["new_files"] += 1
+                    if binary:
+                        binaries.append(file_path)
+                    else:
+                        texts[file_path] = new_text()
+                elif binary:
+                    file_path = rng.choice(binaries)
+                else:
+                    file_path = rng.choice(list(texts))
+                    lines = texts[file_path]
+                    per_hunk = max(1, shape.lines_per_change // max(1, shape.hunks_per_change))
+                    for _ in range(max(1, shape.hunks_per_change)):
+                        at = rng.randrange(max(1, len(lines) - per_hunk))
+                        lines[at:at + per_hunk] = [_line(rng) for _ in range(per_hunk)]
+                if binary:
+                    written["binary_changes"] += 1
+                    changes.append((file_path, new_binary()))
+                else:
+                    written["text_changes"] += 1
+                    changes.append((file_path, b"".join(texts[file_path])))
+
+        when = int(first + step * (index + 1))
+        stream.append(b"commit refs/heads/main\n")
+        stream.append(b"mark :%d\n" % (index + 1))
+        stream.append(b"author Bench <bench@example.com> %d +0000\n" % when)
+        stream.append(b"committer Bench <bench@example.com> %d +0000\n" % when)
+        stream.append(_data(f"Change {index + 1}: update {len(changes)} files".encode()))
+        if index:
+            stream.append(b"from :%d\n" % index)
+        for file_path, content in changes:
+            stream.append(b"M 100644 inline %s\n" % file_path.encode())
+            stream.append(_data(content))
+        stream.append(b"\n")
+
+    subprocess.run(
+        ["git", "fast-import", "--quiet"], input=b"".join(stream), cwd=path, check=True
+    )
+    subprocess.run(["git", "checkout", "-q", "-f", "main"], cwd=path, check=True)
+    return {
+        "path": str(Path(path).resolve()),
+        "shape": shape.to_dict(),
+        "files": len(texts) + len(binaries),
+        **written,
+        "build_seconds": round(time.perf_counter() - started, 3),
+    }
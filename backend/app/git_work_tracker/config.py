@@ -0,0 +1,74 @@
+"""
+config.py
+Runtime settings for the Git Work Tracker MCP server, read from the environment
+"""
+
+import os
+from pathlib import Path
+
+# Directory for the server's persistent state (commit cache, jobs, notes)
+DATA_DIR = Path(
+    os.environ.get("GIT_TRACKER_DATA_DIR", Path.home() / ".the-journal" / "git_work_tracker")
+).expanduser()
+
+# Upper bound for the on-disk commit cache; 0 disables caching
+COMMIT_CACHE_MAX_BYTES = int(os.environ.get("GIT_TRACKER_COMMIT_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+# Maximum number of git processes running at once across all tool calls
+MAX_GIT_PROCESSES = int(os.environ.get("GIT_TRACKER_MAX_GIT_PROCESSES", 8))
+
+# Hard cap on the output kept from a single git process, and on a single
+# commit's record in the streamed `git log` output
+MAX_GIT_OUTPUT_BYTES = int(os.environ.get("GIT_TRACKER_MAX_GIT_OUTPUT_BYTES", 16 * 1024 * 1024))
+
+# Diff budgets for work notes: patch text kept per file and per commit
+MAX_FILE_DIFF_BYTES = int(os.environ.get("GIT_TRACKER_MAX_FILE_DIFF_BYTES", 64 * 1024))
+MAX_COMMIT_DIFF_BYTES = int(os.environ.get("GIT_TRACKER_MAX_COMMIT_DIFF_BYTES", 512 * 1024))
+
+# Seconds a repository snapshot (branch and status) may be reused while HEAD
+# and the index are unchanged; bounds how long unstaged edits go unnoticed
+SNAPSHOT_TTL_SECONDS = float(os.environ.get("GIT_TRACKER_SNAPSHOT_TTL_SECONDS", 2.0))
+
+# How commit lists and per-commit file stats are read: "cli" runs git for
+# everything, "native" reads the object database in-process and falls back
+# to git for anything it does not handle
+OBJECT_BACKEND = os.environ.get("GIT_TRACKER_OBJECT_BACKEND", "cli").lower()
+
+# Days a finished background job and its result are kept on disk
+JOB_RETENTION_DAYS = float(os.environ.get("GIT_TRACKER_JOB_RETENTION_DAYS", 7))
+
+# Repository watcher: how it notices new commits ("auto" uses inotify where
+# available and polls elsewhere, "poll" always polls), the poll interval,
+# and how long activity must pause (but at most be delayed) before the
+# daily note is recomputed, so rebases and fetches cause one refresh
+WATCH_BACKEND = os.environ.get("GIT_TRACKER_WATCH_BACKEND", "auto").lower()
+WATCH_POLL_SECONDS = float(os.environ.get("GIT_TRACKER_WATCH_POLL_SECONDS", 2.0))
+WATCH_DEBOUNCE_SECONDS = float(os.environ.get("GIT_TRACKER_WATCH_DEBOUNCE_SECONDS", 1.0))
+WATCH_MAX_DELAY_SECONDS = float(os.environ.get("GIT_TRACKER_WATCH_MAX_DELAY_SECONDS", 15.0))
+
+# Work-note compaction (token_budget): hunks at least this many tokens may be
+# summarized by the local LLM, at most this many per note, this many at once,
+# each given this long before the hunk is ranked unsummarized
+COMPACTION_SUMMARY_MIN_TOKENS = int(os.environ.get("GIT_TRACKER_COMPACTION_SUMMARY_MIN_TOKENS", 400))
+COMPACTION_MAX_SUMMARIES = int(os.environ.get("GIT_TRACKER_COMPACTION_MAX_SUMMARIES", 8))
+COMPACTION_SUMMARY_CONCURRENCY = int(os.environ.get("GIT_TRACKER_COMPACTION_SUMMARY_CONCURRENCY", 2))
+COMPACTION_SUMMARY_TIMEOUT_SECONDS = float(os.environ.get("GIT_TRACKER_COMPACTION_SUMMARY_TIMEOUT_SECONDS", 60))
+
+# Saving notes to the Journal: "api" posts to its HTTP API over pooled
+# connections, "direct" writes through the backend's note_service into the
+# database named by DATABASE_URL (server started from backend/, next to the
+# API), retrying writes that find the database busy
+JOURNAL_WRITE_MODE = os.environ.get("GIT_TRACKER_JOURNAL_WRITE_MODE", "api").lower()
+JOURNAL_API_URL = os.environ.get("GIT_TRACKER_JOURNAL_API_URL", "http://127.0.0.1:8000")
+JOURNAL_MAX_CONNECTIONS = int(os.environ.get("GIT_TRACKER_JOURNAL_MAX_CONNECTIONS", 8))
+JOURNAL_BATCH_CONCURRENCY = int(os.environ.get("GIT_TRACKER_JOURNAL_BATCH_CONCURRENCY", 4))
+JOURNAL_BUSY_RETRIES = int(os.environ.get("GIT_TRACKER_JOURNAL_BUSY_RETRIES", 6))
+
+# Reading the Journal: its SQLite file (by default the one the API creates
+# when started from backend/), read-only connections kept open, and query
+# results cached until the database changes
+JOURNAL_DB_PATH = Path(
+    os.environ.get("GIT_TRACKER_JOURNAL_DB", Path(__file__).resolve().parents[2] / "journal.db")
+).expanduser()
+JOURNAL_READ_POOL_SIZE = int(os.environ.get("GIT_TRACKER_JOURNAL_READ_POOL_SIZE", 4))
+JOURNAL_READ_CACHE_ENTRIES = int(os.environ.get("GIT_TRACKER_JOURNAL_READ_CACHE_ENTRIES", 256))
@@ -0,0 +1,26 @@
+"""
+resources/git_resources.py
+Read-only resources describing the server's own activity
+"""
+
+import json
+
+from git_work_tracker.tools.git_stats import git_stats
+from git_work_tracker.tools.git_tracker import peak_memory_mb
+from mcp.server.fastmcp import FastMCP
+
+
+def register_git_resources(mcp: FastMCP):
+    """Register server statistics resources with the MCP server."""
+    
+    @mcp.resource(
+        "git-tracker://stats/git-commands",
+        name="git_command_stats",
+        description="Git processes run since the server started: calls, time and output per subcommand",
+        mime_type="application/json",
+    )
+    def git_command_stats() -> str:
+        """Counts and timings of every git command the server has run."""
+        stats = git_stats.to_dict()
+        stats["peak_memory_mb"] = round(peak_memory_mb(), 1)
+        return json.dumps(stats, indent=2)
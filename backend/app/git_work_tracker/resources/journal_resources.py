@@ -0,0 +1,51 @@
+"""
+resources/journal_resources.py
+The user's journal notes as read-only resources
+"""
+
+import json
+
+from git_work_tracker.tools.journal_reader import get_note, list_notes, tag_counts
+from mcp.server.fastmcp import FastMCP
+
+
+def register_journal_resources(mcp: FastMCP):
+    """Register journal note resources with the MCP server."""
+    
+    @mcp.resource(
+        "journal://notes",
+        name="journal_notes",
+        description="The 50 most recently updated journal notes (use list_journal_notes to page further)",
+        mime_type="application/json",
+    )
+    async def recent_notes() -> str:
+        """Recently updated notes with the start of their content."""
+        return json.dumps(await list_notes(page_size=50), indent=2)
+    
+    @mcp.resource(
+        "journal://notes/{note_id}",
+        name="journal_note",
+        description="One journal note as Markdown",
+        mime_type="text/markdown",
+    )
+    async def note(note_id: int) -> str:
+        """A note's title, tags and full content."""
+        found = await get_note(int(note_id))
+        if found is None:
+            raise ValueError(f"Note {note_id} not found")
+        tags = " ".join(f"#{tag}" for tag in found["tags"])
+        return (
+            f"# {found['title']}\n\n"
+            f"*Updated {found['updated_at']}*{f' · {tags}' if tags else ''}\n\n"
+            f"{found['content'] or ''}\n"
+        )
+    
+    @mcp.resource(
+        "journal://tags",
+        name="journal_tags",
+        description="Tags used in the journal with their note counts",
+        mime_type="application/json",
+    )
+    async def tags() -> str:
+        """Every tag of an active note and how many notes use it."""
+        return json.dumps(await tag_counts(), indent=2)
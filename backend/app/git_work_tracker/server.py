@@ -1,19 +1,40 @@
+from contextlib import asynccontextmanager
+
 from git_work_tracker.prompts.git_prompts import register_git_prompts
+from git_work_tracker.resources.git_resources import register_git_resources
+from git_work_tracker.resources.journal_resources import register_journal_resources
 
 # Import registration functions
 from git_work_tracker.tools.git_tracker import register_git_tools
+from git_work_tracker.tools.jobs import register_job_tools, resume_jobs
+from git_work_tracker.tools.journal import journal_client, register_journal_tools
+from git_work_tracker.tools.journal_reader import register_journal_read_tools
+from git_work_tracker.tools.watcher import register_watch_tools, resume_watchers
+from git_work_tracker.tools.workspace import register_workspace_tools
 from mcp.server.fastmcp import FastMCP
 
+
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    # Entered once per client connection over SSE; resuming is idempotent
+    await resume_jobs()
+    await resume_watchers()
+    async with journal_client():
+        yield {}
+
+
 # Create the FastMCP server instance
 mcp = FastMCP(
     "Git Work Tracker",
     host="0.0.0.0",
     port=8001,
+    lifespan=lifespan,
     instructions="""
     This server helps you track and document your daily development work.
     
     **Main Features:**
     - Generate comprehensive work notes from today's git commits
+    - Combine commits from every repository under a workspace directory
     - View commit details with diffs and statistics
     - Check repository status and uncommitted changes
     - Get help with commit messages and work summaries
@@ -21,6 +42,22 @@ mcp = FastMCP(
     **Primary Tool:**
     - `generate_work_note`: Creates a detailed markdown note of all today's commits
       with diffs, statistics, and context. Perfect for end-of-day documentation.
+    - `generate_workspace_work_note`: Same, across all repositories found under
+      one or more root directories.
+    - `start_work_note_job` / `get_work_note_job`: Same as `generate_work_note`,
+      run in the background for large repositories or long date ranges.
+    - `save_journal_note` / `save_journal_notes`: Save one or several notes
+      to the user's Journal.
+    - `list_journal_notes` / `search_journal_notes` / `get_journal_note`:
+      Read the user's Journal.
+    - `watch_repository`: Keep a repository's daily note precomputed so
+      `generate_work_note` returns instantly.
+    
+    **Resources:**
+    - `git-tracker://stats/git-commands`: How many git commands the server
+      has run, and how long they took.
+    - `journal://notes`, `journal://notes/{note_id}`, `journal://tags`:
+      Recent journal notes, one note as Markdown, and the journal's tags.
     
     **Usage Examples:**
     - "Make a note of today's work"
@@ -33,7 +70,14 @@ mcp = FastMCP(
 
 # Register all components
 register_git_tools(mcp)
+register_journal_tools(mcp)
+register_journal_read_tools(mcp)
+register_workspace_tools(mcp)
+register_job_tools(mcp)
+register_watch_tools(mcp)
 register_git_prompts(mcp)
+register_git_resources(mcp)
+register_journal_resources(mcp)
 
 if __name__ == "__main__":
     mcp.run(transport="sse")
\ No newline at end of file
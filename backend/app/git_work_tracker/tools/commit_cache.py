@@ -0,0 +1,136 @@
+"""
+tools/commit_cache.py
+On-disk cache of parsed commit data keyed by repository and commit hash
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Optional
+
+from git_work_tracker.config import COMMIT_CACHE_MAX_BYTES, DATA_DIR
+
+
+class CommitCache:
+    """
+    SQLite store of parsed commits.
+    
+    Commits are immutable, so an entry never goes stale; it is only evicted
+    (least recently used first) once the cache grows past `max_bytes`.
+    `variant` separates entries parsed with different options, e.g. with
+    or without patches.
+    """
+
+    def __init__(self, path: Path, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS commits (
+                    repo TEXT NOT NULL,
+                    hash TEXT NOT NULL,
+                    variant TEXT NOT NULL,
+                    data BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (repo, hash, variant)
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_commits_last_used ON commits (last_used)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def _get_many(self, repo: str, hashes: list[str], variant: str) -> dict[str, dict]:
+        found = {}
+        with self._lock:
+            conn = self._connect()
+            # Stay well below SQLite's bound-parameter limit
+            for i in range(0, len(hashes), 500):
+                batch = hashes[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT hash, data FROM commits WHERE repo = ? AND variant = ? "
+                    f"AND hash IN ({','.join('?' * len(batch))})",
+                    [repo, variant, *batch],
+                ).fetchall()
+                for commit_hash, data in rows:
+                    found[commit_hash] = json.loads(zlib.decompress(data))
+            if found:
+                now = time.time()
+                conn.executemany(
+                    "UPDATE commits SET last_used = ? WHERE repo = ? AND hash = ? AND variant = ?",
+                    [(now, repo, h, variant) for h in found],
+                )
+                conn.commit()
+        return found
+
+    def _put_many(self, repo: str, commits: list[dict], variant: str) -> None:
+        now = time.time()
+        rows = []
+        for commit in commits:
+            data = zlib.compress(json.dumps(commit).encode('utf-8'))
+            rows.append((repo, commit["hash"], variant, data, len(data), now))
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO commits (repo, hash, variant, data, size, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM commits").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Trim to 90% so that eviction does not run on every insert
+        target = int(self.max_bytes * 0.9)
+        cursor = conn.execute("SELECT rowid, size FROM commits ORDER BY last_used")
+        doomed = []
+        for rowid, size in cursor:
+            if total <= target:
+                break
+            doomed.append((rowid,))
+            total -= size
+        conn.executemany("DELETE FROM commits WHERE rowid = ?", doomed)
+
+    def _stats(self) -> dict:
+        with self._lock:
+            entries, size = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM commits"
+            ).fetchone()
+        return {"entries": entries, "bytes": size, "max_bytes": self.max_bytes, "path": str(self.path)}
+
+    async def get_many(self, repo: str, hashes: list[str], variant: str) -> dict[str, dict]:
+        """Return cached commits by hash; missing hashes are simply absent."""
+        if not self.enabled or not hashes:
+            return {}
+        return await asyncio.to_thread(self._get_many, repo, hashes, variant)
+
+    async def put_many(self, repo: str, commits: list[dict], variant: str) -> None:
+        if not self.enabled or not commits:
+            return
+        await asyncio.to_thread(self._put_many, repo, commits, variant)
+
+    async def stats(self) -> dict:
+        return await asyncio.to_thread(self._stats)
+
+
+commit_cache = CommitCache(DATA_DIR / "commit_cache.db", COMMIT_CACHE_MAX_BYTES)
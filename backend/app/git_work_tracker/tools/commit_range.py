@@ -0,0 +1,130 @@
+"""
+tools/commit_range.py
+Which commits a tool call covers: a date range and/or revision range,
+paged through with a cursor naming the last commit already seen
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime, time
+from typing import Optional
+
+# The date format git's --since/--until read as local time
+GIT_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_DATETIME_FORMATS = (
+    "%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M",
+)
+
+
+def _today_since() -> str:
+    """Start of today (00:00:00) in the format git's --since expects."""
+    # A bare date would be read by git as that date at the current time of day
+    return datetime.combine(date.today(), time.min).strftime(GIT_DATE_FORMAT)
+
+
+def _git_date(value: str, end_of_day: bool) -> str:
+    """
+    Normalize a date argument. Bare dates cover the whole day (from its start
+    for `since`, to its end for `until`); anything that is not an ISO date is
+    passed through for git to interpret ("2 weeks ago", "last monday").
+    """
+    value = value.strip()
+    for fmt in _DATETIME_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).strftime(GIT_DATE_FORMAT)
+        except ValueError:
+            pass
+    try:
+        day = date.fromisoformat(value)
+    except ValueError:
+        return value
+    return datetime.combine(day, time.max if end_of_day else time.min).strftime(GIT_DATE_FORMAT)
+
+
+@dataclass(frozen=True)
+class CommitRange:
+    """
+    Commits selected by committer date and/or a revision range such as
+    `v1.2..HEAD` or `main..feature`. With none of them set, it is today.
+    """
+    since: Optional[str] = None
+    until: Optional[str] = None
+    revision_range: Optional[str] = None
+
+    @classmethod
+    def today(cls) -> "CommitRange":
+        return cls(since=_today_since())
+
+    @classmethod
+    def from_args(
+        cls,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        revision_range: Optional[str] = None
+    ) -> "CommitRange":
+        """Build a range from tool arguments, defaulting to today."""
+        since = since.strip() if since else None
+        until = until.strip() if until else None
+        revision_range = revision_range.strip() if revision_range else None
+        if not (since or until or revision_range):
+            return cls.today()
+        return cls(
+            since=_git_date(since, end_of_day=False) if since else None,
+            until=_git_date(until, end_of_day=True) if until else None,
+            revision_range=revision_range,
+        )
+
+    @property
+    def is_today(self) -> bool:
+        return self == CommitRange.today()
+
+    def log_args(self) -> list[str]:
+        """`git log` arguments selecting this range (newest first)."""
+        args = []
+        if self.since:
+            args.append(f"--since={self.since}")
+        if self.until:
+            args.append(f"--until={self.until}")
+        if self.revision_range:
+            # Keeps a revision starting with "-" from being read as an option
+            args += ["--end-of-options", self.revision_range]
+        return args
+
+    def describe(self) -> str:
+        """Human-readable summary, e.g. "2025-11-01 00:00:00 → 2025-11-07 23:59:59"."""
+        if self.is_today:
+            return datetime.now().strftime('%B %d, %Y')
+        parts = []
+        if self.since or self.until:
+            parts.append(f"{self.since or 'beginning'} → {self.until or 'now'}")
+        if self.revision_range:
+            parts.append(f"`{self.revision_range}`")
+        return ", ".join(parts)
+
+
+def paginate(
+    hashes: list[str],
+    cursor: Optional[str],
+    page_size: int
+) -> tuple[list[str], int, Optional[str]]:
+    """
+    One page of `hashes` following the commit named by `cursor`.
+
+    Returns the page, its offset in `hashes`, and the cursor for the next
+    page (None on the last one). Because the cursor is a commit rather than
+    an offset, commits made between calls do not shift later pages.
+    Raises ValueError when the cursor commit is no longer in the range.
+    """
+    start = 0
+    if cursor:
+        try:
+            start = hashes.index(cursor.strip()) + 1
+        except ValueError:
+            raise ValueError(
+                f"cursor {cursor[:12]} is not in this range; "
+                "the range changed or history was rewritten"
+            )
+    page_size = max(1, page_size)
+    page = hashes[start:start + page_size]
+    next_cursor = page[-1] if page and start + len(page) < len(hashes) else None
+    return page, start, next_cursor
@@ -0,0 +1,377 @@
+"""
+tools/compaction.py
+Fit a work note's diffs into a token budget: rank hunks by significance,
+collapse mechanical and repeated changes, and optionally summarize the
+largest hunks with the local LLM summarizer
+"""
+
+import asyncio
+import re
+import sys
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+from git_work_tracker.config import (
+    COMPACTION_MAX_SUMMARIES,
+    COMPACTION_SUMMARY_CONCURRENCY,
+    COMPACTION_SUMMARY_MIN_TOKENS,
+    COMPACTION_SUMMARY_TIMEOUT_SECONDS,
+)
+
+Summarizer = Callable[[str], Awaitable[str]]
+NoteFormatter = Callable[[list[dict]], Awaitable[str]]
+
+# Rough size of a token in characters for code and English; good enough to
+# budget with, and needs no tokenizer for whichever model reads the note
+CHARS_PER_TOKEN = 4
+
+_FILE_START = re.compile(r"^(?=diff --git )", re.MULTILINE)
+_HUNK_START = re.compile(r"^(?=@@ )", re.MULTILINE)
+_DIFF_PATH = re.compile(r"^diff --git a/.* b/(.*)$", re.MULTILINE)
+
+# Changed lines that only shuffle imports or includes
+_IMPORT_LINE = re.compile(
+    r"^\s*(import\s|from\s+\S+\s+import\s|#include\s|using\s|use\s|require\(|"
+    r"(const|let|var)\s+\w+\s*=\s*require\()"
+)
+# Changed lines that add, remove or change a definition
+_DEFINITION_LINE = re.compile(
+    r"^\s*((export\s+)?(default\s+)?(async\s+)?(def|class|function|func|fn|pub\s+fn|"
+    r"interface|struct|enum|trait|impl|type)\s|(public|private|protected)\s)"
+)
+
+# How much a path's changes matter relative to source code
+_PATH_WEIGHTS = (
+    (re.compile(r"(^|/)(tests?|spec|__tests__)/|_test\.|\.test\.|\.spec\.|(^|/)test_"), 0.6),
+    (re.compile(r"(^|/)docs?/|\.(md|rst|txt|adoc)$"), 0.5),
+    (re.compile(r"\.(json|ya?ml|toml|ini|cfg|lock|csv)$"), 0.4),
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate number of tokens `text` takes in a model's context."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _path_weight(path: str) -> float:
+    for pattern, weight in _PATH_WEIGHTS:
+        if pattern.search(path):
+            return weight
+    return 1.0
+
+
+@dataclass
+class Hunk:
+    """One `@@` hunk of a file's diff, with what is needed to rank it."""
+    text: str
+    path: str
+    added: list[str]
+    removed: list[str]
+    kind: str = "code"  # code, whitespace, imports, repeat or summary
+    score: float = 0.0
+    tokens: int = 0
+    keep: bool = False
+    repeat_of: str = ""
+
+    @property
+    def changes(self) -> int:
+        return len(self.added) + len(self.removed)
+
+
+@dataclass
+class FileDiff:
+    """A file's diff: its `diff --git` header lines and hunks."""
+    path: str
+    header: str
+    hunks: list[Hunk]
+
+
+@dataclass
+class CompactionReport:
+    """What compaction did to a note, for its footer and the tool's log."""
+    budget: int
+    tokens_before: int = 0
+    tokens_after: int = 0
+    hunks: int = 0
+    kept: int = 0
+    collapsed: int = 0
+    repeats: int = 0
+    omitted: int = 0
+    summarized: int = 0
+    summary_failures: int = 0
+    notes: list[str] = field(default_factory=list)
+
+    @property
+    def saved(self) -> int:
+        return max(0, self.tokens_before - self.tokens_after)
+
+    def describe(self) -> str:
+        percent = 100 * self.saved / self.tokens_before if self.tokens_before else 0
+        text = (
+            f"~{self.tokens_before:,} → ~{self.tokens_after:,} tokens "
+            f"({self.saved:,} saved, {percent:.0f}%; budget {self.budget:,}). "
+            f"Kept {self.kept} of {self.hunks} hunks"
+        )
+        details = []
+        if self.summarized:
+            details.append(f"{self.summarized} summarized")
+        if self.collapsed:
+            details.append(f"{self.collapsed} mechanical collapsed")
+        if self.repeats:
+            details.append(f"{self.repeats} repeated collapsed")
+        if self.omitted:
+            details.append(f"{self.omitted} lower-ranked omitted")
+        if details:
+            text += f" ({', '.join(details)})"
+        return text + "." + "".join(f" {note}" for note in self.notes)
+
+
+def _parse_hunk(text: str, path: str) -> Hunk:
+    added, removed = [], []
+    for line in text.split("\n")[1:]:
+        if line.startswith("+"):
+            added.append(line[1:])
+        elif line.startswith("-"):
+            removed.append(line[1:])
+    return Hunk(text=text, path=path, added=added, removed=removed, tokens=estimate_tokens(text))
+
+
+def parse_diff(diff_text: str) -> list[FileDiff]:
+    """Split a commit's patch text into files and hunks."""
+    files = []
+    for section in _FILE_START.split(diff_text):
+        if not section.strip():
+            continue
+        match = _DIFF_PATH.search(section)
+        path = match.group(1) if match else ""
+        pieces = _HUNK_START.split(section)
+        files.append(FileDiff(
+            path=path,
+            header=pieces[0],
+            hunks=[_parse_hunk(piece, path) for piece in pieces[1:]],
+        ))
+    return files
+
+
+def _squash(line: str) -> str:
+    return "".join(line.split())
+
+
+def _classify(hunk: Hunk) -> str:
+    """Tell mechanical hunks (whitespace or import shuffles) from real code changes."""
+    if sorted(map(_squash, hunk.added)) == sorted(map(_squash, hunk.removed)):
+        return "whitespace"
+    changed = [line for line in hunk.added + hunk.removed if line.strip()]
+    if changed and all(_IMPORT_LINE.match(line) for line in changed):
+        return "imports"
+    return "code"
+
+
+def _score(hunk: Hunk) -> float:
+    """
+    Significance of a code hunk: grows with the lines it changes (with
+    diminishing returns, so one huge hunk does not outrank everything),
+    more for touched definitions, less outside source code.
+    """
+    definitions = sum(
+        1 for line in hunk.added + hunk.removed if _DEFINITION_LINE.match(line)
+    )
+    return (hunk.changes ** 0.5 + 2 * definitions) * _path_weight(hunk.path)
+
+
+def _rank(commits_files: list[tuple[str, list[FileDiff]]], report: CompactionReport) -> list[Hunk]:
+    """Classify and score every hunk; returns the code hunks, best first."""
+    seen: dict[tuple, str] = {}
+    ranked = []
+    for short_hash, files in commits_files:
+        for file_diff in files:
+            for hunk in file_diff.hunks:
+                report.hunks += 1
+                hunk.kind = _classify(hunk)
+                if hunk.kind != "code":
+                    report.collapsed += 1
+                    continue
+                # The same edit made in several places (a rename, a bulk
+                # replace) is shown once
+                key = (tuple(map(_squash, hunk.removed)), tuple(map(_squash, hunk.added)))
+                if key in seen:
+                    hunk.kind = "repeat"
+                    hunk.repeat_of = seen[key]
+                    report.repeats += 1
+                    continue
+                seen[key] = f"`{file_diff.path}` ({short_hash})"
+                hunk.score = _score(hunk)
+                ranked.append(hunk)
+    ranked.sort(key=lambda hunk: hunk.score, reverse=True)
+    return ranked
+
+
+async def _summarize_hunks(
+    hunks: list[Hunk],
+    summarizer: Summarizer,
+    report: CompactionReport
+) -> None:
+    """Replace oversized hunks with LLM summaries, a few requests at a time."""
+    semaphore = asyncio.Semaphore(COMPACTION_SUMMARY_CONCURRENCY)
+
+    async def summarize(hunk: Hunk) -> None:
+        header, _, _ = hunk.text.partition("\n")
+        prompt = (
+            f"Summarize this change to `{hunk.path}` in one or two sentences for "
+            f"a developer's work log. Name the functions and behavior it changes.\n\n"
+            f"{hunk.text}"
+        )
+        async with semaphore:
+            try:
+                summary = await asyncio.wait_for(
+                    summarizer(prompt), COMPACTION_SUMMARY_TIMEOUT_SECONDS
+                )
+            except Exception as e:
+                report.summary_failures += 1
+                print(f"Hunk summary failed for {hunk.path}: {e!r}", file=sys.stderr)
+                return
+        summary = " ".join((summary or "").split())
+        if not summary:
+            report.summary_failures += 1
+            return
+        hunk.text = (
+            f"{header}\n# summary (+{len(hunk.added)} -{len(hunk.removed)} lines): {summary}"
+        )
+        hunk.tokens = estimate_tokens(hunk.text)
+        hunk.kind = "summary"
+        report.summarized += 1
+
+    await asyncio.gather(*(summarize(hunk) for hunk in hunks))
+
+
+def _collapsed(hunks: list[Hunk], reason: str) -> str:
+    added = sum(len(hunk.added) for hunk in hunks)
+    removed = sum(len(hunk.removed) for hunk in hunks)
+    return f"{len(hunks)} {reason} hunk(s) collapsed, +{added} -{removed}"
+
+
+def _render(files: list[FileDiff]) -> str:
+    """Rebuild a commit's patch text from the kept hunks and one collapse marker per file."""
+    out = []
+    for file_diff in files:
+        if not file_diff.hunks:
+            # Binary or mode-only changes: the header is the whole diff
+            out.append(file_diff.header)
+            continue
+        kept = [hunk for hunk in file_diff.hunks if hunk.keep]
+        if kept:
+            out.append(file_diff.header)
+            out.extend(hunk.text if hunk.text.endswith("\n") else hunk.text + "\n" for hunk in kept)
+
+        markers = []
+        mechanical = [hunk for hunk in file_diff.hunks if hunk.kind in ("whitespace", "imports")]
+        if mechanical:
+            markers.append(_collapsed(mechanical, "whitespace/import-only"))
+        for hunk in file_diff.hunks:
+            if hunk.kind == "repeat":
+                markers.append(
+                    f"hunk identical to one in {hunk.repeat_of} collapsed, "
+                    f"+{len(hunk.added)} -{len(hunk.removed)}"
+                )
+        dropped = [
+            hunk for hunk in file_diff.hunks
+            if hunk.kind in ("code", "summary") and not hunk.keep
+        ]
+        if dropped:
+            markers.append(_collapsed(dropped, "lower-ranked"))
+        if markers:
+            prefix = "" if kept else f"`{file_diff.path}`: "
+            out.append(f"{prefix}... [{'; '.join(markers)}]\n")
+    return "".join(out).rstrip("\n")
+
+
+def _with_diffs(commits: list[dict], commits_files: list[tuple[str, list[FileDiff]]]) -> list[dict]:
+    # New dicts: the input commits may be cached and must stay unmodified
+    return [
+        {**commit, 'diff': _render(files)} if commit.get('diff') else commit
+        for commit, (_, files) in zip(commits, commits_files)
+    ]
+
+
+async def compact_commits(
+    commits: list[dict],
+    budget: int,
+    format_note: NoteFormatter,
+    summarizer: Optional[Summarizer] = None
+) -> tuple[list[dict], str, CompactionReport]:
+    """
+    Fit the note `format_note` makes of `commits` into about `budget` tokens
+    by shortening the commits' diffs; the rest of the note is kept as is.
+
+    Code hunks are kept in order of significance until the budget is spent;
+    whitespace- and import-only hunks and repeats of an earlier hunk are
+    always reduced to one line. With a `summarizer`, the most significant
+    hunks too large to keep whole are replaced by a summary first.
+
+    Returns the compacted commits, their note and a report of what changed.
+    """
+    report = CompactionReport(budget=budget)
+    report.tokens_before = estimate_tokens(await format_note(commits))
+    commits_files = [
+        (commit['hash'][:8], parse_diff(commit.get('diff', ''))) for commit in commits
+    ]
+    ranked = _rank(commits_files, report)
+
+    # The note with every hunk collapsed is as small as compaction gets it
+    floor = estimate_tokens(await format_note(_with_diffs(commits, commits_files)))
+    diff_budget = budget - floor
+    if diff_budget <= 0:
+        report.notes.append(
+            f"The note is ~{floor:,} tokens without any diff hunks; "
+            f"use a smaller page_size or include_stats=False to go lower."
+        )
+
+    if summarizer is not None:
+        oversized = [
+            hunk for hunk in ranked
+            if hunk.tokens >= max(COMPACTION_SUMMARY_MIN_TOKENS, diff_budget // 8)
+        ][:COMPACTION_MAX_SUMMARIES]
+        if oversized:
+            await _summarize_hunks(oversized, summarizer, report)
+            if report.summary_failures:
+                report.notes.append(
+                    f"{report.summary_failures} hunk summaries failed; those hunks were ranked unsummarized."
+                )
+
+    # File headers count against the budget once a file keeps a hunk
+    header_paid: set[int] = set()
+    headers = {
+        id(hunk): file_diff
+        for _, files in commits_files for file_diff in files for hunk in file_diff.hunks
+    }
+    remaining = diff_budget
+    for hunk in ranked:
+        file_diff = headers[id(hunk)]
+        cost = hunk.tokens
+        if id(file_diff) not in header_paid:
+            cost += estimate_tokens(file_diff.header)
+        if cost <= remaining:
+            hunk.keep = True
+            remaining -= cost
+            header_paid.add(id(file_diff))
+            report.kept += 1
+        else:
+            report.omitted += 1
+
+    compacted = _with_diffs(commits, commits_files)
+    note = await format_note(compacted)
+    report.tokens_after = estimate_tokens(note)
+    return compacted, note, report
+
+
+def local_summarizer() -> Optional[Summarizer]:
+    """
+    The journal backend's local LLM summarizer, or None when its
+    dependencies or settings are not available to this process.
+    """
+    try:
+        from locallm.local_summarizer import LocalLMSummarizer
+    except (ImportError, ValueError) as e:
+        print(f"Local summarizer unavailable: {e!r}", file=sys.stderr)
+        return None
+    return LocalLMSummarizer().summarize
@@ -0,0 +1,735 @@
+"""
+tools/git_objects.py
+In-process reader for git repositories: refs, loose objects and packfiles
+
+Covers what work notes need most often without starting a `git` process:
+listing today's commits and computing each commit's name-status and
+numstat. Anything outside the common case raises `Unsupported` so the
+caller can fall back to the git CLI. All functions are blocking and meant
+to be run in a worker thread.
+"""
+
+import heapq
+import mmap
+import os
+import re
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+_OBJ_TYPES = {1: "commit", 2: "tree", 3: "blob", 4: "tag"}
+_OFS_DELTA = 6
+_REF_DELTA = 7
+
+_TREE_MODE = 0o040000
+_GITLINK_MODE = 0o160000
+
+# Matches git's buffer_is_binary(): a NUL in the first 8000 bytes
+_BINARY_CHECK_BYTES = 8000
+
+# Git's diff is minimal while the edit distance stays under xdiff's cost
+# heuristics (XDL_MAX_COST_MIN, 256); beyond that its line counts can differ.
+# Larger diffs are left to git anyway: Myers is quadratic in the distance
+# and a pure-Python run costs more than the subprocess it would save.
+_MAX_EDIT_DISTANCE = 64
+
+_DELTA_CACHE_BYTES = 32 * 1024 * 1024
+
+
+class Unsupported(Exception):
+    """The repository or commit needs the git CLI."""
+
+
+def _read_file(path: str) -> Optional[bytes]:
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+class _Pack:
+    """One packfile with its v2 index, both memory-mapped."""
+
+    def __init__(self, idx_path: str):
+        self.idx_path = idx_path
+        self.pack_path = idx_path[:-4] + ".pack"
+        with open(idx_path, "rb") as f:
+            self.idx = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        with open(self.pack_path, "rb") as f:
+            self.pack = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self.idx[:8] != b"\xfftOc\x00\x00\x00\x02":
+            raise Unsupported(f"unsupported pack index {idx_path}")
+        self.fanout = struct.unpack_from(">256I", self.idx, 8)
+        self.count = self.fanout[255]
+        self._names = 8 + 256 * 4
+        self._offsets = self._names + self.count * 24
+        self._large_offsets = self._offsets + self.count * 4
+
+    def find(self, sha: bytes) -> Optional[int]:
+        """Pack offset of an object, by binary search within its fanout bucket."""
+        lo = self.fanout[sha[0] - 1] if sha[0] else 0
+        hi = self.fanout[sha[0]]
+        idx, names = self.idx, self._names
+        while lo < hi:
+            mid = (lo + hi) // 2
+            pos = names + mid * 20
+            name = idx[pos:pos + 20]
+            if name < sha:
+                lo = mid + 1
+            elif name > sha:
+                hi = mid
+            else:
+                offset = struct.unpack_from(">I", idx, self._offsets + mid * 4)[0]
+                if offset & 0x80000000:
+                    offset = struct.unpack_from(
+                        ">Q", idx, self._large_offsets + (offset & 0x7FFFFFFF) * 8
+                    )[0]
+                return offset
+        return None
+
+    def close(self) -> None:
+        self.idx.close()
+        self.pack.close()
+
+
+def _inflate(buffer, pos: int, size: int) -> bytes:
+    """Inflate one zlib stream starting at `pos` into `size` bytes."""
+    decompressor = zlib.decompressobj()
+    parts = []
+    chunk = max(size + 64, 4096)
+    while not decompressor.eof:
+        data = buffer[pos:pos + chunk]
+        if not data:
+            raise Unsupported("truncated object data")
+        parts.append(decompressor.decompress(data))
+        pos += chunk
+    out = b"".join(parts)
+    if len(out) != size:
+        raise Unsupported("object size mismatch")
+    return out
+
+
+def _varint(data: bytes, pos: int) -> tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, pos
+
+
+def _apply_delta(base: bytes, delta: bytes) -> bytes:
+    _, pos = _varint(delta, 0)
+    target_size, pos = _varint(delta, pos)
+    out = bytearray()
+    end = len(delta)
+    while pos < end:
+        op = delta[pos]
+        pos += 1
+        if op & 0x80:
+            offset = size = 0
+            for i in range(4):
+                if op & (1 << i):
+                    offset |= delta[pos] << (8 * i)
+                    pos += 1
+            for i in range(3):
+                if op & (0x10 << i):
+                    size |= delta[pos] << (8 * i)
+                    pos += 1
+            out += base[offset:offset + (size or 0x10000)]
+        elif op:
+            out += delta[pos:pos + op]
+            pos += op
+        else:
+            raise Unsupported("invalid delta opcode")
+    if len(out) != target_size:
+        raise Unsupported("delta size mismatch")
+    return bytes(out)
+
+
+class ObjectStore:
+    """Read-only access to the objects of one repository."""
+
+    def __init__(self, objects_dir: str):
+        self.objects_dirs = [objects_dir]
+        alternates = _read_file(os.path.join(objects_dir, "info", "alternates"))
+        for line in (alternates or b"").decode().splitlines():
+            line = line.strip()
+            if line and not line.startswith("#"):
+                self.objects_dirs.append(os.path.normpath(os.path.join(objects_dir, line)))
+
+        self.packs: list[_Pack] = []
+        self.pack_dirs_mtime = self._pack_dirs_mtime()
+        for directory in self.objects_dirs:
+            pack_dir = os.path.join(directory, "pack")
+            try:
+                names = sorted(os.listdir(pack_dir))
+            except OSError:
+                continue
+            for name in names:
+                if name.endswith(".idx") and os.path.exists(os.path.join(pack_dir, name[:-4] + ".pack")):
+                    self.packs.append(_Pack(os.path.join(pack_dir, name)))
+
+        # Recently resolved packed objects, so delta chains share their bases
+        self._cache: OrderedDict[tuple[int, int], tuple[str, bytes]] = OrderedDict()
+        self._cache_bytes = 0
+        self._lock = threading.Lock()
+
+    def _pack_dirs_mtime(self) -> tuple:
+        mtimes = []
+        for directory in self.objects_dirs:
+            try:
+                mtimes.append(os.stat(os.path.join(directory, "pack")).st_mtime_ns)
+            except OSError:
+                mtimes.append(None)
+        return tuple(mtimes)
+
+    def is_stale(self) -> bool:
+        """Whether packs were added or removed (repack, fetch) since loading."""
+        return self._pack_dirs_mtime() != self.pack_dirs_mtime
+
+    def close(self) -> None:
+        for pack in self.packs:
+            pack.close()
+
+    def read(self, sha: bytes) -> tuple[str, bytes]:
+        """Return (type, data) of an object; raises Unsupported if it is missing."""
+        for pack_no, pack in enumerate(self.packs):
+            offset = pack.find(sha)
+            if offset is not None:
+                return self._read_packed(pack_no, offset)
+
+        hex_sha = sha.hex()
+        for directory in self.objects_dirs:
+            raw = _read_file(os.path.join(directory, hex_sha[:2], hex_sha[2:]))
+            if raw is not None:
+                data = zlib.decompress(raw)
+                header, _, body = data.partition(b"\0")
+                obj_type, _, _ = header.partition(b" ")
+                return obj_type.decode(), body
+
+        raise Unsupported(f"object {hex_sha} not found")
+
+    def _cached(self, key: tuple[int, int]) -> Optional[tuple[str, bytes]]:
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is not None:
+                self._cache.move_to_end(key)
+            return hit
+
+    def _remember(self, key: tuple[int, int], value: tuple[str, bytes]) -> None:
+        with self._lock:
+            if key in self._cache:
+                return
+            self._cache[key] = value
+            self._cache_bytes += len(value[1])
+            while self._cache_bytes > _DELTA_CACHE_BYTES and len(self._cache) > 1:
+                _, (_, old) = self._cache.popitem(last=False)
+                self._cache_bytes -= len(old)
+
+    def _read_packed(self, pack_no: int, offset: int) -> tuple[str, bytes]:
+        # Follow the delta chain down to a base object, then apply the deltas
+        # back up. Every object along the way is cached.
+        chain = []
+        while True:
+            key = (pack_no, offset)
+            hit = self._cached(key)
+            if hit is not None:
+                obj_type, data = hit
+                break
+
+            buffer = self.packs[pack_no].pack
+            byte = buffer[offset]
+            kind = (byte >> 4) & 7
+            size = byte & 0x0F
+            shift = 4
+            pos = offset + 1
+            while byte & 0x80:
+                byte = buffer[pos]
+                pos += 1
+                size |= (byte & 0x7F) << shift
+                shift += 7
+
+            if kind in _OBJ_TYPES:
+                obj_type, data = _OBJ_TYPES[kind], _inflate(buffer, pos, size)
+                self._remember(key, (obj_type, data))
+                break
+
+            if kind == _OFS_DELTA:
+                byte = buffer[pos]
+                pos += 1
+                distance = byte & 0x7F
+                while byte & 0x80:
+                    byte = buffer[pos]
+                    pos += 1
+                    distance = ((distance + 1) << 7) | (byte & 0x7F)
+                chain.append((key, _inflate(buffer, pos, size)))
+                offset -= distance
+            elif kind == _REF_DELTA:
+                base_sha = bytes(buffer[pos:pos + 20])
+                chain.append((key, _inflate(buffer, pos + 20, size)))
+                base_offset = self.packs[pack_no].find(base_sha)
+                if base_offset is None:
+                    # Thin-pack style base in another pack or loose
+                    obj_type, data = self.read(base_sha)
+                    break
+                offset = base_offset
+            else:
+                raise Unsupported(f"unknown pack object type {kind}")
+
+        for key, delta in reversed(chain):
+            data = _apply_delta(data, delta)
+            self._remember(key, (obj_type, data))
+        return obj_type, data
+
+
+def _parse_ident(value: bytes) -> tuple[str, str, int, str]:
+    """Split `Name <email> 1700000000 +0100` into its parts."""
+    ident, timestamp, tz = value.rsplit(b" ", 2)
+    lt = ident.rfind(b"<")
+    name = ident[:lt].strip() if lt >= 0 else ident.strip()
+    email = ident[lt + 1:ident.rfind(b">")] if lt >= 0 else b""
+    return (
+        name.decode("utf-8", errors="replace"),
+        email.decode("utf-8", errors="replace"),
+        int(timestamp),
+        tz.decode(),
+    )
+
+
+def _iso_date(timestamp: int, tz: str) -> str:
+    """`--date=iso` rendering in the commit's own timezone."""
+    sign = -1 if tz.startswith("-") else 1
+    offset = timedelta(hours=int(tz[1:3]), minutes=int(tz[3:5])) * sign
+    when = datetime.fromtimestamp(timestamp, timezone(offset))
+    return when.strftime("%Y-%m-%d %H:%M:%S ") + tz
+
+
+def _subject(message: bytes) -> str:
+    """`%s`: the first paragraph of the message joined into one line."""
+    lines = []
+    for line in message.split(b"\n"):
+        line = line.rstrip()
+        if not line:
+            if lines:
+                break
+            continue
+        lines.append(line)
+    return b" ".join(lines).decode("utf-8", errors="replace")
+
+
+class Commit:
+    __slots__ = ("sha", "tree", "parents", "author", "committer_time", "message")
+
+    def __init__(self, sha: bytes, data: bytes):
+        self.sha = sha
+        self.parents = []
+        self.tree = None
+        self.author = None
+        self.committer_time = 0
+
+        headers, _, self.message = data.partition(b"\n\n")
+        for line in headers.split(b"\n"):
+            if line.startswith(b" "):
+                continue  # continuation of a multi-line header (gpgsig, mergetag)
+            key, _, value = line.partition(b" ")
+            if key == b"tree":
+                self.tree = bytes.fromhex(value.decode())
+            elif key == b"parent":
+                self.parents.append(bytes.fromhex(value.decode()))
+            elif key == b"author":
+                self.author = _parse_ident(value)
+            elif key == b"committer":
+                self.committer_time = _parse_ident(value)[2]
+            elif key == b"encoding" and value.lower() not in (b"utf-8", b"utf8"):
+                raise Unsupported("commit message is not UTF-8")
+        if self.tree is None or self.author is None:
+            raise Unsupported("malformed commit")
+
+
+def _parse_tree(data: bytes) -> list[tuple[bytes, int, bytes]]:
+    """Tree entries as (name, mode, sha), in stored (git) order."""
+    entries = []
+    pos = 0
+    end = len(data)
+    while pos < end:
+        space = data.index(b" ", pos)
+        nul = data.index(b"\0", space)
+        mode = int(data[pos:space], 8)
+        entries.append((data[space + 1:nul], mode, data[nul + 1:nul + 21]))
+        pos = nul + 21
+    return entries
+
+
+def _lines(data: bytes) -> list[bytes]:
+    """Split into lines the way xdiff compares them (newline included)."""
+    parts = data.split(b"\n")
+    lines = [part + b"\n" for part in parts[:-1]]
+    if parts[-1]:
+        lines.append(parts[-1])
+    return lines
+
+
+def _edit_distance(a: list, b: list, max_d: int) -> Optional[int]:
+    """Myers' O(ND) shortest edit script length, or None if it exceeds max_d."""
+    n, m = len(a), len(b)
+    offset = max_d + 1
+    v = [0] * (2 * max_d + 3)
+    for d in range(max_d + 1):
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                return d
+    return None
+
+
+def _numstat(old: bytes, new: bytes) -> tuple[int, int]:
+    """Added and deleted line counts of a minimal line diff."""
+    a, b = _lines(old), _lines(new)
+    # Common prefix and suffix never take part in the edit script
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end_a, end_b = len(a), len(b)
+    while end_a > start and end_b > start and a[end_a - 1] == b[end_b - 1]:
+        end_a -= 1
+        end_b -= 1
+    a, b = a[start:end_a], b[start:end_b]
+    if not a or not b:
+        return len(b), len(a)
+    if abs(len(a) - len(b)) > _MAX_EDIT_DISTANCE:
+        raise Unsupported("diff too large for an exact in-process line count")
+
+    distance = _edit_distance(a, b, _MAX_EDIT_DISTANCE)
+    if distance is None:
+        raise Unsupported("diff too large for an exact in-process line count")
+    common = (len(a) + len(b) - distance) // 2
+    return len(b) - common, len(a) - common
+
+
+def _is_binary(data: bytes) -> bool:
+    return b"\0" in data[:_BINARY_CHECK_BYTES]
+
+
+class Repository:
+    """A git repository read without the git CLI."""
+
+    def __init__(self, git_dir: str):
+        self.git_dir = git_dir
+        common = _read_file(os.path.join(git_dir, "commondir"))
+        self.common_dir = (
+            os.path.normpath(os.path.join(git_dir, common.decode().strip())) if common else git_dir
+        )
+
+        config = (_read_file(os.path.join(self.common_dir, "config")) or b"").lower()
+        # SHA-256 repositories and reftable refs are not handled here
+        if b"objectformat" in config or b"refstorage" in config:
+            raise Unsupported("repository extensions in use")
+        # History rewritten by grafts, replace refs or a shallow clone
+        # would need git's own view of parents
+        replace_dir = os.path.join(self.common_dir, "refs", "replace")
+        packed_refs = _read_file(os.path.join(self.common_dir, "packed-refs")) or b""
+        if (
+            os.path.exists(os.path.join(self.common_dir, "shallow"))
+            or os.path.exists(os.path.join(self.common_dir, "info", "grafts"))
+            or (os.path.isdir(replace_dir) and os.listdir(replace_dir))
+            or b" refs/replace/" in packed_refs
+        ):
+            raise Unsupported("shallow clone, grafts or replace refs")
+        # Attributes can mark files binary or change their diff
+        self.has_info_attributes = os.path.exists(
+            os.path.join(self.common_dir, "info", "attributes")
+        )
+
+        self.objects = ObjectStore(os.path.join(self.common_dir, "objects"))
+
+    def close(self) -> None:
+        self.objects.close()
+
+    def _read(self, sha: bytes, expected: str) -> bytes:
+        obj_type, data = self.objects.read(sha)
+        if obj_type != expected:
+            raise Unsupported(f"expected {expected}, found {obj_type}")
+        return data
+
+    def commit(self, sha: bytes) -> Commit:
+        return Commit(sha, self._read(sha, "commit"))
+
+    def tree(self, sha: Optional[bytes]) -> list[tuple[bytes, int, bytes]]:
+        return _parse_tree(self._read(sha, "tree")) if sha else []
+
+    def _resolve_ref(self, name: str, depth: int = 0) -> Optional[bytes]:
+        if depth > 5:
+            raise Unsupported("symbolic ref loop")
+        # Per-worktree refs live in the worktree's git dir, the rest in the common dir
+        for base in (self.git_dir, self.common_dir):
+            value = _read_file(os.path.join(base, name))
+            if value is not None:
+                value = value.strip()
+                if value.startswith(b"ref: "):
+                    return self._resolve_ref(value[5:].decode(), depth + 1)
+                return bytes.fromhex(value.decode())
+
+        packed = _read_file(os.path.join(self.common_dir, "packed-refs")) or b""
+        target = name.encode()
+        for line in packed.splitlines():
+            if line.startswith((b"#", b"^")):
+                continue
+            sha, _, ref = line.partition(b" ")
+            if ref == target:
+                return bytes.fromhex(sha.decode())
+        return None
+
+    def head(self) -> Optional[bytes]:
+        """Commit id HEAD points to, or None on an unborn branch."""
+        return self._resolve_ref("HEAD")
+
+    def list_commits(
+        self,
+        since: int,
+        author: Optional[re.Pattern] = None,
+        until: Optional[int] = None
+    ) -> list[str]:
+        """
+        Commits reachable from HEAD, committed at or after `since` (and at
+        or before `until`), in `git log` order (newest commit date first).
+
+        Like git, the walk stops at commits older than `since` without
+        visiting their parents, while newer ones are only skipped.
+        `author` is matched against "Name <email>".
+        """
+        head = self.head()
+        if head is None:
+            return []
+
+        result = []
+        seen = {head}
+        counter = 0
+        commit = self.commit(head)
+        queue = [(-commit.committer_time, counter, commit)]
+        while queue:
+            _, _, commit = heapq.heappop(queue)
+            if commit.committer_time < since:
+                continue
+            name, email, _, _ = commit.author
+            in_range = until is None or commit.committer_time <= until
+            if in_range and (author is None or author.search(f"{name} <{email}>")):
+                result.append(commit.sha.hex())
+            for parent_sha in commit.parents:
+                if parent_sha in seen:
+                    continue
+                seen.add(parent_sha)
+                parent = self.commit(parent_sha)
+                counter += 1
+                # Ties keep insertion order, as in git's date-ordered list
+                heapq.heappush(queue, (-parent.committer_time, counter, parent))
+        return result
+
+    def _tree_changes(
+        self,
+        old_sha: Optional[bytes],
+        new_sha: Optional[bytes],
+        prefix: bytes,
+        out: list
+    ) -> None:
+        """Append (status, path, old_mode, new_mode, old_sha, new_sha) in git's path order."""
+        def keyed(entries):
+            # Git orders trees as if their names ended in "/"
+            return sorted(
+                ((name + b"/" if mode == _TREE_MODE else name), name, mode, sha)
+                for name, mode, sha in entries
+            )
+
+        old = keyed(self.tree(old_sha))
+        new = keyed(self.tree(new_sha))
+        i = j = 0
+        while i < len(old) or j < len(new):
+            if j >= len(new) or (i < len(old) and old[i][0] < new[j][0]):
+                _, name, mode, sha = old[i]
+                i += 1
+                if mode == _TREE_MODE:
+                    self._tree_changes(sha, None, prefix + name + b"/", out)
+                else:
+                    out.append(("D", prefix + name, mode, 0, sha, None))
+            elif i >= len(old) or new[j][0] < old[i][0]:
+                _, name, mode, sha = new[j]
+                j += 1
+                if mode == _TREE_MODE:
+                    self._tree_changes(None, sha, prefix + name + b"/", out)
+                else:
+                    out.append(("A", prefix + name, 0, mode, None, sha))
+            else:
+                _, name, old_mode, old_entry = old[i]
+                _, _, new_mode, new_entry = new[j]
+                i += 1
+                j += 1
+                if old_entry == new_entry and old_mode == new_mode:
+                    continue
+                if old_mode == _TREE_MODE:
+                    self._tree_changes(old_entry, new_entry, prefix + name + b"/", out)
+                elif (old_mode & 0o170000) != (new_mode & 0o170000):
+                    raise Unsupported("type change")
+                else:
+                    out.append(("M", prefix + name, old_mode, new_mode, old_entry, new_entry))
+
+    def commit_changes(
+        self,
+        commit_hex: str,
+        matches: Callable[[str], bool],
+        detect_renames: bool
+    ) -> tuple[dict, list[dict]]:
+        """
+        Header fields and name-status/numstat file entries of one commit,
+        diffed against its first parent like `git diff-tree --root --raw --numstat`.
+
+        Returns:
+            tuple: (header, files) where header has hash, author, email, date, message
+        """
+        commit = self.commit(bytes.fromhex(commit_hex))
+        parent_tree = self.commit(commit.parents[0]).tree if commit.parents else None
+
+        changes = []
+        self._tree_changes(parent_tree, commit.tree, b"", changes)
+        changes = [c for c in changes if matches(c[1].decode("utf-8", errors="replace"))]
+
+        if any(c[2] == _GITLINK_MODE or c[3] == _GITLINK_MODE for c in changes):
+            raise Unsupported("submodule change")
+        if self.has_info_attributes or any(
+            name == b".gitattributes" for name, _, _ in self.tree(commit.tree)
+        ):
+            raise Unsupported("gitattributes may change diff output")
+
+        renames = {}
+        if detect_renames:
+            added = [c for c in changes if c[0] == "A"]
+            deleted = [c for c in changes if c[0] == "D"]
+            if added and deleted:
+                deleted_by_sha = {}
+                for change in deleted:
+                    deleted_by_sha.setdefault(change[4], []).append(change)
+                added_shas = [c[5] for c in added]
+                for change in added:
+                    sources = deleted_by_sha.get(change[5], [])
+                    if len(sources) > 1 or (sources and added_shas.count(change[5]) > 1):
+                        raise Unsupported("ambiguous exact rename")
+                    if sources:
+                        renames[change[1]] = sources[0]
+                paired = {id(source) for source in renames.values()}
+                unpaired_deleted = [c for c in deleted if id(c) not in paired]
+                unpaired_added = [c for c in added if c[1] not in renames]
+                if unpaired_deleted and unpaired_added:
+                    # Inexact renames need git's similarity scoring
+                    raise Unsupported("possible inexact rename")
+                changes = [c for c in changes if id(c) not in paired]
+
+        files = []
+        for status, path, old_mode, new_mode, old_sha, new_sha in changes:
+            entry = {
+                "status": status,
+                "path": path.decode("utf-8", errors="replace"),
+                "old_path": None,
+                "insertions": 0,
+                "deletions": 0,
+                "binary": False,
+            }
+            source = renames.get(path)
+            if source is not None:
+                entry["status"] = "R"
+                entry["old_path"] = source[1].decode("utf-8", errors="replace")
+                files.append(entry)
+                continue
+
+            old = self._read(old_sha, "blob") if old_sha else b""
+            new = self._read(new_sha, "blob") if new_sha else b""
+            if _is_binary(old) or _is_binary(new):
+                entry["binary"] = True
+            elif old != new:
+                entry["insertions"], entry["deletions"] = _numstat(old, new)
+            files.append(entry)
+
+        name, email, timestamp, tz = commit.author
+        header = {
+            "hash": commit_hex,
+            "author": name,
+            "email": email,
+            "date": _iso_date(timestamp, tz),
+            "message": _subject(commit.message),
+        }
+        return header, files
+
+
+# Open repositories by git dir; reopened when their packs change
+_repositories: dict[str, Repository] = {}
+_repositories_lock = threading.Lock()
+
+
+def open_repository(git_dir: str) -> Repository:
+    with _repositories_lock:
+        repo = _repositories.get(git_dir)
+        # A stale repository is dropped rather than closed: other threads may
+        # still be reading its packs, which are unmapped once it is collected
+        if repo is None or repo.objects.is_stale():
+            repo = _repositories[git_dir] = Repository(git_dir)
+        return repo
+
+
+def list_commits(git_dir: str, log_args: list[str]) -> list[str]:
+    """
+    `git log --format=%H` for `--since=<date>`, `--until=<date>` and
+    `--author=<pattern>` arguments.
+    """
+    dates = {}
+    author = None
+    for arg in log_args:
+        option, _, value = arg.partition("=")
+        if option in ("--since", "--until"):
+            try:
+                # Local time, as git reads it
+                dates[option] = int(datetime.strptime(value, "%Y-%m-%d %H:%M:%S").timestamp())
+            except ValueError:
+                raise Unsupported(f"date format of {arg}")
+        elif arg.startswith("--author="):
+            try:
+                author = re.compile(arg[9:])
+            except re.error:
+                raise Unsupported(f"author pattern {arg}")
+        else:
+            raise Unsupported(f"log argument {arg}")
+    if "--since" not in dates:
+        raise Unsupported("unbounded history walk")
+    return open_repository(git_dir).list_commits(dates["--since"], author, dates.get("--until"))
+
+
+def commits_changes(
+    git_dir: str,
+    hashes: list[str],
+    matches: Callable[[str], bool],
+    detect_renames: bool
+) -> dict[str, tuple[dict, list[dict]]]:
+    """
+    Name-status and numstat of each commit that can be handled in-process,
+    keyed by hash. Commits that need the git CLI are left out.
+    """
+    repo = open_repository(git_dir)
+    result = {}
+    for commit_hex in hashes:
+        try:
+            result[commit_hex] = repo.commit_changes(commit_hex, matches, detect_renames)
+        except Unsupported:
+            continue
+    return result
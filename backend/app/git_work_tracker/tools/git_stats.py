@@ -0,0 +1,122 @@
+"""
+tools/git_stats.py
+Accounting of the git processes the server runs: how many, which
+subcommands, how long they ran and how long they waited for a slot
+"""
+
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass, field
+from typing import AsyncIterator, Optional
+
+# How many of the most recent commands are kept with their arguments
+_RECENT_COMMANDS = 50
+
+
+@dataclass
+class CommandStats:
+    """Totals for one git subcommand."""
+    calls: int = 0
+    failures: int = 0
+    truncated: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+    wait_seconds: float = 0.0
+    output_bytes: int = 0
+
+
+@dataclass
+class GitStats:
+    """Counters for the git processes run since the server started, per subcommand."""
+    started: float = field(default_factory=time.time)
+    commands: dict[str, CommandStats] = field(default_factory=dict)
+    running: int = 0
+    peak_running: int = 0
+    recent: deque = field(default_factory=lambda: deque(maxlen=_RECENT_COMMANDS))
+
+    def to_dict(self) -> dict:
+        totals = CommandStats()
+        for stats in self.commands.values():
+            totals.calls += stats.calls
+            totals.failures += stats.failures
+            totals.truncated += stats.truncated
+            totals.seconds += stats.seconds
+            totals.max_seconds = max(totals.max_seconds, stats.max_seconds)
+            totals.wait_seconds += stats.wait_seconds
+            totals.output_bytes += stats.output_bytes
+        return {
+            "since": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started)),
+            "running": self.running,
+            "peak_running": self.peak_running,
+            "total": _rounded(asdict(totals)),
+            "by_subcommand": {
+                name: _rounded(asdict(stats))
+                for name, stats in sorted(self.commands.items(), key=lambda item: -item[1].seconds)
+            },
+            "recent": list(self.recent),
+        }
+
+
+def _rounded(stats: dict) -> dict:
+    return {key: round(value, 4) if isinstance(value, float) else value for key, value in stats.items()}
+
+
+def subcommand(command: list[str]) -> str:
+    """The git subcommand of a command line, skipping global options like `-C dir`."""
+    args = iter(command[1:])
+    for arg in args:
+        if arg in ("-C", "-c", "--git-dir", "--work-tree"):
+            next(args, None)
+        elif not arg.startswith("-"):
+            return arg
+    return "git"
+
+
+git_stats = GitStats()
+
+
+class _Process:
+    """Bookkeeping for one running git process; see `track`."""
+
+    def __init__(self, command: list[str], cwd: str, queued: float):
+        self.command = command
+        self.cwd = cwd
+        self.queued = queued
+        self.started = time.perf_counter()
+        self.output_bytes = 0
+        self.truncated = False
+        self.returncode: Optional[int] = None
+
+
+@asynccontextmanager
+async def track(command: list[str], cwd: str, queued: float) -> AsyncIterator[_Process]:
+    """
+    Account for one git process, from when it got a slot (`queued` is the
+    perf_counter time it started waiting for one) until it is reaped.
+    The caller fills in output size, truncation and return code.
+    
+    Asynchronous only so it can share an `async with` with the slot semaphore.
+    """
+    process = _Process(command, cwd, queued)
+    git_stats.running += 1
+    git_stats.peak_running = max(git_stats.peak_running, git_stats.running)
+    try:
+        yield process
+    finally:
+        seconds = time.perf_counter() - process.started
+        git_stats.running -= 1
+        entry = git_stats.commands.setdefault(subcommand(command), CommandStats())
+        entry.calls += 1
+        entry.failures += process.returncode not in (0, None) and not process.truncated
+        entry.truncated += process.truncated
+        entry.seconds += seconds
+        entry.max_seconds = max(entry.max_seconds, seconds)
+        entry.wait_seconds += process.started - process.queued
+        entry.output_bytes += process.output_bytes
+        git_stats.recent.append({
+            "command": " ".join(command[:6]) + (" ..." if len(command) > 6 else ""),
+            "cwd": cwd,
+            "seconds": round(seconds, 4),
+            "returncode": process.returncode,
+        })
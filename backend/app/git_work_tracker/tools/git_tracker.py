@@ -4,53 +4,262 @@ Async Git tracking tools for generating work notes
 """
 
 import asyncio
-import httpx
+import contextlib
+import os
+import re
 import subprocess
+import sys
+import time
+import zlib
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional
+from typing import AsyncIterator, Optional
 from mcp.server.fastmcp import FastMCP, Context
 
+from git_work_tracker.config import (
+    MAX_COMMIT_DIFF_BYTES,
+    MAX_FILE_DIFF_BYTES,
+    MAX_GIT_OUTPUT_BYTES,
+    MAX_GIT_PROCESSES,
+    OBJECT_BACKEND,
+    SNAPSHOT_TTL_SECONDS,
+)
+from git_work_tracker.tools import git_objects
+from git_work_tracker.tools.commit_cache import commit_cache
+from git_work_tracker.tools.compaction import compact_commits, estimate_tokens, local_summarizer
+from git_work_tracker.tools.git_stats import track
+from git_work_tracker.tools.commit_range import CommitRange, paginate
+from git_work_tracker.tools.path_filters import DEFAULT_FILTER, PathFilter
+from git_work_tracker.tools.repo_snapshot import STATUS_COMMAND, RepoSnapshot, parse_status
 
-async def run_git_command(command: list[str], cwd: str) -> tuple[str, str, int]:
+
+# Commit header format: every commit starts with a record separator (0x1e)
+# and its header fields are split by a unit separator (0x1f).
+LOG_FORMAT = "%x1e%H%x1f%an%x1f%ae%x1f%ad%x1f%s"
+
+# A commit record starts at a 0x1e that follows a NUL or newline and is
+# followed by a full object id, so stray 0x1e bytes inside patches are ignored.
+_COMMIT_START = re.compile(rb"(?<=[\0\n])\x1e(?=[0-9a-f]{40,64}\x1f)")
+_READ_CHUNK = 64 * 1024
+_STAT_GRAPH_WIDTH = 40
+_MAX_STDERR_BYTES = 64 * 1024
+
+# Shared budget of concurrently running git processes across all tool calls
+_git_slots = asyncio.Semaphore(MAX_GIT_PROCESSES)
+
+# (repository root, git dir) per queried path
+_repo_dirs: dict[str, tuple[str, str]] = {}
+
+# Snapshot per repository root as (fingerprint, taken at, task); the task is
+# shared so concurrent callers wait on one `git status` instead of each
+# starting their own.
+_snapshots: dict[str, tuple[tuple, float, asyncio.Task]] = {}
+
+# Today's commits for the default work note, kept up to date by the watcher:
+# repository root -> (HEAD fingerprint, since, hashes, parsed commits by hash)
+_daily_commits: dict[str, tuple[tuple, str, list[str], dict[str, dict]]] = {}
+
+
+async def _read_capped(
+    stream: asyncio.StreamReader,
+    limit: int,
+    drain: bool = False
+) -> tuple[bytes, bool]:
+    """
+    Read a stream, keeping at most `limit` bytes. Returns (data, truncated).
+    
+    Reading stops at the limit unless `drain` is set, in which case the rest
+    is read and discarded so the writer never blocks on a full pipe.
+    """
+    data = bytearray()
+    truncated = False
+    while chunk := await stream.read(_READ_CHUNK):
+        if truncated:
+            continue
+        if len(data) + len(chunk) > limit:
+            data += chunk[:limit - len(data)]
+            truncated = True
+            if not drain:
+                break
+        else:
+            data += chunk
+    return bytes(data), truncated
+
+
+def _kill(process: asyncio.subprocess.Process) -> None:
+    if process.returncode is None:
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+
+
+async def run_git_command(
+    command: list[str],
+    cwd: str,
+    max_output_bytes: int = MAX_GIT_OUTPUT_BYTES
+) -> tuple[str, str, int]:
     """
     Run a git command asynchronously.
     
+    Output beyond `max_output_bytes` is not read: git is stopped, stdout is
+    cut back to its last complete line and the truncation is noted in stderr.
+    
     Returns:
         tuple: (stdout, stderr, return_code)
     """
-    process = await asyncio.create_subprocess_exec(
-        *command,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-        cwd=cwd
-    )
+    queued = time.perf_counter()
+    async with _git_slots, track(command, cwd, queued) as tracked:
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=cwd
+        )
+        
+        stderr_task = asyncio.create_task(_read_capped(process.stderr, _MAX_STDERR_BYTES, drain=True))
+        try:
+            stdout, truncated = await _read_capped(process.stdout, max_output_bytes)
+            if truncated:
+                _kill(process)
+            stderr, _ = await stderr_task
+            await process.wait()
+        except asyncio.CancelledError:
+            # Don't leave git running when the caller gives up (e.g. a timeout)
+            _kill(process)
+            stderr_task.cancel()
+            raise
+        tracked.output_bytes = len(stdout)
+        tracked.truncated = truncated
+        tracked.returncode = process.returncode
     
-    stdout, stderr = await process.communicate()
+    code = process.returncode or 0
+    if truncated:
+        # git was stopped by us rather than failing on its own
+        code = 0
+        stdout = stdout[:stdout.rfind(b'\n') + 1]
+        stderr += f"output truncated after {max_output_bytes} bytes\n".encode()
     return (
         stdout.decode('utf-8', errors='replace'),
         stderr.decode('utf-8', errors='replace'),
-        process.returncode or 0
+        code
     )
 
 
-async def get_git_root(path: str) -> Optional[str]:
-    """Get the git repository root directory."""
+async def _resolve_repo(path: str) -> Optional[tuple[str, str]]:
+    """Repository root and git dir for a path, memoized while the git dir exists."""
+    key = os.path.abspath(path)
+    cached = _repo_dirs.get(key)
+    if cached and os.path.isdir(cached[1]):
+        return cached
+    
     stdout, stderr, code = await run_git_command(
-        ["git", "rev-parse", "--show-toplevel"],
+        ["git", "rev-parse", "--show-toplevel", "--absolute-git-dir"],
         cwd=path
     )
+    lines = stdout.splitlines()
+    if code != 0 or len(lines) < 2:
+        _repo_dirs.pop(key, None)
+        return None
+    
+    _repo_dirs[key] = (lines[0], lines[1])
+    return _repo_dirs[key]
+
+
+async def get_git_root(path: str) -> Optional[str]:
+    """Get the git repository root directory."""
+    repo = await _resolve_repo(path)
+    return repo[0] if repo else None
+
+
+async def get_git_dir(path: str) -> Optional[str]:
+    """Get the absolute git directory of the repository containing a path."""
+    repo = await _resolve_repo(path)
+    return repo[1] if repo else None
+
+
+def _mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _read_bytes(path: str) -> bytes:
+    try:
+        with open(path, "rb") as f:
+            return f.read().strip()
+    except OSError:
+        return b""
+
+
+def common_dir(git_dir: str) -> str:
+    """Directory holding refs and objects; differs from the git dir in linked worktrees."""
+    common = _read_bytes(os.path.join(git_dir, "commondir"))
+    return os.path.normpath(os.path.join(git_dir, os.fsdecode(common))) if common else git_dir
+
+
+def head_fingerprint(git_dir: str) -> tuple:
+    """What HEAD points at: HEAD itself, its branch ref and when packed refs last changed."""
+    head = _read_bytes(os.path.join(git_dir, "HEAD"))
+    common = common_dir(git_dir)
+    ref = b""
+    if head.startswith(b"ref: "):
+        ref = _read_bytes(os.path.join(common, os.fsdecode(head[5:])))
+    return head, ref, _mtime(os.path.join(common, "packed-refs"))
+
+
+def _snapshot_fingerprint(git_dir: str) -> tuple:
+    """HEAD's fingerprint plus when the index last changed."""
+    return (*head_fingerprint(git_dir), _mtime(os.path.join(git_dir, "index")))
+
+
+async def _take_snapshot(root: str) -> Optional[RepoSnapshot]:
+    stdout, stderr, code = await run_git_command(STATUS_COMMAND, root)
+    if code != 0:
+        return None
+    return parse_status(root, stdout)
+
+
+async def get_repo_snapshot(repo_path: str) -> Optional[RepoSnapshot]:
+    """
+    Branch and working tree status of a repository from one `git status` call.
     
-    if code == 0:
-        return stdout.strip()
-    return None
+    Snapshots are shared per repository root and reused until HEAD, the
+    current branch or the index changes, or they are older than
+    SNAPSHOT_TTL_SECONDS. Returns None if the path is not in a repository.
+    """
+    repo = await _resolve_repo(repo_path)
+    if repo is None:
+        return None
+    root, git_dir = repo
+    
+    fingerprint = _snapshot_fingerprint(git_dir)
+    now = time.monotonic()
+    cached = _snapshots.get(root)
+    if (
+        cached
+        and cached[0] == fingerprint
+        and now - cached[1] < SNAPSHOT_TTL_SECONDS
+        and cached[2].get_loop() is asyncio.get_running_loop()
+    ):
+        task = cached[2]
+    else:
+        task = asyncio.ensure_future(_take_snapshot(root))
+        _snapshots[root] = (fingerprint, now, task)
+    
+    # Shielded so one caller timing out does not cancel it for the others
+    snapshot = await asyncio.shield(task)
+    # Failures are not cached
+    cached = _snapshots.get(root)
+    if snapshot is None and cached and cached[2] is task:
+        del _snapshots[root]
+    return snapshot
 
 
 async def get_commits_today(repo_path: str, author: Optional[str] = None) -> list[dict]:
     """Get all commits made today."""
-    # Get commits from today (00:00:00)
-    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-    since_date = today.strftime("%Y-%m-%d")
+    since_date = CommitRange.today().since
     
     # Build git log command
     cmd = [
@@ -86,129 +295,518 @@ async def get_commits_today(repo_path: str, author: Optional[str] = None) -> lis
     return commits
 
 
-async def get_commit_diff(repo_path: str, commit_hash: str, skip_new_files: bool = True) -> tuple[str, list[str]]:
+def _decode(data: bytes) -> str:
+    return data.decode('utf-8', errors='replace')
+
+
+def _stat_graph(insertions: int, deletions: int, max_changes: int) -> str:
+    """Scale a +/- graph the way `git --stat` does when changes exceed the width."""
+    if max_changes > _STAT_GRAPH_WIDTH:
+        def scale(n: int) -> int:
+            return 1 + (n * (_STAT_GRAPH_WIDTH - 1)) // max_changes if n else 0
+        insertions, deletions = scale(insertions), scale(deletions)
+    return '+' * insertions + '-' * deletions
+
+
+def _split_patch(patch: bytes) -> list[bytes]:
+    """Split a patch into per-file sections, each starting with `diff --git`."""
+    sections = patch.split(b'\ndiff --git ')
+    return [sections[0]] + [b'diff --git ' + section for section in sections[1:]]
+
+
+def _cut_at_line(section: bytes, limit: int) -> bytes:
+    """First `limit` bytes of a patch section, ending on a whole line where possible."""
+    head = section[:limit]
+    end = head.rfind(b'\n')
+    return head[:end] if end > 0 else head
+
+
+def _apply_diff_budget(sections: list[bytes]) -> tuple[list[bytes], bool]:
     """
-    Get the full diff for a specific commit.
+    Trim patch sections to the per-file and per-commit diff budgets,
+    leaving a marker line wherever something was cut.
     
     Returns:
-        tuple: (diff_text, list_of_new_files)
+        tuple: (sections, truncated)
     """
-    # First, get list of new files (added files)
-    new_files = []
-    if skip_new_files:
-        stdout, stderr, code = await run_git_command(
-            ["git", "show", commit_hash, "--name-status", "--format="],
-            repo_path
-        )
+    kept = []
+    truncated = False
+    remaining = MAX_COMMIT_DIFF_BYTES
+    for idx, section in enumerate(sections):
+        section = section.rstrip(b'\n')
+        limit = min(MAX_FILE_DIFF_BYTES, remaining)
+        if len(section) <= limit:
+            kept.append(section)
+            remaining -= len(section)
+            continue
         
-        if code == 0:
-            for line in stdout.strip().split('\n'):
-                if line.startswith('A\t'):
-                    # This is a newly added file
-                    new_files.append(line[2:].strip())
+        truncated = True
+        head = _cut_at_line(section, limit)
+        if head:
+            omitted = len(section) - len(head)
+            kept.append(head + f"\n... [{omitted:,} more bytes of this file's diff omitted]".encode())
+        if limit == remaining:
+            # The commit budget ran out inside this file
+            rest = len(sections) - idx - (1 if head else 0)
+            if rest:
+                kept.append(f"... [diffs of {rest} more file(s) omitted: commit diff budget reached]".encode())
+            break
+        remaining -= len(head)
+    return kept, truncated
+
+
+def _parse_commit_record(record: bytes, truncated: bool = False) -> dict:
+    """
+    Parse one commit of `git diff-tree -z [--raw --numstat] [-p]` output.
     
-    # Get the full diff
-    stdout, stderr, code = await run_git_command(
-        ["git", "show", commit_hash, "--format=", "--patch"],
-        repo_path
+    Layout: header NUL, raw entries (`:modes shas STATUS NUL path NUL [path NUL]`),
+    numstat entries (`ins TAB del TAB path NUL`, or `ins TAB del TAB NUL old NUL new NUL`
+    for renames), then a NUL and the patch text.
+    
+    `truncated` records were cut at the output cap; whatever part of the
+    file list and patch survived is kept.
+    """
+    header, _, body = record.partition(b'\0')
+    commit_hash, author, email, date, message = _decode(header).split('\x1f', 4)
+
+    pos = 1 if body.startswith(b'\n') else 0
+
+    def read_field() -> bytes:
+        nonlocal pos
+        end = body.index(b'\0', pos)
+        field = body[pos:end]
+        pos = end + 1
+        return field
+
+    files = []
+    try:
+        while body.startswith(b':', pos):
+            status = _decode(read_field().split()[-1])
+            path = _decode(read_field())
+            old_path = None
+            if status[0] in 'RC':
+                old_path, path = path, _decode(read_field())
+            files.append({
+                "status": status[0],
+                "path": path,
+                "old_path": old_path,
+                "insertions": 0,
+                "deletions": 0,
+                "binary": False,
+            })
+
+        for file in files:
+            added, deleted, name = read_field().split(b'\t', 2)
+            if not name:
+                # Renames and copies list the old and new path as separate fields
+                read_field()
+                read_field()
+            if added == b'-':
+                file["binary"] = True
+            else:
+                file["insertions"] = int(added)
+                file["deletions"] = int(deleted)
+    except ValueError:
+        if not truncated:
+            raise
+        # The cap fell inside the file list; nothing of the patch is left
+        pos = len(body)
+
+    if body.startswith(b'\0', pos):
+        pos += 1
+
+    return build_commit(
+        commit_hash, author, email, date, message, files, body[pos:], truncated
     )
+
+
+def build_commit(
+    commit_hash: str,
+    author: str,
+    email: str,
+    date: str,
+    message: str,
+    files: list[dict],
+    patch: bytes = b'',
+    truncated: bool = False
+) -> dict:
+    """Assemble a parsed commit (stats, new files, budgeted diff) from its parts."""
+    new_files = [f["path"] for f in files if f["status"] == 'A']
+    max_changes = max((f["insertions"] + f["deletions"] for f in files), default=0)
+    files_changed = []
+    for f in files:
+        name = f"{f['old_path']} => {f['path']}" if f["old_path"] else f["path"]
+        if f["binary"]:
+            changes = "Bin"
+        else:
+            total = f["insertions"] + f["deletions"]
+            changes = f"{total} {_stat_graph(f['insertions'], f['deletions'], max_changes)}".rstrip()
+        files_changed.append({"file": name, "changes": changes})
+
+    diff_truncated = truncated
+    if patch:
+        sections, over_budget = _apply_diff_budget(_split_patch(patch))
+        if truncated:
+            sections.append(b"... [git output for this commit truncated]")
+        diff_truncated = diff_truncated or over_budget
+        patch = b'\n'.join(sections)
+
+    return {
+        "hash": commit_hash,
+        "author": author,
+        "email": email,
+        "date": date,
+        "message": message,
+        "files": files,
+        "new_files": new_files,
+        "stats": {
+            "files_changed": files_changed,
+            "total_insertions": sum(f["insertions"] for f in files),
+            "total_deletions": sum(f["deletions"] for f in files),
+        },
+        "diff": _decode(patch),
+        "diff_truncated": diff_truncated,
+    }
+
+
+async def _iter_commit_records(
+    stream: asyncio.StreamReader,
+    max_record_bytes: int = MAX_GIT_OUTPUT_BYTES
+) -> AsyncIterator[tuple[bytes, bool]]:
+    """
+    Yield raw per-commit records from git output as they arrive,
+    as (record, truncated) pairs.
+    
+    A record longer than `max_record_bytes` keeps only its head; the rest is
+    scanned for the next commit and discarded, so memory stays bounded.
+    """
+    buffer = bytearray()
+    head = None  # kept part of an oversized record
+    while chunk := await stream.read(_READ_CHUNK):
+        # Resume a little before the old end: a separator may have arrived
+        # without the full object id that confirms it.
+        scan_from = max(1, len(buffer) - 80)
+        buffer += chunk
+        while match := _COMMIT_START.search(buffer, scan_from):
+            if head is None:
+                yield bytes(buffer[1:match.start()]), False
+            else:
+                yield head, True
+                head = None
+            del buffer[:match.start()]
+            scan_from = 1
+        if head is None and len(buffer) > max_record_bytes:
+            head = bytes(buffer[1:max_record_bytes + 1])
+        if head is not None:
+            del buffer[:-80]
+    if head is not None:
+        yield head, True
+    elif buffer:
+        yield bytes(buffer[1:]), False
+
+
+async def _iter_diff_tree(
+    repo_path: str,
+    revisions: list[str],
+    options: list[str],
+    path_filter: PathFilter,
+    hold_slot: bool = True
+) -> AsyncIterator[dict]:
+    """
+    Stream parsed commits from one `git diff-tree --stdin` process.
+    
+    Without `hold_slot` the caller must already hold a slot for it.
+    """
+    cmd = [
+        "git", "diff-tree", "--stdin", "-z", "--root",
+        # Keep commits whose diff is empty or filtered away entirely
+        "--always",
+        # Show merges as their change against the first parent, like `git show --stat`
+        "--diff-merges=first-parent",
+        f"--format={LOG_FORMAT}", "--date=iso",
+        *options,
+        *path_filter.diff_options(),
+        "--", *path_filter.pathspecs(),
+    ]
+
+    queued = time.perf_counter()
+    slot = _git_slots if hold_slot else contextlib.nullcontext()
+    async with slot, track(cmd, repo_path, queued) as tracked:
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=repo_path
+        )
+        # Passed on stdin so long lists do not hit command-line length limits
+        process.stdin.write(''.join(f"{rev}\n" for rev in revisions).encode())
+        await process.stdin.drain()
+        process.stdin.close()
+        stderr_task = asyncio.create_task(
+            _read_capped(process.stderr, _MAX_STDERR_BYTES, drain=True)
+        )
+        finished = False
+        try:
+            async for record, truncated in _iter_commit_records(process.stdout):
+                tracked.output_bytes += len(record)
+                if record:
+                    yield _parse_commit_record(record, truncated)
+            finished = True
+        finally:
+            # Only stop git if the consumer gave up early: signalling a process
+            # that already exited would reap it behind asyncio's back
+            if not finished:
+                _kill(process)
+            await process.wait()
+            await stderr_task
+            tracked.truncated = not finished
+            tracked.returncode = process.returncode
+
+
+async def iter_commits_with_changes(
+    repo_path: str,
+    revisions: list[str],
+    include_patch: bool = True,
+    skip_new_files: bool = True,
+    path_filter: PathFilter = DEFAULT_FILTER
+) -> AsyncIterator[dict]:
+    """
+    Stream commits with their file list, numstat and (optionally) patch.
+    
+    Path filtering, rename detection and skipping of new files all happen
+    inside git, so filtered diffs are never produced or parsed.
+    
+    Args:
+        repo_path: Path to git repository
+        revisions: Full hashes of the commits to show, in order
+        include_patch: Include the patch text of every commit
+        skip_new_files: Leave the patches of newly added files out
+        path_filter: Paths to include or exclude and rename detection
+    """
+    if not (include_patch and skip_new_files):
+        options = ["--raw", "--numstat"] + (["--patch"] if include_patch else [])
+        async for commit in _iter_diff_tree(repo_path, revisions, options, path_filter):
+            yield commit
+        return
+    
+    # `--diff-filter=a` drops added files from the patch but also from the
+    # file list, so a second, concurrent process provides the list and stats.
+    # The pair shares one slot: waiting for a second slot while holding the
+    # first deadlocks once every slot is held by half of a pair.
+    async with _git_slots:
+        patches = _iter_diff_tree(
+            repo_path, revisions, ["--patch", "--diff-filter=a"], path_filter, hold_slot=False
+        )
+        try:
+            async for commit in _iter_diff_tree(
+                repo_path, revisions, ["--raw", "--numstat"], path_filter, hold_slot=False
+            ):
+                patch = await anext(patches, None)
+                if patch is None or patch["hash"] != commit["hash"]:
+                    raise RuntimeError(
+                        f"git diff-tree patches out of step at commit {commit['hash']}"
+                    )
+                commit["diff"] = patch["diff"]
+                commit["diff_truncated"] = patch["diff_truncated"]
+                yield commit
+            # Read the patch process to its end so it exits on its own
+            async for _ in patches:
+                pass
+        finally:
+            await patches.aclose()
+
+
+async def _run_native(repo_path: str, func, *args):
+    """
+    Run a `git_objects` function for a repository in a worker thread.
+    
+    Returns None when the in-process backend is disabled or cannot handle
+    the request, in which case the caller uses the git CLI.
+    """
+    if OBJECT_BACKEND != "native":
+        return None
+    repo = await _resolve_repo(repo_path)
+    if repo is None:
+        return None
+    try:
+        return await asyncio.to_thread(func, repo[1], *args)
+    except git_objects.Unsupported:
+        return None
+    except (OSError, ValueError, zlib.error):
+        # Anything unexpected in the object database is left to git
+        return None
+
+
+async def get_commit_hashes(repo_path: str, log_args: list[str]) -> list[str]:
+    """List commit hashes selected by `git log` arguments, newest first."""
+    hashes = await _run_native(repo_path, git_objects.list_commits, log_args)
+    if hashes is not None:
+        return hashes
     
-    if code != 0:
-        return f"Error getting diff: {stderr}", new_files
-    
-    # If we're skipping new files, filter them out from the diff
-    if skip_new_files and new_files:
-        diff_lines = []
-        current_file = None
-        skip_current = False
-        
-        for line in stdout.split('\n'):
-            # Detect file headers
-            if line.startswith('diff --git'):
-                # Extract filename from "diff --git a/file b/file"
-                parts = line.split()
-                if len(parts) >= 4:
-                    current_file = parts[2][2:]  # Remove "a/" prefix
-                    skip_current = current_file in new_files
-            
-            # Skip lines if we're in a new file
-            if not skip_current:
-                diff_lines.append(line)
-        
-        return '\n'.join(diff_lines), new_files
-    
-    return stdout, new_files
-
-
-async def get_commit_stats(repo_path: str, commit_hash: str) -> dict:
-    """Get statistics for a commit (files changed, insertions, deletions)."""
     stdout, stderr, code = await run_git_command(
-        ["git", "show", commit_hash, "--stat", "--format="],
+        ["git", "log", "--format=%H", *log_args],
         repo_path
     )
     
     if code != 0:
-        return {"error": stderr}
-    
-    # Parse the stats
-    lines = stdout.strip().split('\n')
-    stats = {
-        "files_changed": [],
-        "total_insertions": 0,
-        "total_deletions": 0
+        return []
+    
+    return stdout.split()
+
+
+async def _parse_commits(
+    repo_path: str,
+    hashes: list[str],
+    include_patch: bool,
+    skip_new_files: bool,
+    path_filter: PathFilter
+) -> list[dict]:
+    """Parse commits, taking file lists and stats from the in-process backend where it can."""
+    native = None
+    if not include_patch or skip_new_files:
+        native = await _run_native(
+            repo_path, git_objects.commits_changes,
+            hashes, path_filter.matcher(), path_filter.detect_renames
+        )
+    if not native:
+        return [
+            commit async for commit in iter_commits_with_changes(
+                repo_path, hashes, include_patch, skip_new_files, path_filter
+            )
+        ]
+    
+    parsed = {
+        h: build_commit(
+            h, header["author"], header["email"], header["date"], header["message"], files
+        )
+        for h, (header, files) in native.items()
     }
+    rest = [h for h in hashes if h not in parsed]
+    if rest:
+        async for commit in iter_commits_with_changes(
+            repo_path, rest, include_patch, skip_new_files, path_filter
+        ):
+            parsed[commit["hash"]] = commit
     
-    for line in lines:
-        if '|' in line:
-            # File change line
-            parts = line.split('|')
-            if len(parts) == 2:
-                filename = parts[0].strip()
-                changes = parts[1].strip()
-                stats["files_changed"].append({
-                    "file": filename,
-                    "changes": changes
-                })
-        elif 'changed' in line:
-            # Summary line
-            if 'insertion' in line:
-                try:
-                    stats["total_insertions"] = int(line.split()[3])
-                except (IndexError, ValueError):
-                    pass
-            if 'deletion' in line:
-                try:
-                    stats["total_deletions"] = int(line.split()[5])
-                except (IndexError, ValueError):
-                    pass
-    
-    return stats
+    if include_patch:
+        # Patches still come from git, without the added files
+        done = [h for h in hashes if h in native]
+        async for patch in _iter_diff_tree(
+            repo_path, done, ["--patch", "--diff-filter=a"], path_filter
+        ):
+            commit = parsed[patch["hash"]]
+            commit["diff"] = patch["diff"]
+            commit["diff_truncated"] = patch["diff_truncated"]
+    
+    return [parsed[h] for h in hashes if h in parsed]
 
 
-async def get_current_branch(repo_path: str) -> str:
-    """Get the current git branch name."""
-    stdout, stderr, code = await run_git_command(
-        ["git", "rev-parse", "--abbrev-ref", "HEAD"],
-        repo_path
+async def get_parsed_commits(
+    repo_path: str,
+    hashes: list[str],
+    include_patch: bool = True,
+    skip_new_files: bool = True,
+    path_filter: PathFilter = DEFAULT_FILTER
+) -> list[dict]:
+    """
+    Get parsed commits in the given order, serving them from the commit
+    cache where possible and parsing only the missing ones with git.
+    """
+    # Filters and diff budgets shape the cached data, so they are part of the key
+    variant = (
+        f"patch={int(include_patch)};skip_new={int(skip_new_files)};"
+        f"budget={MAX_FILE_DIFF_BYTES}/{MAX_COMMIT_DIFF_BYTES}/{MAX_GIT_OUTPUT_BYTES};"
+        f"filter={path_filter.cache_key()}"
     )
+    cached = await commit_cache.get_many(repo_path, hashes, variant)
     
-    if code != 0:
+    missing = [h for h in hashes if h not in cached]
+    if missing:
+        fresh = await _parse_commits(repo_path, missing, include_patch, skip_new_files, path_filter)
+        await commit_cache.put_many(repo_path, fresh, variant)
+        cached.update((commit["hash"], commit) for commit in fresh)
+    
+    return [cached[h] for h in hashes if h in cached]
+
+
+async def precompute_daily_commits(repo_path: str) -> list[dict]:
+    """
+    Parse today's commits for the default work note and keep them in memory,
+    so `generate_work_note` can skip listing and parsing while HEAD stays put.
+    Only commits not already held from the previous run are parsed.
+    """
+    repo = await _resolve_repo(repo_path)
+    if repo is None:
+        raise ValueError(f"'{repo_path}' is not a git repository")
+    root, git_dir = repo
+    
+    # Taken first: a commit landing while parsing leaves the result stale, not wrong
+    fingerprint = head_fingerprint(git_dir)
+    since = CommitRange.today().since
+    hashes = await get_commit_hashes(root, [f"--since={since}"])
+    
+    previous = _daily_commits.get(root)
+    known = previous[3] if previous else {}
+    missing = [h for h in hashes if h not in known]
+    parsed = {h: known[h] for h in hashes if h in known}
+    parsed.update((c["hash"], c) for c in await get_parsed_commits(root, missing))
+    
+    _daily_commits[root] = (fingerprint, since, hashes, parsed)
+    return [parsed[h] for h in hashes if h in parsed]
+
+
+def precomputed_daily_commits(root: str, git_dir: str) -> Optional[tuple[list[str], dict[str, dict]]]:
+    """Today's hashes and parsed commits if precomputed and HEAD has not moved since."""
+    entry = _daily_commits.get(root)
+    if entry is None:
+        return None
+    fingerprint, since, hashes, parsed = entry
+    if fingerprint != head_fingerprint(git_dir) or since != CommitRange.today().since:
+        return None
+    return hashes, parsed
+
+
+def forget_daily_commits(root: str) -> None:
+    _daily_commits.pop(root, None)
+
+
+async def get_commits_with_changes(
+    repo_path: str,
+    author: Optional[str] = None,
+    include_patch: bool = True,
+    skip_new_files: bool = True,
+    path_filter: PathFilter = DEFAULT_FILTER,
+    commit_range: Optional[CommitRange] = None
+) -> list[dict]:
+    """
+    Get the commits of a range (today by default) with stats, new files
+    and diffs, parsing only uncached ones.
+    """
+    log_args = (commit_range or CommitRange.today()).log_args()
+    if author:
+        log_args.append(f"--author={author}")
+    
+    hashes = await get_commit_hashes(repo_path, log_args)
+    return await get_parsed_commits(repo_path, hashes, include_patch, skip_new_files, path_filter)
+
+
+async def get_current_branch(repo_path: str) -> str:
+    """Get the current git branch name."""
+    snapshot = await get_repo_snapshot(repo_path)
+    if snapshot is None:
         return "unknown"
     
-    return stdout.strip()
+    return snapshot.branch
 
 
 async def get_repo_status(repo_path: str) -> str:
     """Get current repository status (uncommitted changes)."""
-    stdout, stderr, code = await run_git_command(
-        ["git", "status", "--short"],
-        repo_path
-    )
-    
-    if code != 0:
+    snapshot = await get_repo_snapshot(repo_path)
+    if snapshot is None:
         return "Error getting status"
     
-    return stdout
+    return snapshot.short_status()
 
 
 async def get_uncommitted_diff(repo_path: str, staged_only: bool = False) -> tuple[str, list[str], list[str]]:
@@ -222,33 +820,13 @@ async def get_uncommitted_diff(repo_path: str, staged_only: bool = False) -> tup
     Returns:
         tuple: (diff_text, modified_files, new_files)
     """
-    # Get list of changed files
-    status_stdout, _, status_code = await run_git_command(
-        ["git", "status", "--short"],
-        repo_path
-    )
-    
-    if status_code != 0:
+    snapshot = await get_repo_snapshot(repo_path)
+    if snapshot is None:
         return "Error getting status", [], []
     
-    # Parse status to identify new files and modified files
-    new_files = []
-    modified_files = []
-    
-    for line in status_stdout.strip().split('\n'):
-        if not line:
-            continue
-        
-        # Status format: XY filename
-        # X = staged, Y = unstaged
-        status_code = line[:2]
-        filename = line[3:].strip()
-        
-        # Check if it's a new file (A or ??)
-        if status_code.strip().startswith('A') or status_code.strip() == '??':
-            new_files.append(filename)
-        else:
-            modified_files.append(filename)
+    # New files are untracked or added to the index; everything else is modified
+    new_files = [entry.path for entry in snapshot.entries if entry.is_new]
+    modified_files = [entry.path for entry in snapshot.entries if not entry.is_new]
     
     # Get the appropriate diff
     if staged_only:
@@ -273,209 +851,234 @@ async def get_uncommitted_diff(repo_path: str, staged_only: bool = False) -> tup
 
 async def get_staged_files(repo_path: str) -> list[dict]:
     """Get list of staged files with their status."""
-    stdout, stderr, code = await run_git_command(
-        ["git", "diff", "--cached", "--name-status"],
-        repo_path
-    )
-    
-    if code != 0:
+    snapshot = await get_repo_snapshot(repo_path)
+    if snapshot is None:
         return []
     
     files = []
-    for line in stdout.strip().split('\n'):
-        if not line:
+    for entry in snapshot.entries:
+        if not entry.is_staged:
             continue
         
-        parts = line.split('\t', 1)
-        if len(parts) == 2:
-            status = parts[0]
-            filename = parts[1]
-            files.append({
-                "status": status,
-                "filename": filename,
-                "is_new": status == 'A'
-            })
+        file = {
+            "status": entry.index,
+            "filename": entry.path,
+            "is_new": entry.index == 'A'
+        }
+        if entry.orig_path is not None:
+            file["old_filename"] = entry.orig_path
+        files.append(file)
     
     return files
 
 
 async def get_unstaged_files(repo_path: str) -> list[dict]:
     """Get list of unstaged files with their status."""
-    stdout, stderr, code = await run_git_command(
-        ["git", "status", "--short"],
-        repo_path
-    )
-    
-    if code != 0:
+    snapshot = await get_repo_snapshot(repo_path)
+    if snapshot is None:
         return []
     
     files = []
-    for line in stdout.strip().split('\n'):
-        if not line:
-            continue
-        
-        # Status format: XY filename (X=staged, Y=unstaged)
-        status_codes = line[:2]
-        filename = line[3:].strip()
-        
-        # Check unstaged status (second character)
-        unstaged = status_codes[1] if len(status_codes) > 1 else ' '
-        
-        if unstaged != ' ' and unstaged != '?':
+    for entry in snapshot.entries:
+        if entry.is_unstaged:
             files.append({
-                "status": unstaged,
-                "filename": filename,
-                "is_modified": unstaged == 'M',
-                "is_deleted": unstaged == 'D'
+                "status": entry.worktree,
+                "filename": entry.path,
+                "is_modified": entry.worktree == 'M',
+                "is_deleted": entry.worktree == 'D'
             })
-        elif status_codes == '??':
-            # Untracked file
+        elif entry.is_untracked:
             files.append({
                 "status": '??',
-                "filename": filename,
+                "filename": entry.path,
                 "is_new": True
             })
     
     return files
 
 
-async def format_work_note(
-    repo_path: str,
-    commits: list[dict],
+def peak_memory_mb() -> float:
+    """Peak resident memory of this process so far, in MiB."""
+    try:
+        import resource
+    except ImportError:
+        # No `resource` module on Windows
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def format_commit_section(
+    idx: int,
+    commit: dict,
     include_diffs: bool = True,
     include_stats: bool = True,
-    skip_new_file_diffs: bool = True
-) -> str:
-    """Format all commit information into a readable work note."""
+    skip_new_file_diffs: bool = True,
+    heading: str = "##",
+    parts: Optional[list[str]] = None
+) -> list[str]:
+    """
+    Format one parsed commit; `heading` sets the Markdown level of its title.
+    
+    The pieces are appended to `parts` (a new list if omitted) and joined
+    once by the caller, so building a long note stays linear in its size.
+    """
+    if parts is None:
+        parts = []
+    add = parts.append
+    sub_heading = heading + "#"
+    add(f"{heading} Commit {idx}: {commit['message']}\n\n")
+    add(f"**Hash:** `{commit['hash'][:8]}`\n")
+    add(f"**Author:** {commit['author']} <{commit['email']}>\n")
+    add(f"**Date:** {commit['date']}\n\n")
+    
+    new_files = commit['new_files'] if skip_new_file_diffs else []
+    diff_text = commit.get('diff', '')
+    
+    if include_stats:
+        stats = commit['stats']
+        add("**Changes:**\n")
+        
+        # Separate new files and modified files
+        new_file_set = set(new_files)
+        modified_files = [
+            file_change for file_change in stats['files_changed']
+            if file_change['file'] not in new_file_set
+        ]
+        
+        # Show new files first (without changes detail)
+        if new_files:
+            add("\n**New Files:**\n")
+            for new_file in new_files:
+                add(f"- ✨ `{new_file}` (new file)\n")
+        
+        # Show modified files with change stats
+        if modified_files:
+            add("\n**Modified Files:**\n")
+            for file_change in modified_files:
+                add(f"- `{file_change['file']}` {file_change['changes']}\n")
+        
+        add(f"\n**Total:** +{stats['total_insertions']} -{stats['total_deletions']}\n\n")
     
-    branch = await get_current_branch(repo_path)
-    status = await get_repo_status(repo_path)
+    if include_diffs:
+        # Show new files summary
+        if new_files and skip_new_file_diffs:
+            add(f"{sub_heading} 📄 New Files\n\n")
+            for new_file in new_files:
+                add(f"- `{new_file}`\n")
+            add("\n*Full content of new files omitted for brevity.*\n\n")
+        
+        # Show diffs only for modified files
+        if diff_text.strip():
+            add(f"{sub_heading} 📝 Changes (Modified Files)\n\n")
+            if commit.get('diff_truncated'):
+                add("*Large diffs were shortened; truncated parts are marked with `... [`.*\n\n")
+            add("```diff\n")
+            add(diff_text)
+            add("\n```\n\n")
     
-    # Start building the note
-    note = f"""
-# Work Note - {datetime.now().strftime('%B %d, %Y')}
+    add("---\n\n")
+    return parts
+
+
+def format_note_header(
+    repo_path: str,
+    branch: str,
+    total: int,
+    shown: int,
+    offset: int = 0,
+    path_filter: PathFilter = DEFAULT_FILTER,
+    commit_range: Optional[CommitRange] = None,
+    parts: Optional[list[str]] = None
+) -> list[str]:
+    """Append a work note's title and summary lines to `parts`."""
+    if parts is None:
+        parts = []
+    commit_range = commit_range or CommitRange.today()
+    parts.append(f"""
+# Work Note - {commit_range.describe()}
 
 **Repository:** `{Path(repo_path).name}`
 **Branch:** `{branch}`
-**Total Commits Today:** {len(commits)}
+**Total Commits{' Today' if commit_range.is_today else ''}:** {total}
+""")
+    if shown < total:
+        parts.append(f"**Showing:** commits {offset + 1}–{offset + shown}\n")
+    if path_filter.describe():
+        parts.append(f"**Filters:** {path_filter.describe()}\n")
+    parts.append("\n---\n\n")
+    
+    if not total:
+        parts.append(
+            "No commits made today.\n\n" if commit_range.is_today else "No commits in this range.\n\n"
+        )
+    return parts
 
----
 
-"""
+def format_status_section(status: str, parts: list[str]) -> list[str]:
+    """Append the uncommitted changes section, if there are any."""
+    if status.strip():
+        parts.append("## 🚧 Uncommitted Changes\n\n")
+        parts.append("```\n")
+        parts.append(status)
+        parts.append("```\n\n")
+    return parts
+
+
+async def format_work_note(
+    repo_path: str,
+    commits: list[dict],
+    include_diffs: bool = True,
+    include_stats: bool = True,
+    skip_new_file_diffs: bool = True,
+    branch: Optional[str] = None,
+    status: Optional[str] = None,
+    path_filter: PathFilter = DEFAULT_FILTER,
+    commit_range: Optional[CommitRange] = None,
+    total: Optional[int] = None,
+    offset: int = 0,
+    next_cursor: Optional[str] = None
+) -> str:
+    """
+    Format all commit information into a readable work note.
     
-    if not commits:
-        note += "No commits made today.\n\n"
-    else:
-        for idx, commit in enumerate(commits, 1):
-            note += f"## Commit {idx}: {commit['message']}\n\n"
-            note += f"**Hash:** `{commit['hash'][:8]}`\n"
-            note += f"**Author:** {commit['author']} <{commit['email']}>\n"
-            note += f"**Date:** {commit['date']}\n\n"
-            
-            # Get new files list first
-            diff_text, new_files = await get_commit_diff(repo_path, commit['hash'], skip_new_file_diffs)
-            
-            if include_stats:
-                stats = await get_commit_stats(repo_path, commit['hash'])
-                if "error" not in stats:
-                    note += "**Changes:**\n"
-                    
-                    # Separate new files and modified files
-                    modified_files = []
-                    for file_change in stats['files_changed']:
-                        if file_change['file'] not in new_files:
-                            modified_files.append(file_change)
-                    
-                    # Show new files first (without changes detail)
-                    if new_files:
-                        note += "\n**New Files:**\n"
-                        for new_file in new_files:
-                            note += f"- ✨ `{new_file}` (new file)\n"
-                    
-                    # Show modified files with change stats
-                    if modified_files:
-                        note += "\n**Modified Files:**\n"
-                        for file_change in modified_files:
-                            note += f"- `{file_change['file']}` {file_change['changes']}\n"
-                    
-                    note += f"\n**Total:** +{stats['total_insertions']} -{stats['total_deletions']}\n\n"
-            
-            if include_diffs:
-                # Show new files summary
-                if new_files and skip_new_file_diffs:
-                    note += "### 📄 New Files\n\n"
-                    for new_file in new_files:
-                        note += f"- `{new_file}`\n"
-                    note += "\n*Full content of new files omitted for brevity.*\n\n"
-                
-                # Show diffs only for modified files
-                if diff_text.strip():
-                    note += "### 📝 Changes (Modified Files)\n\n```diff\n"
-                    note += diff_text
-                    note += "\n```\n\n"
-            
-            note += "---\n\n"
+    `commits` must come from `get_commits_with_changes` so every commit
+    already carries its stats, new files and diff. When they are one page
+    of a longer range, `total`, `offset` and `next_cursor` describe it.
+    """
+    if total is None:
+        total = len(commits)
+    if branch is None:
+        branch = await get_current_branch(repo_path)
+    if status is None:
+        status = await get_repo_status(repo_path)
+    
+    parts = format_note_header(
+        repo_path, branch, total, len(commits), offset, path_filter, commit_range
+    )
+    for idx, commit in enumerate(commits, offset + 1):
+        format_commit_section(
+            idx, commit, include_diffs, include_stats, skip_new_file_diffs, parts=parts
+        )
     
     # Add current status if there are uncommitted changes
-    if status.strip():
-        note += "## 🚧 Uncommitted Changes\n\n"
-        note += "```\n"
-        note += status
-        note += "```\n\n"
+    format_status_section(status, parts)
     
-    return note
+    if next_cursor:
+        parts.append(
+            f"*{total - offset - len(commits)} more commits in this range: "
+            f"call again with cursor `{next_cursor}` for the next page.*\n"
+        )
+    
+    return "".join(parts)
 
 
 def register_git_tools(mcp: FastMCP):
     """Register git tracking tools with the MCP server."""
 
-    @mcp.tool()
-    async def save_journal_note(
-        ctx: Context,
-        title: str,
-        content: str,
-        api_url: str = "http://127.0.0.1:8000"
-    ) -> str:
-        """
-        Save a generated note, summary, or report to the Journal database.
-        
-        Use this tool when you want to persist the output of your analysis or 
-        summarization into the user's permanent journal.
-        
-        Args:
-            title: The title of the note (e.g., "Work Summary - Dec 8")
-            content: The markdown content of the note
-            api_url: The URL of the Journal API (defaults to local server)
-        """
-        await ctx.info(f"💾 Saving note '{title}' to journal...")
-        
-        async with httpx.AsyncClient() as client:
-            try:
-                # We try to hit the backend API
-                response = await client.post(
-                    f"{api_url}/notes",
-                    json={"title": title, "content": content},
-                    timeout=10.0
-                )
-                
-                if response.status_code == 201:
-                    data = response.json()
-                    note_id = data.get("id", "unknown")
-                    await ctx.info(f"✅ Note saved successfully (ID: {note_id})")
-                    return f"Successfully saved note to journal with ID: {note_id}"
-                else:
-                    error_msg = f"API returned error {response.status_code}: {response.text}"
-                    await ctx.error(error_msg)
-                    return f"Failed to save note. {error_msg}"
-                    
-            except httpx.ConnectError:
-                msg = "Could not connect to the Journal API. Is the main application running on port 8000?"
-                await ctx.error(msg)
-                return f"Error: {msg}"
-            except Exception as e:
-                await ctx.error(f"Unexpected error: {str(e)}")
-                return f"Error saving note: {str(e)}"
-    
     @mcp.tool()
     async def generate_work_note(
         ctx: Context,
@@ -483,10 +1086,25 @@ def register_git_tools(mcp: FastMCP):
         include_diffs: bool = True,
         include_stats: bool = True,
         skip_new_file_diffs: bool = True,
-        author: Optional[str] = None
+        author: Optional[str] = None,
+        include_paths: Optional[list[str]] = None,
+        exclude_paths: Optional[list[str]] = None,
+        exclude_generated: bool = True,
+        detect_renames: bool = True,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        revision_range: Optional[str] = None,
+        page_size: int = 50,
+        cursor: Optional[str] = None,
+        token_budget: Optional[int] = None,
+        summarize_large_hunks: bool = False
     ) -> str:
         """
-        Generate a comprehensive work note for today's commits.
+        Generate a comprehensive work note for today's commits, or for any
+        date or revision range (weekly, sprint or release notes).
+        
+        Long ranges are returned in pages of `page_size` commits; the note
+        ends with the cursor to pass to get the next page.
         
         Args:
             repo_path: Path to the git repository (defaults to current directory)
@@ -494,11 +1112,25 @@ def register_git_tools(mcp: FastMCP):
             include_stats: Include file change statistics
             skip_new_file_diffs: Skip full content of new files (recommended, default: True)
             author: Filter commits by author (defaults to all authors)
+            include_paths: Only show files matching these globs (e.g. "src/**", "*.py")
+            exclude_paths: Leave out files matching these globs
+            exclude_generated: Leave out lockfiles, minified, binary and generated files (default: True)
+            detect_renames: Show moved files as renames instead of delete + add (default: True)
+            since: Start date, e.g. "2025-11-01" or "2 weeks ago" (defaults to today)
+            until: End date, inclusive for plain dates like "2025-11-07"
+            revision_range: Git revision range, e.g. "v1.2..HEAD" or "main..feature"
+            page_size: Maximum number of commits in one note
+            cursor: Cursor from the previous page's note, to continue after it
+            token_budget: Approximate token limit for the note; the least significant
+                diff hunks are dropped and mechanical or repeated ones collapsed to fit
+            summarize_large_hunks: With a token_budget, summarize the largest hunks with
+                the local LLM instead of dropping them (slower)
         
         Returns:
             A formatted markdown note with all commit information
         """
-        await ctx.info(f"🔍 Generating work note for {datetime.now().strftime('%B %d, %Y')}...")
+        commit_range = CommitRange.from_args(since, until, revision_range)
+        await ctx.info(f"🔍 Generating work note for {commit_range.describe()}...")
         
         # Use current directory if no path provided
         if not repo_path:
@@ -511,17 +1143,77 @@ def register_git_tools(mcp: FastMCP):
         
         await ctx.info(f"📁 Repository: {git_root}")
         
-        # Get commits
-        await ctx.info("📝 Fetching commits...")
-        commits = await get_commits_today(git_root, author)
+        path_filter = PathFilter.from_args(
+            include_paths, exclude_paths, exclude_generated, detect_renames
+        )
+        
+        # A watched repository has today's default note precomputed
+        precomputed = None
+        if (
+            commit_range.is_today and not author and skip_new_file_diffs
+            and path_filter == DEFAULT_FILTER
+        ):
+            precomputed = precomputed_daily_commits(git_root, await get_git_dir(git_root))
+        
+        await ctx.info("📝 Fetching commits..." if precomputed is None else "⚡ Using precomputed commits...")
+        if precomputed is None:
+            log_args = commit_range.log_args()
+            if author:
+                log_args.append(f"--author={author}")
+            hashes = await get_commit_hashes(git_root, log_args)
+        else:
+            hashes, parsed = precomputed
+        try:
+            page, offset, next_cursor = paginate(hashes, cursor, page_size)
+        except ValueError as e:
+            return f"❌ Error: {e}"
+        
+        # Get the page's stats and diffs in one pass alongside branch and status
+        if precomputed is None:
+            commits, branch, status = await asyncio.gather(
+                get_parsed_commits(git_root, page, include_diffs, skip_new_file_diffs, path_filter),
+                get_current_branch(git_root),
+                get_repo_status(git_root),
+            )
+        else:
+            commits = [parsed[h] for h in page if h in parsed]
+            branch, status = await asyncio.gather(
+                get_current_branch(git_root),
+                get_repo_status(git_root),
+            )
         
-        await ctx.info(f"✅ Found {len(commits)} commits")
+        await ctx.info(
+            f"✅ Found {len(hashes)} commits, showing {len(commits)} "
+            f"(peak memory {peak_memory_mb():.0f} MiB)"
+        )
         
         # Generate the note
         await ctx.info("📄 Formatting work note...")
-        note = await format_work_note(git_root, commits, include_diffs, include_stats, skip_new_file_diffs)
         
-        await ctx.info("✨ Work note generated successfully!")
+        async def format_note(commits: list[dict]) -> str:
+            return await format_work_note(
+                git_root, commits, include_diffs, include_stats, skip_new_file_diffs,
+                branch=branch, status=status, path_filter=path_filter,
+                commit_range=commit_range, total=len(hashes), offset=offset, next_cursor=next_cursor
+            )
+        
+        note = await format_note(commits)
+        
+        if token_budget and include_diffs and estimate_tokens(note) > token_budget:
+            await ctx.info(f"🗜️ Compacting diffs to about {token_budget:,} tokens...")
+            summarizer = local_summarizer() if summarize_large_hunks else None
+            if summarize_large_hunks and summarizer is None:
+                await ctx.warning("Local summarizer unavailable; large hunks are ranked as they are")
+            commits, note, report = await compact_commits(
+                commits, token_budget, format_note, summarizer
+            )
+            note += f"\n*Compacted: {report.describe()}*\n"
+            await ctx.info(f"🗜️ Compacted: {report.describe()}")
+        
+        await ctx.info(
+            f"✨ Work note generated successfully! "
+            f"({len(note) / 1024:.0f} KiB, peak memory {peak_memory_mb():.0f} MiB)"
+        )
         
         return note
     
@@ -566,12 +1258,81 @@ def register_git_tools(mcp: FastMCP):
             ]
         }
     
+    @mcp.tool()
+    async def list_commits(
+        repo_path: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        revision_range: Optional[str] = None,
+        author: Optional[str] = None,
+        page_size: int = 200,
+        cursor: Optional[str] = None
+    ) -> dict:
+        """
+        List commits of a date or revision range with basic information and
+        change totals, one page at a time.
+        
+        Args:
+            repo_path: Path to the git repository
+            since: Start date, e.g. "2025-11-01" or "2 weeks ago" (defaults to today)
+            until: End date, inclusive for plain dates like "2025-11-07"
+            revision_range: Git revision range, e.g. "v1.2..HEAD" or "main..feature"
+            author: Filter by author name
+            page_size: Maximum number of commits returned
+            cursor: `next_cursor` of the previous page, to continue after it
+        
+        Returns:
+            Dictionary with the page of commits, the total and the next cursor
+        """
+        if not repo_path:
+            repo_path = "."
+        
+        git_root = await get_git_root(repo_path)
+        if not git_root:
+            return {"error": "Not a git repository"}
+        
+        commit_range = CommitRange.from_args(since, until, revision_range)
+        log_args = commit_range.log_args()
+        if author:
+            log_args.append(f"--author={author}")
+        hashes = await get_commit_hashes(git_root, log_args)
+        try:
+            page, offset, next_cursor = paginate(hashes, cursor, page_size)
+        except ValueError as e:
+            return {"error": str(e)}
+        
+        commits = await get_parsed_commits(git_root, page, include_patch=False)
+        
+        return {
+            "repository": Path(git_root).name,
+            "range": commit_range.describe(),
+            "total": len(hashes),
+            "offset": offset,
+            "next_cursor": next_cursor,
+            "commits": [
+                {
+                    "hash": c["hash"],
+                    "message": c["message"],
+                    "author": c["author"],
+                    "time": c["date"],
+                    "files_changed": len(c["stats"]["files_changed"]),
+                    "insertions": c["stats"]["total_insertions"],
+                    "deletions": c["stats"]["total_deletions"]
+                }
+                for c in commits
+            ]
+        }
+    
     @mcp.tool()
     async def get_commit_details(
         commit_hash: str,
         repo_path: Optional[str] = None,
         include_diff: bool = True,
-        skip_new_file_diffs: bool = True
+        skip_new_file_diffs: bool = True,
+        include_paths: Optional[list[str]] = None,
+        exclude_paths: Optional[list[str]] = None,
+        exclude_generated: bool = True,
+        detect_renames: bool = True
     ) -> dict:
         """
         Get detailed information about a specific commit.
@@ -581,6 +1342,10 @@ def register_git_tools(mcp: FastMCP):
             repo_path: Path to the git repository
             include_diff: Include the full diff
             skip_new_file_diffs: Skip full content of new files (default: True)
+            include_paths: Only show files matching these globs (e.g. "src/**", "*.py")
+            exclude_paths: Leave out files matching these globs
+            exclude_generated: Leave out lockfiles, minified, binary and generated files (default: True)
+            detect_renames: Show moved files as renames instead of delete + add (default: True)
         
         Returns:
             Detailed commit information
@@ -592,36 +1357,38 @@ def register_git_tools(mcp: FastMCP):
         if not git_root:
             return {"error": "Not a git repository"}
         
-        # Get commit info
+        # Resolve to the full hash, the commit cache key
         stdout, stderr, code = await run_git_command(
-            ["git", "show", commit_hash, "--format=%H|%an|%ae|%ad|%s", "--no-patch"],
+            ["git", "rev-parse", "--verify", "--end-of-options", f"{commit_hash}^{{commit}}"],
             git_root
         )
         
         if code != 0:
             return {"error": f"Commit not found: {stderr}"}
         
-        parts = stdout.strip().split('|', 4)
-        if len(parts) < 5:
+        path_filter = PathFilter.from_args(
+            include_paths, exclude_paths, exclude_generated, detect_renames
+        )
+        commits = await get_parsed_commits(
+            git_root, [stdout.strip()], include_diff, skip_new_file_diffs, path_filter
+        )
+        if not commits:
             return {"error": "Failed to parse commit info"}
         
+        commit = commits[0]
         result = {
-            "hash": parts[0],
-            "author": parts[1],
-            "email": parts[2],
-            "date": parts[3],
-            "message": parts[4]
+            "hash": commit["hash"],
+            "author": commit["author"],
+            "email": commit["email"],
+            "date": commit["date"],
+            "message": commit["message"],
+            "stats": commit["stats"]
         }
         
-        # Get stats
-        stats = await get_commit_stats(git_root, commit_hash)
-        result["stats"] = stats
-        
         # Get diff if requested
         if include_diff:
-            diff, new_files = await get_commit_diff(git_root, commit_hash, skip_new_file_diffs)
-            result["diff"] = diff
-            result["new_files"] = new_files
+            result["diff"] = commit["diff"]
+            result["new_files"] = commit["new_files"]
         
         return result
     
@@ -639,21 +1406,18 @@ def register_git_tools(mcp: FastMCP):
         if not repo_path:
             repo_path = "."
         
-        git_root = await get_git_root(repo_path)
-        if not git_root:
+        snapshot = await get_repo_snapshot(repo_path)
+        if snapshot is None:
             return {"error": "Not a git repository"}
         
-        branch = await get_current_branch(git_root)
-        status = await get_repo_status(git_root)
-        
         return {
-            "repository": Path(git_root).name,
-            "path": git_root,
-            "branch": branch,
-            "status": status,
-            "has_uncommitted_changes": bool(status.strip())
+            "repository": Path(snapshot.root).name,
+            "path": snapshot.root,
+            "branch": snapshot.branch,
+            "head": snapshot.head,
+            "upstream": snapshot.upstream,
+            "ahead": snapshot.ahead,
+            "behind": snapshot.behind,
+            "status": snapshot.short_status(),
+            "has_uncommitted_changes": snapshot.is_dirty
         }
-
-    
-
-
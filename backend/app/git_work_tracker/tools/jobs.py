@@ -0,0 +1,440 @@
+"""
+tools/jobs.py
+Background work-note jobs: collection runs outside the tool call that
+started it, and progress and formatted commits are saved as they are
+produced so results survive client timeouts and server restarts
+"""
+
+import asyncio
+import dataclasses
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+
+from mcp.server.fastmcp import FastMCP, Context
+
+from git_work_tracker.config import DATA_DIR, JOB_RETENTION_DAYS
+from git_work_tracker.tools.commit_range import CommitRange
+from git_work_tracker.tools.git_tracker import (
+    format_commit_section,
+    format_note_header,
+    format_status_section,
+    get_commit_hashes,
+    get_current_branch,
+    get_git_root,
+    get_parsed_commits,
+    get_repo_status,
+)
+from git_work_tracker.tools.path_filters import PathFilter
+
+# Commits parsed and saved per step; a restart repeats at most one step
+JOB_STEP_COMMITS = 20
+
+ACTIVE_STATES = ("queued", "running")
+
+
+class JobStore:
+    """
+    SQLite store of work-note jobs.
+
+    A job row holds the tool arguments, the commit list fixed when the job
+    started and how many of those commits are done; every finished commit
+    is stored already formatted in `job_commits`.
+    """
+
+    def __init__(self, path: Path, retention_days: float):
+        self.path = path
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    repo TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    hashes TEXT,
+                    done INTEGER NOT NULL DEFAULT 0,
+                    branch TEXT,
+                    repo_status TEXT,
+                    error TEXT,
+                    created REAL NOT NULL,
+                    updated REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_commits (
+                    job_id TEXT NOT NULL,
+                    idx INTEGER NOT NULL,
+                    text TEXT NOT NULL,
+                    PRIMARY KEY (job_id, idx)
+                )
+            """)
+            self._conn = conn
+        return self._conn
+
+    def _create(self, job_id: str, repo: str, params: dict) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            self._prune(conn, now)
+            conn.execute(
+                "INSERT INTO jobs (id, repo, params, status, created, updated) "
+                "VALUES (?, ?, ?, 'queued', ?, ?)",
+                (job_id, repo, json.dumps(params), now, now),
+            )
+            conn.commit()
+
+    def _prune(self, conn: sqlite3.Connection, now: float) -> None:
+        cutoff = now - self.retention_days * 86400
+        placeholders = ",".join("?" * len(ACTIVE_STATES))
+        conn.execute(
+            f"DELETE FROM job_commits WHERE job_id IN (SELECT id FROM jobs "
+            f"WHERE updated < ? AND status NOT IN ({placeholders}))",
+            (cutoff, *ACTIVE_STATES),
+        )
+        conn.execute(
+            f"DELETE FROM jobs WHERE updated < ? AND status NOT IN ({placeholders})",
+            (cutoff, *ACTIVE_STATES),
+        )
+
+    def _get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["hashes"] = json.loads(job["hashes"]) if job["hashes"] is not None else None
+        job["total"] = len(job["hashes"]) if job["hashes"] is not None else None
+        return job
+
+    def _update(self, job_id: str, **fields) -> None:
+        if "hashes" in fields:
+            fields["hashes"] = json.dumps(fields["hashes"])
+        fields["updated"] = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                f"UPDATE jobs SET {', '.join(f'{name} = ?' for name in fields)} WHERE id = ?",
+                (*fields.values(), job_id),
+            )
+            conn.commit()
+
+    def _add_commits(self, job_id: str, texts: dict[int, str], done: int) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO job_commits (job_id, idx, text) VALUES (?, ?, ?)",
+                [(job_id, idx, text) for idx, text in texts.items()],
+            )
+            conn.execute(
+                "UPDATE jobs SET done = ?, updated = ? WHERE id = ?",
+                (done, time.time(), job_id),
+            )
+            conn.commit()
+
+    def _commit_texts(self, job_id: str, offset: int, limit: int) -> list[str]:
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT text FROM job_commits WHERE job_id = ? AND idx >= ? AND idx < ? ORDER BY idx",
+                (job_id, offset, offset + limit),
+            ).fetchall()
+        return [row["text"] for row in rows]
+
+    def _list_jobs(self, active_only: bool) -> list[dict]:
+        query = "SELECT id FROM jobs"
+        if active_only:
+            query += f" WHERE status IN ({','.join('?' * len(ACTIVE_STATES))})"
+        query += " ORDER BY created DESC"
+        with self._lock:
+            rows = self._connect().execute(query, ACTIVE_STATES if active_only else ()).fetchall()
+        return [job for job in map(self._get, (row["id"] for row in rows)) if job]
+
+    async def create(self, job_id: str, repo: str, params: dict) -> None:
+        await asyncio.to_thread(self._create, job_id, repo, params)
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return await asyncio.to_thread(self._get, job_id)
+
+    async def update(self, job_id: str, **fields) -> None:
+        await asyncio.to_thread(self._update, job_id, **fields)
+
+    async def add_commits(self, job_id: str, texts: dict[int, str], done: int) -> None:
+        await asyncio.to_thread(self._add_commits, job_id, texts, done)
+
+    async def commit_texts(self, job_id: str, offset: int, limit: int) -> list[str]:
+        return await asyncio.to_thread(self._commit_texts, job_id, offset, limit)
+
+    async def list_jobs(self, active_only: bool = False) -> list[dict]:
+        return await asyncio.to_thread(self._list_jobs, active_only)
+
+
+job_store = JobStore(DATA_DIR / "jobs.db", JOB_RETENTION_DAYS)
+
+# Jobs running in this process, and events set whenever one makes progress
+_tasks: dict[str, asyncio.Task] = {}
+_changed: dict[str, asyncio.Event] = {}
+
+
+def _notify(job_id: str) -> None:
+    event = _changed.pop(job_id, None)
+    if event is not None:
+        event.set()
+
+
+def _path_filter(data: dict) -> PathFilter:
+    return PathFilter(**{k: tuple(v) if isinstance(v, list) else v for k, v in data.items()})
+
+
+async def _run_job(job_id: str) -> None:
+    """Collect a job's commits step by step, resuming after the last saved step."""
+    try:
+        job = await job_store.get(job_id)
+        if job is None:
+            return
+        repo = job["repo"]
+        params = job["params"]
+        path_filter = _path_filter(params["filter"])
+        await job_store.update(job_id, status="running")
+
+        hashes = job["hashes"]
+        if hashes is None:
+            # The commit list is fixed once, so a resumed job covers the same commits
+            log_args = CommitRange(**params["range"]).log_args()
+            if params["author"]:
+                log_args.append(f"--author={params['author']}")
+            hashes, branch = await asyncio.gather(
+                get_commit_hashes(repo, log_args),
+                get_current_branch(repo),
+            )
+            await job_store.update(job_id, hashes=hashes, branch=branch)
+            _notify(job_id)
+
+        for start in range(job["done"], len(hashes), JOB_STEP_COMMITS):
+            step = hashes[start:start + JOB_STEP_COMMITS]
+            commits = await get_parsed_commits(
+                repo, step, params["include_diffs"], params["skip_new_file_diffs"], path_filter
+            )
+            positions = {h: start + i for i, h in enumerate(step)}
+            texts = {
+                positions[commit["hash"]]: "".join(format_commit_section(
+                    positions[commit["hash"]] + 1, commit, params["include_diffs"],
+                    params["include_stats"], params["skip_new_file_diffs"]
+                ))
+                for commit in commits
+            }
+            await job_store.add_commits(job_id, texts, start + len(step))
+            _notify(job_id)
+
+        await job_store.update(job_id, status="completed", repo_status=await get_repo_status(repo))
+    except asyncio.CancelledError:
+        # Server shutdown: the job stays active and is resumed on the next start
+        raise
+    except Exception as e:
+        await job_store.update(job_id, status="failed", error=str(e) or type(e).__name__)
+    finally:
+        _tasks.pop(job_id, None)
+        _notify(job_id)
+
+
+def _start(job_id: str) -> None:
+    if job_id not in _tasks:
+        _tasks[job_id] = asyncio.create_task(_run_job(job_id))
+
+
+async def resume_jobs() -> int:
+    """Restart jobs left unfinished by a previous server process; returns how many."""
+    jobs = await job_store.list_jobs(active_only=True)
+    for job in jobs:
+        _start(job["id"])
+    return len(jobs)
+
+
+async def _wait_for_job(ctx: Context, job_id: str, wait_seconds: float) -> Optional[dict]:
+    """Wait until the job finishes or `wait_seconds` pass, reporting progress meanwhile."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max(0.0, wait_seconds)
+    while True:
+        # Subscribe before reading, so progress made in between is not missed
+        event = _changed.setdefault(job_id, asyncio.Event())
+        job = await job_store.get(job_id)
+        if job is None or job["status"] not in ACTIVE_STATES:
+            return job
+        if job["total"] is not None:
+            await ctx.report_progress(job["done"], job["total"])
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return job
+        try:
+            await asyncio.wait_for(event.wait(), remaining)
+        except asyncio.TimeoutError:
+            pass
+
+
+def _summary(job: dict) -> dict:
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "repository": Path(job["repo"]).name,
+        "range": CommitRange(**job["params"]["range"]).describe(),
+        "done": job["done"],
+        "total": job["total"],
+        "error": job["error"],
+        "created": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(job["created"])),
+        "updated": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(job["updated"])),
+    }
+
+
+async def format_job_note(job: dict, offset: int, max_commits: int) -> Optional[str]:
+    """The job's note for commits `offset` to `offset + max_commits`, as far as collected."""
+    if job["total"] is None:
+        return None
+    params = job["params"]
+    texts = await job_store.commit_texts(job["id"], offset, max_commits)
+
+    parts = format_note_header(
+        job["repo"], job["branch"] or "unknown", job["total"], len(texts), offset,
+        _path_filter(params["filter"]), CommitRange(**params["range"])
+    )
+    parts.extend(texts)
+    if job["status"] in ACTIVE_STATES:
+        parts.append(f"*⏳ Still collecting: {job['done']} of {job['total']} commits done.*\n\n")
+    elif job["status"] == "failed":
+        parts.append(f"*❌ Job failed after {job['done']} of {job['total']} commits: {job['error']}*\n\n")
+    else:
+        format_status_section(job["repo_status"] or "", parts)
+    return "".join(parts)
+
+
+def register_job_tools(mcp: FastMCP):
+    """Register background job tools with the MCP server."""
+
+    @mcp.tool()
+    async def start_work_note_job(
+        ctx: Context,
+        repo_path: Optional[str] = None,
+        include_diffs: bool = True,
+        include_stats: bool = True,
+        skip_new_file_diffs: bool = True,
+        author: Optional[str] = None,
+        include_paths: Optional[list[str]] = None,
+        exclude_paths: Optional[list[str]] = None,
+        exclude_generated: bool = True,
+        detect_renames: bool = True,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        revision_range: Optional[str] = None,
+        wait_seconds: float = 0.0
+    ) -> dict:
+        """
+        Start generating a work note in the background and return its job id.
+
+        Use this instead of `generate_work_note` for large repositories or long
+        ranges that could time out. Fetch the result, or the part collected so
+        far, with `get_work_note_job`. Jobs survive server restarts.
+
+        Args:
+            repo_path: Path to the git repository (defaults to current directory)
+            include_diffs: Include git diffs for modified files
+            include_stats: Include file change statistics
+            skip_new_file_diffs: Skip full content of new files (recommended, default: True)
+            author: Filter commits by author (defaults to all authors)
+            include_paths: Only show files matching these globs (e.g. "src/**", "*.py")
+            exclude_paths: Leave out files matching these globs
+            exclude_generated: Leave out lockfiles, minified, binary and generated files (default: True)
+            detect_renames: Show moved files as renames instead of delete + add (default: True)
+            since: Start date, e.g. "2025-11-01" or "2 weeks ago" (defaults to today)
+            until: End date, inclusive for plain dates like "2025-11-07"
+            revision_range: Git revision range, e.g. "v1.2..HEAD" or "main..feature"
+            wait_seconds: Wait up to this long for the job, reporting progress
+
+        Returns:
+            The job id and its current status and progress
+        """
+        if not repo_path:
+            repo_path = "."
+
+        git_root = await get_git_root(repo_path)
+        if not git_root:
+            return {"error": "Not a git repository"}
+
+        params = {
+            "range": dataclasses.asdict(CommitRange.from_args(since, until, revision_range)),
+            "filter": dataclasses.asdict(
+                PathFilter.from_args(include_paths, exclude_paths, exclude_generated, detect_renames)
+            ),
+            "author": author,
+            "include_diffs": include_diffs,
+            "include_stats": include_stats,
+            "skip_new_file_diffs": skip_new_file_diffs,
+        }
+        job_id = uuid.uuid4().hex[:12]
+        await job_store.create(job_id, git_root, params)
+        _start(job_id)
+        await ctx.info(f"🚀 Started work note job {job_id} for {git_root}")
+
+        job = await _wait_for_job(ctx, job_id, wait_seconds)
+        return _summary(job)
+
+    @mcp.tool()
+    async def get_work_note_job(
+        ctx: Context,
+        job_id: str,
+        wait_seconds: float = 0.0,
+        offset: int = 0,
+        max_commits: int = 50
+    ) -> dict:
+        """
+        Get the status and note of a background work note job. While the job
+        runs, the note contains the commits collected so far.
+
+        Args:
+            job_id: Id returned by `start_work_note_job`
+            wait_seconds: Wait up to this long for the job to finish, reporting progress
+            offset: Index of the first commit to include in the note
+            max_commits: Maximum number of commits in the note
+
+        Returns:
+            Job status and progress, the markdown note, and `next_offset` for
+            the following commits (null when there are none)
+        """
+        job = await job_store.get(job_id)
+        if job is None:
+            return {"error": f"Unknown job: {job_id}"}
+        if job["status"] in ACTIVE_STATES:
+            # Resume here too, e.g. when the job was started by a server that has since stopped
+            _start(job_id)
+            job = await _wait_for_job(ctx, job_id, wait_seconds)
+
+        offset = max(0, offset)
+        max_commits = max(1, max_commits)
+        result = _summary(job)
+        result["note"] = await format_job_note(job, offset, max_commits)
+        end = offset + max_commits
+        result["next_offset"] = end if job["total"] is not None and end < job["total"] else None
+        return result
+
+    @mcp.tool()
+    async def list_work_note_jobs(active_only: bool = False) -> dict:
+        """
+        List background work note jobs, newest first.
+
+        Args:
+            active_only: Only list jobs that are queued or running
+
+        Returns:
+            Dictionary with the jobs' status and progress
+        """
+        return {"jobs": [_summary(job) for job in await job_store.list_jobs(active_only)]}
@@ -0,0 +1,226 @@
+"""
+tools/journal.py
+Saving notes to the Journal: over its HTTP API with one pooled client for
+the server's lifetime, or straight into its database when it runs on the
+same machine
+"""
+
+import asyncio
+import random
+import sys
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+import httpx
+from mcp.server.fastmcp import Context, FastMCP
+
+from git_work_tracker.config import (
+    JOURNAL_API_URL,
+    JOURNAL_BATCH_CONCURRENCY,
+    JOURNAL_BUSY_RETRIES,
+    JOURNAL_MAX_CONNECTIONS,
+    JOURNAL_WRITE_MODE,
+)
+
+# Backoff between retries of a write that found the database busy
+_BACKOFF_SECONDS = 0.05
+_MAX_BACKOFF_SECONDS = 2.0
+
+# One HTTP client shared by all tool calls, kept while any client session is
+# open; the lifespan is entered once per SSE connection, hence the count
+_http: Optional[httpx.AsyncClient] = None
+_http_users = 0
+
+# Set once the backend's tables have been checked in direct mode
+_tables_ready = False
+
+
+class JournalError(Exception):
+    """A note could not be saved; the message says why."""
+
+
+def _new_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(10.0, connect=3.0),
+        limits=httpx.Limits(
+            max_connections=JOURNAL_MAX_CONNECTIONS,
+            max_keepalive_connections=JOURNAL_MAX_CONNECTIONS,
+        ),
+    )
+
+
+@asynccontextmanager
+async def journal_client() -> AsyncIterator[None]:
+    """Keep the pooled HTTP client open for the duration of a server session."""
+    global _http, _http_users
+    _http_users += 1
+    try:
+        yield
+    finally:
+        _http_users -= 1
+        if not _http_users and _http is not None:
+            client, _http = _http, None
+            await client.aclose()
+
+
+def _client() -> httpx.AsyncClient:
+    global _http
+    if _http is None or _http.is_closed:
+        # Also covers calls made outside a server session (scripts, tests)
+        _http = _new_client()
+    return _http
+
+
+async def _save_via_api(api_url: str, title: str, content: str) -> dict:
+    try:
+        response = await _client().post(
+            f"{api_url.rstrip('/')}/notes", json={"title": title, "content": content}
+        )
+    except httpx.ConnectError:
+        raise JournalError(
+            f"Could not connect to the Journal API at {api_url}. Is the main application running?"
+        )
+    except httpx.HTTPError as e:
+        raise JournalError(f"Request to the Journal API failed: {e!r}")
+    if response.status_code != 201:
+        raise JournalError(f"API returned error {response.status_code}: {response.text}")
+    return response.json()
+
+
+def _is_busy(error: Exception) -> bool:
+    message = str(error).lower()
+    return "database is locked" in message or "database is busy" in message
+
+
+async def _save_direct(title: str, content: str) -> dict:
+    """
+    Insert through the backend's note_service, so the similarity and tag
+    indexes are updated exactly as by the API. Needs `backend/` on the
+    import path and DATABASE_URL pointing at the API's database.
+    """
+    global _tables_ready
+    try:
+        from app.core.database import AsyncLocalSession, create_tables
+        from app.schemas.schemas import NoteCreate
+        from app.services import note_service
+        from sqlalchemy.exc import OperationalError
+    except ImportError as e:
+        raise JournalError(
+            f"Direct mode needs the Journal backend importable (start the server from backend/): {e}"
+        )
+    if not _tables_ready:
+        await create_tables()
+        _tables_ready = True
+
+    note = NoteCreate(title=title, content=content)
+    attempt = 0
+    while True:
+        try:
+            async with AsyncLocalSession() as session:
+                return await note_service.create_note(session, note)
+        except OperationalError as e:
+            if not _is_busy(e) or attempt >= JOURNAL_BUSY_RETRIES:
+                raise JournalError(f"Database write failed: {e.orig or e}")
+        # Exponential backoff with jitter, so writers that collided do not retry in step
+        delay = min(_MAX_BACKOFF_SECONDS, _BACKOFF_SECONDS * 2 ** attempt)
+        await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+        attempt += 1
+
+
+async def save_note(title: str, content: str, api_url: Optional[str] = None) -> dict:
+    """Save one note in the configured mode and return it as the Journal stored it."""
+    if JOURNAL_WRITE_MODE == "direct":
+        return await _save_direct(title, content)
+    return await _save_via_api(api_url or JOURNAL_API_URL, title, content)
+
+
+async def save_notes(notes: list[dict], api_url: Optional[str] = None) -> tuple[list[dict], list[dict]]:
+    """
+    Save several notes, a few at a time over the pooled connections (one at
+    a time in direct mode, where SQLite takes one writer anyway).
+    Returns (saved, failed), each entry naming the note's index in `notes`.
+    """
+    concurrency = 1 if JOURNAL_WRITE_MODE == "direct" else JOURNAL_BATCH_CONCURRENCY
+    slots = asyncio.Semaphore(concurrency)
+    saved, failed = [], []
+
+    async def save(index: int, note: dict) -> None:
+        title = (note.get("title") or "").strip()
+        if not title:
+            failed.append({"index": index, "title": title, "error": "title is required"})
+            return
+        async with slots:
+            try:
+                stored = await save_note(title, note.get("content") or "", api_url)
+            except Exception as e:
+                if not isinstance(e, JournalError):
+                    print(f"Saving note '{title}' failed: {e!r}", file=sys.stderr)
+                failed.append({"index": index, "title": title, "error": str(e)})
+                return
+        saved.append({"index": index, "id": stored.get("id"), "title": title})
+
+    await asyncio.gather(*(save(index, note) for index, note in enumerate(notes)))
+    saved.sort(key=lambda entry: entry["index"])
+    failed.sort(key=lambda entry: entry["index"])
+    return saved, failed
+
+
+def register_journal_tools(mcp: FastMCP):
+    """Register the tools that save notes to the Journal."""
+
+    @mcp.tool()
+    async def save_journal_note(
+        ctx: Context,
+        title: str,
+        content: str,
+        api_url: Optional[str] = None
+    ) -> str:
+        """
+        Save a generated note, summary, or report to the Journal database.
+
+        Use this tool when you want to persist the output of your analysis or
+        summarization into the user's permanent journal.
+
+        Args:
+            title: The title of the note (e.g., "Work Summary - Dec 8")
+            content: The markdown content of the note
+            api_url: The URL of the Journal API (defaults to local server)
+        """
+        await ctx.info(f"💾 Saving note '{title}' to journal...")
+        try:
+            data = await save_note(title, content, api_url)
+        except JournalError as e:
+            await ctx.error(str(e))
+            return f"Failed to save note. {e}"
+        except Exception as e:
+            print(f"Saving note '{title}' failed: {e!r}", file=sys.stderr)
+            await ctx.error(f"Unexpected error: {str(e)}")
+            return f"Error saving note: {str(e)}"
+
+        note_id = data.get("id", "unknown")
+        await ctx.info(f"✅ Note saved successfully (ID: {note_id})")
+        return f"Successfully saved note to journal with ID: {note_id}"
+
+    @mcp.tool()
+    async def save_journal_notes(
+        ctx: Context,
+        notes: list[dict],
+        api_url: Optional[str] = None
+    ) -> dict:
+        """
+        Save several notes to the Journal in one call, e.g. one per repository
+        or per day. Much faster than calling save_journal_note repeatedly.
+
+        Args:
+            notes: Notes to save, each {"title": ..., "content": ...}
+            api_url: The URL of the Journal API (defaults to local server)
+
+        Returns:
+            The saved notes with their IDs, and the ones that failed with the reason
+        """
+        await ctx.info(f"💾 Saving {len(notes)} notes to journal...")
+        saved, failed = await save_notes(notes, api_url)
+        if failed:
+            await ctx.warning(f"{len(failed)} of {len(notes)} notes could not be saved")
+        await ctx.info(f"✅ Saved {len(saved)} notes")
+        return {"saved": saved, "failed": failed}
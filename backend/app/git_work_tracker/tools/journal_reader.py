@@ -0,0 +1,344 @@
+"""
+tools/journal_reader.py
+Reading the Journal: notes are listed, searched and fetched straight from
+its SQLite file over read-only connections, so agent reads never go through
+the API process or take a write lock
+"""
+
+import asyncio
+import base64
+import queue
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from mcp.server.fastmcp import FastMCP
+
+from git_work_tracker.config import (
+    JOURNAL_DB_PATH,
+    JOURNAL_READ_CACHE_ENTRIES,
+    JOURNAL_READ_POOL_SIZE,
+)
+
+# Characters of note content shown around a search match, and in listings
+_SNIPPET_CHARS = 160
+_MAX_PAGE_SIZE = 100
+
+
+class JournalReadError(Exception):
+    """The journal database cannot be read; the message says why."""
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    if not path.exists():
+        raise JournalReadError(
+            f"Journal database not found at {path}; set GIT_TRACKER_JOURNAL_DB to its path"
+        )
+    # mode=ro never takes a write lock; query_only also refuses any write
+    conn = sqlite3.connect(
+        f"{path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False, timeout=5.0
+    )
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA query_only = ON")
+    return conn
+
+
+class JournalReader:
+    """
+    A small pool of read-only connections with a result cache.
+
+    Cached results are reused until the database changes, which SQLite
+    reports through `PRAGMA data_version`. That counter only means something
+    within one connection, so it is always read on the same one.
+    """
+
+    def __init__(self, path: Path, pool_size: int, cache_entries: int):
+        self.path = path
+        self.pool_size = max(1, pool_size)
+        self.cache_entries = cache_entries
+        self._pool: queue.SimpleQueue = queue.SimpleQueue()
+        self._opened = 0
+        self._open_lock = threading.Lock()
+        self._version_conn: Optional[sqlite3.Connection] = None
+        self._version_lock = threading.Lock()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._cache: OrderedDict[tuple, tuple[int, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        with self._open_lock:
+            if self._opened < self.pool_size:
+                conn = _connect(self.path)
+                self._opened += 1
+                return conn
+        # Every connection is open and in use; `_slots` keeps this rare
+        return self._pool.get()
+
+    def _version(self) -> int:
+        with self._version_lock:
+            if self._version_conn is None:
+                self._version_conn = _connect(self.path)
+            return self._version_conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _run(self, query: Callable[[sqlite3.Connection], Any]) -> tuple[int, Any]:
+        version = self._version()
+        conn = self._acquire()
+        try:
+            return version, query(conn)
+        finally:
+            # Nothing is left open between reads, so the writer is never held up
+            if conn.in_transaction:
+                conn.rollback()
+            self._pool.put(conn)
+
+    async def read(self, key: tuple, query: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run `query` on a pooled connection, or reuse its result if nothing changed."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.pool_size)
+        cached = self._cache.get(key)
+        if cached is not None:
+            if await asyncio.to_thread(self._version) == cached[0]:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached[1]
+        self.misses += 1
+        async with self._slots:
+            version, result = await asyncio.to_thread(self._run, query)
+        if self.cache_entries:
+            self._cache[key] = (version, result)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_entries:
+                self._cache.popitem(last=False)
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "path": str(self.path),
+            "connections": self._opened,
+            "cached_results": len(self._cache),
+            "cache_hits": self.hits,
+            "cache_misses": self.misses,
+        }
+
+
+journal_reader = JournalReader(JOURNAL_DB_PATH, JOURNAL_READ_POOL_SIZE, JOURNAL_READ_CACHE_ENTRIES)
+
+
+def _normalize_tag(tag: str) -> str:
+    # Same normalization as the backend's graph_service
+    return tag.strip().lstrip("#").rstrip("/").lower()
+
+
+def _encode_cursor(*values: Any) -> str:
+    return base64.urlsafe_b64encode("\x1f".join(map(str, values)).encode()).decode()
+
+
+def _decode_cursor(cursor: str, parts: int) -> list[str]:
+    try:
+        values = base64.urlsafe_b64decode(cursor.encode()).decode().split("\x1f")
+    except (ValueError, UnicodeDecodeError):
+        values = []
+    if len(values) != parts:
+        raise ValueError("invalid cursor; pass next_cursor from the previous page unchanged")
+    return values
+
+
+def _like_pattern(term: str) -> str:
+    """A LIKE pattern (with ESCAPE '\\') matching `term` anywhere."""
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _snippet(content: str, terms: list[str]) -> str:
+    content = content or ""
+    lowered = content.lower()
+    start = 0
+    for term in terms:
+        found = lowered.find(term.lower())
+        if found >= 0:
+            start = max(0, found - _SNIPPET_CHARS // 4)
+            break
+    text = " ".join(content[start:start + _SNIPPET_CHARS].split())
+    return ("…" if start else "") + text + ("…" if start + _SNIPPET_CHARS < len(content) else "")
+
+
+def _summary(row: sqlite3.Row, terms: list[str] = ()) -> dict:
+    return {
+        "id": row["id"],
+        "title": row["title"],
+        "updated_at": row["updated_at"],
+        "snippet": _snippet(row["content"], list(terms)),
+    }
+
+
+async def list_notes(page_size: int = 20, cursor: Optional[str] = None, tag: Optional[str] = None) -> dict:
+    """
+    Active notes, most recently updated first. Pages are keyed on
+    (updated_at, id) of the last note shown, so notes saved while paging
+    do not shift later pages.
+    """
+    page_size = min(max(1, page_size), _MAX_PAGE_SIZE)
+    after = _decode_cursor(cursor, 2) if cursor else None
+    tag = _normalize_tag(tag) if tag else None
+
+    def query(conn: sqlite3.Connection) -> dict:
+        where = ["n.is_deleted = 0"]
+        params: list[Any] = []
+        if tag:
+            where.append("n.id IN (SELECT note_id FROM note_tags WHERE tag = ?)")
+            params.append(tag)
+        if after:
+            where.append("(n.updated_at < ? OR (n.updated_at = ? AND n.id < ?))")
+            params += [after[0], after[0], int(after[1])]
+        rows = conn.execute(
+            f"SELECT n.id, n.title, n.updated_at, substr(n.content, 1, {_SNIPPET_CHARS + 1}) AS content "
+            f"FROM notes n WHERE {' AND '.join(where)} "
+            f"ORDER BY n.updated_at DESC, n.id DESC LIMIT ?",
+            (*params, page_size + 1),
+        ).fetchall()
+        page = rows[:page_size]
+        return {
+            "notes": [_summary(row) for row in page],
+            "next_cursor": (
+                _encode_cursor(page[-1]["updated_at"], page[-1]["id"]) if len(rows) > page_size else None
+            ),
+        }
+
+    return await journal_reader.read(("list", page_size, cursor, tag), query)
+
+
+async def search_notes(text: str, page_size: int = 20, cursor: Optional[str] = None) -> dict:
+    """
+    Active notes containing every word of `text` (case-insensitive) in the
+    title or content; title matches first, then the most recently updated.
+    """
+    terms = text.split()
+    if not terms:
+        raise ValueError("search text is empty")
+    page_size = min(max(1, page_size), _MAX_PAGE_SIZE)
+    offset = int(_decode_cursor(cursor, 1)[0]) if cursor else 0
+
+    def query(conn: sqlite3.Connection) -> dict:
+        patterns = [_like_pattern(term) for term in terms]
+        matches = " AND ".join(
+            "(title LIKE ? ESCAPE '\\' OR content LIKE ? ESCAPE '\\')" for _ in patterns
+        )
+        in_title = " AND ".join("title LIKE ? ESCAPE '\\'" for _ in patterns)
+        rows = conn.execute(
+            f"SELECT id, title, updated_at, content FROM notes "
+            f"WHERE is_deleted = 0 AND {matches} "
+            f"ORDER BY ({in_title}) DESC, updated_at DESC, id DESC LIMIT ? OFFSET ?",
+            (*(p for pattern in patterns for p in (pattern, pattern)), *patterns, page_size + 1, offset),
+        ).fetchall()
+        page = rows[:page_size]
+        return {
+            "notes": [_summary(row, terms) for row in page],
+            "next_cursor": _encode_cursor(offset + page_size) if len(rows) > page_size else None,
+        }
+
+    return await journal_reader.read(("search", tuple(terms), page_size, offset), query)
+
+
+async def get_note(note_id: int) -> Optional[dict]:
+    """One note with its content and tags, or None if it does not exist or is deleted."""
+
+    def query(conn: sqlite3.Connection) -> Optional[dict]:
+        row = conn.execute(
+            "SELECT id, title, content, created_at, updated_at FROM notes "
+            "WHERE id = ? AND is_deleted = 0",
+            (note_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        tags = [
+            tag for (tag,) in conn.execute(
+                "SELECT tag FROM note_tags WHERE note_id = ? ORDER BY tag", (note_id,)
+            )
+        ]
+        return {**dict(row), "tags": tags}
+
+    return await journal_reader.read(("note", note_id), query)
+
+
+async def tag_counts() -> list[dict]:
+    """Tags of active notes with how many notes use each."""
+
+    def query(conn: sqlite3.Connection) -> list[dict]:
+        return [dict(row) for row in conn.execute(
+            "SELECT t.tag AS tag, COUNT(*) AS count FROM note_tags t "
+            "JOIN notes n ON n.id = t.note_id WHERE n.is_deleted = 0 "
+            "GROUP BY t.tag ORDER BY count DESC, t.tag"
+        )]
+
+    return await journal_reader.read(("tags",), query)
+
+
+def register_journal_read_tools(mcp: FastMCP):
+    """Register the tools that read notes from the Journal."""
+
+    @mcp.tool()
+    async def list_journal_notes(
+        page_size: int = 20,
+        cursor: Optional[str] = None,
+        tag: Optional[str] = None
+    ) -> dict:
+        """
+        List the user's journal notes, most recently updated first.
+
+        Args:
+            page_size: Notes per page (at most 100)
+            cursor: next_cursor from the previous page
+            tag: Only notes with this tag, e.g. "work" or "#work"
+
+        Returns:
+            Notes with id, title, last update and the start of their content,
+            and next_cursor (null on the last page)
+        """
+        try:
+            return await list_notes(page_size, cursor, tag)
+        except (JournalReadError, ValueError, sqlite3.Error) as e:
+            return {"error": str(e)}
+
+    @mcp.tool()
+    async def search_journal_notes(
+        query: str,
+        page_size: int = 20,
+        cursor: Optional[str] = None
+    ) -> dict:
+        """
+        Find journal notes containing all words of `query` in their title or content.
+
+        Args:
+            query: Words to search for (case-insensitive)
+            page_size: Notes per page (at most 100)
+            cursor: next_cursor from the previous page
+
+        Returns:
+            Matching notes with a snippet around the match, title matches first,
+            and next_cursor (null on the last page)
+        """
+        try:
+            return await search_notes(query, page_size, cursor)
+        except (JournalReadError, ValueError, sqlite3.Error) as e:
+            return {"error": str(e)}
+
+    @mcp.tool()
+    async def get_journal_note(note_id: int) -> dict:
+        """
+        Fetch one journal note with its full content and tags.
+
+        Args:
+            note_id: Id of the note, as returned by the list and search tools
+        """
+        try:
+            note = await get_note(note_id)
+        except (JournalReadError, sqlite3.Error) as e:
+            return {"error": str(e)}
+        return note if note is not None else {"error": f"Note {note_id} not found"}
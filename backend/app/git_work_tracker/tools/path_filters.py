@@ -0,0 +1,174 @@
+"""
+tools/path_filters.py
+Path filters for commit diffs, turned into git pathspecs and diff options
+so that filtered files are never diffed by git in the first place
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+# Built-in exclusion rules, as globs matched against repository paths.
+# Patterns without a slash match at any depth, like in .gitignore.
+BUILTIN_RULES = {
+    "lockfiles": (
+        "package-lock.json", "npm-shrinkwrap.json", "yarn.lock", "pnpm-lock.yaml",
+        "bun.lockb", "poetry.lock", "Pipfile.lock", "uv.lock", "pdm.lock",
+        "Cargo.lock", "Gemfile.lock", "composer.lock", "go.sum", "mix.lock",
+        "pubspec.lock", "Podfile.lock", "packages.lock.json", "flake.lock",
+    ),
+    "minified": (
+        "*.min.js", "*.min.mjs", "*.min.css", "*.js.map", "*.css.map",
+    ),
+    "binary": (
+        "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.ico", "*.bmp", "*.tiff",
+        "*.pdf", "*.zip", "*.gz", "*.tgz", "*.bz2", "*.xz", "*.7z", "*.rar", "*.jar",
+        "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+        "*.mp3", "*.mp4", "*.mov", "*.wav", "*.ogg", "*.webm",
+        "*.so", "*.dylib", "*.dll", "*.exe", "*.a", "*.o", "*.pyc", "*.class", "*.wasm",
+        "*.sqlite", "*.db",
+    ),
+    "generated": (
+        "*_pb2.py", "*_pb2_grpc.py", "*.pb.go", "*.pb.cc", "*.pb.h",
+        "*.generated.*", "*.g.dart", "*.freezed.dart", "*.Designer.cs",
+        "*.snap", "**/node_modules/**", "**/vendor/**", "**/dist/**", "**/__generated__/**",
+    ),
+}
+
+
+def _globs(pattern: str) -> list[str]:
+    """
+    Gitignore-style globs for a pattern: `/x` is rooted, slash-free patterns
+    match at any depth, and a pattern matching a directory matches its contents.
+    """
+    pattern = pattern.strip()
+    if pattern.endswith("/"):
+        pattern += "**"
+    if pattern.startswith("/"):
+        pattern = pattern.lstrip("/")
+    elif "/" not in pattern:
+        pattern = f"**/{pattern}"
+    if pattern.endswith("/**"):
+        return [pattern]
+    return [pattern, f"{pattern}/**"]
+
+
+def _glob_regex(glob: str) -> str:
+    """Translate a `:(glob)` pathspec (wildmatch with WM_PATHNAME) to a regex."""
+    out = []
+    i = 0
+    while i < len(glob):
+        at_boundary = i == 0 or glob[i - 1] == "/"
+        if at_boundary and glob.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif at_boundary and glob.startswith("**", i) and i + 2 == len(glob):
+            out.append(".*")
+            i += 2
+        elif glob[i] == "*":
+            while i < len(glob) and glob[i] == "*":
+                i += 1
+            out.append("[^/]*")
+        elif glob[i] == "?":
+            out.append("[^/]")
+            i += 1
+        elif glob[i] == "[" and "]" in glob[i + 2:]:
+            end = glob.index("]", i + 2)
+            body = glob[i + 1:end]
+            if body[0] in "!^":
+                body = "^" + body[1:]
+            out.append("[" + body.replace("\\", "\\\\") + "]")
+            i = end + 1
+        elif glob[i] == "\\" and i + 1 < len(glob):
+            out.append(re.escape(glob[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(glob[i]))
+            i += 1
+    return "".join(out)
+
+
+@dataclass(frozen=True)
+class PathFilter:
+    """
+    Which paths and how renames show up in commit diffs.
+
+    Includes and excludes are glob patterns (`src/**`, `*.sql`, `docs/`)
+    anchored like .gitignore entries. Excluded files are left out
+    of the file list, the stats and the diff.
+    """
+    include: tuple[str, ...] = ()
+    exclude: tuple[str, ...] = ()
+    rules: tuple[str, ...] = tuple(BUILTIN_RULES)
+    detect_renames: bool = True
+    rename_threshold: int = 50
+
+    @classmethod
+    def from_args(
+        cls,
+        include_paths: Optional[list[str]] = None,
+        exclude_paths: Optional[list[str]] = None,
+        exclude_generated: bool = True,
+        detect_renames: bool = True
+    ) -> "PathFilter":
+        """Build a filter from tool arguments."""
+        return cls(
+            include=tuple(p for p in include_paths or () if p.strip()),
+            exclude=tuple(p for p in exclude_paths or () if p.strip()),
+            rules=tuple(BUILTIN_RULES) if exclude_generated else (),
+            detect_renames=detect_renames,
+        )
+
+    def _excluded_patterns(self) -> list[str]:
+        excluded = list(self.exclude)
+        for rule in self.rules:
+            excluded.extend(BUILTIN_RULES[rule])
+        return excluded
+
+    def pathspecs(self) -> list[str]:
+        """Pathspecs to pass after `--`; empty means the whole tree."""
+        specs = [f":(glob){g}" for p in self.include for g in _globs(p)]
+        specs += [f":(exclude,glob){g}" for p in self._excluded_patterns() for g in _globs(p)]
+        return specs
+
+    def matcher(self) -> Callable[[str], bool]:
+        """Predicate telling whether a path passes this filter, as git's pathspecs would."""
+        def compile_all(patterns: list[str]) -> Optional[re.Pattern]:
+            regexes = [_glob_regex(g) for p in patterns for g in _globs(p)]
+            return re.compile("|".join(f"(?:{r})" for r in regexes)) if regexes else None
+
+        include = compile_all(list(self.include))
+        exclude = compile_all(self._excluded_patterns())
+
+        def matches(path: str) -> bool:
+            if include is not None and not include.fullmatch(path):
+                return False
+            return exclude is None or not exclude.fullmatch(path)
+        return matches
+
+    def diff_options(self) -> list[str]:
+        if self.detect_renames:
+            return [f"--find-renames={self.rename_threshold}%"]
+        return ["--no-renames"]
+
+    def cache_key(self) -> str:
+        """Short stable key identifying this filter's effect on parsed commits."""
+        key = "\0".join([*self.pathspecs(), *self.diff_options()])
+        return hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+
+    def describe(self) -> str:
+        """One-line summary for work notes; empty for a filter that changes nothing."""
+        parts = []
+        if self.include:
+            parts.append("only " + ", ".join(f"`{p}`" for p in self.include))
+        if self.rules:
+            parts.append("excluding " + ", ".join(self.rules) + " files")
+        if self.exclude:
+            parts.append("excluding " + ", ".join(f"`{p}`" for p in self.exclude))
+        if not self.detect_renames:
+            parts.append("rename detection off")
+        return "; ".join(parts)
+
+
+DEFAULT_FILTER = PathFilter()
@@ -0,0 +1,140 @@
+"""
+tools/repo_snapshot.py
+Point-in-time view of a repository's branch and working tree, parsed from
+a single `git status --porcelain=v2 -z --branch` call
+"""
+
+from dataclasses import dataclass, field
+from typing import Optional
+
+# Command producing the output `parse_status` expects. `--no-optional-locks`
+# keeps git from rewriting the index, which would itself invalidate snapshots.
+STATUS_COMMAND = ["git", "--no-optional-locks", "status", "--porcelain=v2", "-z", "--branch"]
+
+_NEEDS_QUOTES = set(' "\\\t\n')
+
+
+def _quote(path: str) -> str:
+    """Quote a path the way `git status --short` does when it has to."""
+    if not any(ch in _NEEDS_QUOTES for ch in path):
+        return path
+    escaped = path.replace("\\", "\\\\").replace('"', '\\"').replace("\t", "\\t").replace("\n", "\\n")
+    return f'"{escaped}"'
+
+
+@dataclass(frozen=True)
+class StatusEntry:
+    """
+    One changed path. `index` and `worktree` are the X and Y status letters
+    of `git status --short` (space for unchanged, `?` for untracked).
+    """
+    index: str
+    worktree: str
+    path: str
+    orig_path: Optional[str] = None
+
+    @property
+    def is_untracked(self) -> bool:
+        return self.index == "?"
+
+    @property
+    def is_new(self) -> bool:
+        return self.is_untracked or self.index == "A"
+
+    @property
+    def is_staged(self) -> bool:
+        return self.index not in " ?!"
+
+    @property
+    def is_unstaged(self) -> bool:
+        return self.worktree not in " ?!"
+
+    def short(self) -> str:
+        """This entry as a `git status --short` line."""
+        name = _quote(self.path)
+        if self.orig_path is not None:
+            name = f"{_quote(self.orig_path)} -> {name}"
+        return f"{self.index}{self.worktree} {name}"
+
+
+@dataclass(frozen=True)
+class RepoSnapshot:
+    root: str
+    # Branch name, "HEAD" when detached (as `git rev-parse --abbrev-ref HEAD`)
+    branch: str
+    head: Optional[str] = None
+    upstream: Optional[str] = None
+    ahead: int = 0
+    behind: int = 0
+    entries: tuple[StatusEntry, ...] = field(default_factory=tuple)
+
+    @property
+    def is_dirty(self) -> bool:
+        return bool(self.entries)
+
+    def short_status(self) -> str:
+        """The working tree status in `git status --short` format."""
+        return "".join(f"{entry.short()}\n" for entry in self.entries)
+
+
+def _status_letter(char: str) -> str:
+    return " " if char == "." else char
+
+
+def parse_status(root: str, output: str) -> RepoSnapshot:
+    """Parse `git status --porcelain=v2 -z --branch` output."""
+    fields = output.split("\0")
+    branch = "HEAD"
+    head = upstream = None
+    ahead = behind = 0
+    entries = []
+
+    i = 0
+    while i < len(fields):
+        record = fields[i]
+        i += 1
+        if not record:
+            continue
+        kind = record[0]
+
+        if kind == "#":
+            # "# branch.<key> <value>"
+            _, key, value = (record.split(" ", 2) + [""])[:3]
+            if key == "branch.oid":
+                head = None if value == "(initial)" else value
+            elif key == "branch.head":
+                branch = "HEAD" if value == "(detached)" else value
+            elif key == "branch.upstream":
+                upstream = value
+            elif key == "branch.ab":
+                plus, minus = value.split()
+                ahead, behind = int(plus), -int(minus)
+        elif kind == "1":
+            # 1 XY sub mH mI mW hH hI path
+            parts = record.split(" ", 8)
+            xy = parts[1]
+            entries.append(StatusEntry(_status_letter(xy[0]), _status_letter(xy[1]), parts[8]))
+        elif kind == "2":
+            # 2 XY sub mH mI mW hH hI Xscore path, then the original path as its own field
+            parts = record.split(" ", 9)
+            xy = parts[1]
+            orig_path = fields[i] if i < len(fields) else None
+            i += 1
+            entries.append(StatusEntry(_status_letter(xy[0]), _status_letter(xy[1]), parts[9], orig_path))
+        elif kind == "u":
+            # u XY sub m1 m2 m3 mW h1 h2 h3 path
+            parts = record.split(" ", 10)
+            xy = parts[1]
+            entries.append(StatusEntry(xy[0], xy[1], parts[10]))
+        elif kind in "?!":
+            entries.append(StatusEntry(kind, kind, record[2:]))
+
+    return RepoSnapshot(
+        root=root,
+        branch=branch,
+        head=head,
+        upstream=upstream,
+        ahead=ahead,
+        behind=behind,
+        entries=tuple(entries),
+    )
@@ -0,0 +1,433 @@
+"""
+tools/watcher.py
+Repository watcher: follows HEAD, branch refs and the HEAD reflog of
+registered repositories and keeps today's work note precomputed, in
+memory for `generate_work_note` and on disk as a Markdown file
+"""
+
+import asyncio
+import ctypes
+import ctypes.util
+import hashlib
+import json
+import os
+import struct
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+from mcp.server.fastmcp import FastMCP, Context
+
+from git_work_tracker.config import (
+    DATA_DIR,
+    WATCH_BACKEND,
+    WATCH_DEBOUNCE_SECONDS,
+    WATCH_MAX_DELAY_SECONDS,
+    WATCH_POLL_SECONDS,
+)
+from git_work_tracker.tools.git_tracker import (
+    common_dir,
+    forget_daily_commits,
+    format_work_note,
+    get_git_dir,
+    get_git_root,
+    head_fingerprint,
+    precompute_daily_commits,
+)
+
+WATCHED_FILE = DATA_DIR / "watched.json"
+NOTES_DIR = DATA_DIR / "daily_notes"
+
+# Files in the git dir whose changes move HEAD; everything else there
+# (index, FETCH_HEAD, lock files) is ignored
+_GIT_DIR_NAMES = {"HEAD", "packed-refs"}
+
+# States of a repository mid-operation; the note is refreshed once they end
+_BUSY_MARKERS = ("rebase-merge", "rebase-apply", "MERGE_HEAD", "CHERRY_PICK_HEAD", "REVERT_HEAD")
+
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _Inotify:
+    """Minimal inotify binding over libc, read from the event loop."""
+
+    def __init__(self):
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, path: str) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def rm_watch(self, wd: int) -> None:
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read(self) -> list[tuple[int, int, str]]:
+        """Pending events as (watch descriptor, mask, name)."""
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        pos = 0
+        while pos < len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, pos)
+            pos += _EVENT_HEADER.size
+            name = os.fsdecode(data[pos:pos + length].rstrip(b"\0"))
+            pos += length
+            events.append((wd, mask, name))
+        return events
+
+
+class _InotifyDispatcher:
+    """One inotify instance for all watched repositories."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.inotify = _Inotify()
+        self.loop = loop
+        # wd -> (watcher, directory, whether to filter names to _GIT_DIR_NAMES)
+        self.watches: dict[int, tuple["RepoWatcher", str, bool]] = {}
+        loop.add_reader(self.inotify.fd, self._on_readable)
+
+    def watch(self, watcher: "RepoWatcher", path: str, git_dir_only: bool = False) -> None:
+        wd = self.inotify.add_watch(path)
+        self.watches[wd] = (watcher, path, git_dir_only)
+
+    def unwatch(self, watcher: "RepoWatcher") -> None:
+        for wd in [wd for wd, entry in self.watches.items() if entry[0] is watcher]:
+            self.inotify.rm_watch(wd)
+            del self.watches[wd]
+
+    def _on_readable(self) -> None:
+        for wd, mask, name in self.inotify.read():
+            if mask & _IN_Q_OVERFLOW:
+                # Events were lost: treat every repository as changed
+                for watcher, _, _ in list(self.watches.values()):
+                    watcher.changed()
+                continue
+            entry = self.watches.get(wd)
+            if entry is None:
+                continue
+            if mask & _IN_IGNORED:
+                # The directory is gone, e.g. a deleted branch namespace
+                del self.watches[wd]
+                continue
+            watcher, path, git_dir_only = entry
+            if mask & _IN_ISDIR and mask & (_IN_CREATE | _IN_MOVED_TO) and not git_dir_only:
+                # New branch namespace, e.g. refs/heads/feature/
+                try:
+                    watcher.watch_tree(os.path.join(path, name))
+                except OSError:
+                    watcher.fall_back_to_polling()
+            if name.endswith(".lock") or (git_dir_only and name not in _GIT_DIR_NAMES):
+                continue
+            watcher.changed()
+
+
+_dispatcher: Optional[_InotifyDispatcher] = None
+
+
+def _get_dispatcher() -> Optional[_InotifyDispatcher]:
+    """The shared inotify dispatcher, or None where inotify is unavailable."""
+    global _dispatcher
+    loop = asyncio.get_running_loop()
+    if _dispatcher is not None and _dispatcher.loop is loop:
+        return _dispatcher
+    if WATCH_BACKEND == "poll" or not sys.platform.startswith("linux"):
+        return None
+    try:
+        _dispatcher = _InotifyDispatcher(loop)
+    except (OSError, AttributeError):
+        return None
+    return _dispatcher
+
+
+def _seconds_until_midnight() -> float:
+    tomorrow = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    return max(1.0, (tomorrow - datetime.now()).total_seconds())
+
+
+def note_path(root: str) -> Path:
+    """Where the daily note of a repository is kept on disk."""
+    digest = hashlib.blake2b(root.encode(), digest_size=4).hexdigest()
+    return NOTES_DIR / f"{Path(root).name}-{digest}.md"
+
+
+def _write_note(path: Path, note: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(note, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+class RepoWatcher:
+    """Keeps one repository's daily note precomputed."""
+
+    def __init__(self, root: str, git_dir: str):
+        self.root = root
+        self.git_dir = git_dir
+        self.common_dir = common_dir(git_dir)
+        self.mode = "polling"
+        self.refreshed_at: Optional[float] = None
+        self.refresh_seconds: Optional[float] = None
+        self.commit_count = 0
+        self.error: Optional[str] = None
+        self._wake = asyncio.Event()
+        # Set once the first refresh has finished, successfully or not
+        self.ready = asyncio.Event()
+        # HEAD fingerprint as of the last refresh or detected change (polling)
+        self._seen: Optional[tuple] = None
+        self._dispatcher: Optional[_InotifyDispatcher] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._dispatcher = _get_dispatcher()
+        if self._dispatcher is not None:
+            try:
+                self._dispatcher.watch(self, self.git_dir, git_dir_only=True)
+                if os.path.isdir(os.path.join(self.git_dir, "logs")):
+                    self._dispatcher.watch(self, os.path.join(self.git_dir, "logs"), git_dir_only=True)
+                if self.common_dir != self.git_dir:
+                    self._dispatcher.watch(self, self.common_dir, git_dir_only=True)
+                self.watch_tree(os.path.join(self.common_dir, "refs", "heads"))
+                self.mode = "inotify"
+            except OSError:
+                # E.g. the inotify watch limit is reached
+                self.fall_back_to_polling()
+        self._task = asyncio.create_task(self._run())
+
+    def fall_back_to_polling(self) -> None:
+        if self._dispatcher is not None:
+            self._dispatcher.unwatch(self)
+            self._dispatcher = None
+        self.mode = "polling"
+        self.changed()
+
+    def stop(self) -> None:
+        if self._dispatcher is not None:
+            self._dispatcher.unwatch(self)
+        if self._task is not None:
+            self._task.cancel()
+        forget_daily_commits(self.root)
+
+    def watch_tree(self, path: str) -> None:
+        """Watch a refs directory and the directories below it."""
+        if self._dispatcher is None:
+            return
+        for dirpath, _, _ in os.walk(path):
+            self._dispatcher.watch(self, dirpath)
+
+    def changed(self) -> None:
+        self._wake.set()
+
+    def _busy(self) -> bool:
+        return any(os.path.exists(os.path.join(self.git_dir, m)) for m in _BUSY_MARKERS)
+
+    async def _next_change(self, timeout: float) -> bool:
+        """
+        Wait up to `timeout` seconds for HEAD to move; True if it did.
+        Changes made since the last refresh started count as well.
+        """
+        if self.mode == "inotify":
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                return False
+            self._wake.clear()
+            return True
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            fingerprint = head_fingerprint(self.git_dir)
+            if fingerprint != self._seen:
+                self._seen = fingerprint
+                return True
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return False
+            await asyncio.sleep(min(WATCH_POLL_SECONDS, remaining))
+
+    async def refresh(self) -> None:
+        started = time.perf_counter()
+        self._seen = head_fingerprint(self.git_dir)
+        self._wake.clear()
+        commits = await precompute_daily_commits(self.root)
+        note = await format_work_note(self.root, commits)
+        await asyncio.to_thread(_write_note, note_path(self.root), note)
+        self.commit_count = len(commits)
+        self.refreshed_at = time.time()
+        self.refresh_seconds = time.perf_counter() - started
+        self.error = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.error = str(e) or type(e).__name__
+            self.ready.set()
+
+            # Sleep until HEAD moves, or until midnight starts a new day
+            if not await self._next_change(_seconds_until_midnight()):
+                continue
+
+            # Debounce: wait for a quiet moment so a rebase or a fetch touching
+            # many refs causes one refresh, but do not starve under constant
+            # activity. Operations such as a rebase are waited out, but also
+            # for no longer than that, as one may be left paused for hours.
+            first_change = loop.time()
+            while True:
+                changed = await self._next_change(WATCH_DEBOUNCE_SECONDS)
+                if loop.time() - first_change >= WATCH_MAX_DELAY_SECONDS:
+                    break
+                if not changed and not self._busy():
+                    break
+
+    def describe(self) -> dict:
+        return {
+            "repository": Path(self.root).name,
+            "path": self.root,
+            "mode": self.mode,
+            "commits_today": self.commit_count,
+            "refreshed_at": (
+                time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.refreshed_at))
+                if self.refreshed_at else None
+            ),
+            "refresh_seconds": round(self.refresh_seconds, 3) if self.refresh_seconds is not None else None,
+            "note_path": str(note_path(self.root)),
+            "error": self.error,
+        }
+
+
+# Watchers running in this process, by repository root
+_watchers: dict[str, RepoWatcher] = {}
+
+
+def _load_watched() -> list[str]:
+    try:
+        return json.loads(WATCHED_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return []
+
+
+def _save_watched(roots: list[str]) -> None:
+    WATCHED_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = WATCHED_FILE.with_suffix(".tmp")
+    tmp.write_text(json.dumps(sorted(set(roots)), indent=2), encoding="utf-8")
+    os.replace(tmp, WATCHED_FILE)
+
+
+async def watch(repo_path: str) -> Optional[RepoWatcher]:
+    """Start watching a repository (idempotent); None if it is not one."""
+    root = await get_git_root(repo_path)
+    if root is None:
+        return None
+    watcher = _watchers.get(root)
+    if watcher is None:
+        watcher = _watchers[root] = RepoWatcher(root, await get_git_dir(root))
+        watcher.start()
+    return watcher
+
+
+async def resume_watchers() -> int:
+    """Start watchers for the repositories registered in earlier sessions."""
+    roots = await asyncio.to_thread(_load_watched)
+    started = 0
+    for root in roots:
+        if root not in _watchers and await watch(root) is not None:
+            started += 1
+    return started
+
+
+def register_watch_tools(mcp: FastMCP):
+    """Register repository watcher tools with the MCP server."""
+
+    @mcp.tool()
+    async def watch_repository(ctx: Context, repo_path: Optional[str] = None) -> dict:
+        """
+        Keep today's work note of a repository precomputed. New commits are
+        parsed as they land, so `generate_work_note` (with default filters,
+        no author and today's range) returns without re-reading history.
+        The repository stays watched across server restarts.
+
+        Args:
+            repo_path: Path to the git repository (defaults to current directory)
+
+        Returns:
+            Watcher state, including how changes are detected and the note file path
+        """
+        if not repo_path:
+            repo_path = "."
+
+        watcher = await watch(repo_path)
+        if watcher is None:
+            return {"error": "Not a git repository"}
+
+        roots = await asyncio.to_thread(_load_watched)
+        if watcher.root not in roots:
+            await asyncio.to_thread(_save_watched, roots + [watcher.root])
+        await ctx.info(f"👀 Watching {watcher.root} ({watcher.mode}), computing today's note...")
+        try:
+            await asyncio.wait_for(asyncio.shield(watcher.ready.wait()), 30)
+        except asyncio.TimeoutError:
+            # Still running; it finishes in the background
+            pass
+        return watcher.describe()
+
+    @mcp.tool()
+    async def unwatch_repository(repo_path: Optional[str] = None) -> dict:
+        """
+        Stop keeping a repository's work note precomputed.
+
+        Args:
+            repo_path: Path to the git repository (defaults to current directory)
+
+        Returns:
+            Whether the repository was being watched
+        """
+        if not repo_path:
+            repo_path = "."
+
+        root = await get_git_root(repo_path) or os.path.abspath(repo_path)
+        watcher = _watchers.pop(root, None)
+        if watcher is not None:
+            watcher.stop()
+
+        roots = await asyncio.to_thread(_load_watched)
+        was_registered = root in roots
+        if was_registered:
+            await asyncio.to_thread(_save_watched, [r for r in roots if r != root])
+        return {"path": root, "was_watched": watcher is not None or was_registered}
+
+    @mcp.tool()
+    async def list_watched_repositories() -> dict:
+        """
+        List watched repositories with their commit count and last refresh.
+
+        Returns:
+            Dictionary with the state of each watcher
+        """
+        return {"repositories": [w.describe() for w in _watchers.values()]}
@@ -0,0 +1,258 @@
+"""
+tools/workspace.py
+Multi-repository work notes: discover repos under root directories and
+collect today's commits from all of them concurrently
+"""
+
+import asyncio
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from mcp.server.fastmcp import FastMCP, Context
+
+from git_work_tracker.tools.commit_range import CommitRange
+from git_work_tracker.tools.git_tracker import (
+    format_commit_section,
+    get_commits_with_changes,
+    get_current_branch,
+    get_repo_status,
+    peak_memory_mb,
+)
+
+# Directories that are never worth descending into while looking for repos
+_SKIP_DIRS = {
+    "node_modules", ".venv", "venv", "__pycache__", ".tox", ".cache",
+    "dist", "build", "target", ".idea", ".vscode",
+}
+
+
+def _discover_repositories_sync(roots: list[str], max_depth: int) -> list[str]:
+    found = []
+    seen = set()
+
+    def walk(path: Path, depth: int):
+        try:
+            real = path.resolve()
+        except OSError:
+            return
+        if real in seen:
+            return
+        seen.add(real)
+
+        # `.git` is a directory for normal clones and a file for worktrees/submodules
+        if (path / ".git").exists():
+            found.append(str(real))
+            return
+        if depth >= max_depth:
+            return
+
+        try:
+            entries = sorted(os.scandir(path), key=lambda e: e.name)
+        except OSError:
+            return
+        for entry in entries:
+            if entry.name.startswith(".") or entry.name in _SKIP_DIRS:
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                walk(Path(entry.path), depth + 1)
+
+    for root in roots:
+        walk(Path(root).expanduser(), 0)
+    return found
+
+
+async def discover_repositories(roots: list[str], max_depth: int = 3) -> list[str]:
+    """Find git repositories under the given roots (nested repos are not searched)."""
+    return await asyncio.to_thread(_discover_repositories_sync, roots, max_depth)
+
+
+def _commit_time(commit: dict) -> datetime:
+    return datetime.strptime(commit["date"], "%Y-%m-%d %H:%M:%S %z")
+
+
+async def collect_repository(
+    repo_path: str,
+    author: Optional[str],
+    include_diffs: bool,
+    skip_new_file_diffs: bool,
+    timeout: float,
+    commit_range: Optional[CommitRange] = None
+) -> dict:
+    """
+    Collect the commits of a range (today by default), branch and status
+    of one repository.
+
+    Never raises: failures and timeouts are reported in the result so that
+    one slow or broken repository cannot hold back the others.
+    """
+    started = time.perf_counter()
+    result = {
+        "path": repo_path,
+        "name": Path(repo_path).name,
+        "commits": [],
+        "branch": "unknown",
+        "status": "",
+        "error": None,
+    }
+    try:
+        commits, branch, status = await asyncio.wait_for(
+            asyncio.gather(
+                get_commits_with_changes(
+                    repo_path, author, include_diffs, skip_new_file_diffs,
+                    commit_range=commit_range
+                ),
+                get_current_branch(repo_path),
+                get_repo_status(repo_path),
+            ),
+            timeout=timeout,
+        )
+        # Oldest first so the workspace note reads as a timeline; git lists
+        # newest first, so reversing keeps same-second commits in order.
+        result.update(
+            commits=sorted(reversed(commits), key=_commit_time),
+            branch=branch,
+            status=status,
+        )
+    except asyncio.TimeoutError:
+        result["error"] = f"timed out after {timeout:g}s"
+    except Exception as e:
+        result["error"] = str(e)
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+def format_workspace_note(
+    roots: list[str],
+    repos: list[dict],
+    include_diffs: bool = True,
+    include_stats: bool = True,
+    skip_new_file_diffs: bool = True,
+    commit_range: Optional[CommitRange] = None
+) -> str:
+    """Format collected repositories into one note, grouped by repo in commit order."""
+    commit_range = commit_range or CommitRange.today()
+    active = [r for r in repos if r["commits"]]
+    active.sort(key=lambda r: _commit_time(r["commits"][0]))
+    total_commits = sum(len(r["commits"]) for r in active)
+
+    parts = [f"""
+# Workspace Work Note - {commit_range.describe()}
+
+**Roots:** {', '.join(f'`{root}`' for root in roots)}
+**Repositories with commits:** {len(active)} of {len(repos)}
+**Total Commits{' Today' if commit_range.is_today else ''}:** {total_commits}
+
+---
+
+"""]
+    add = parts.append
+
+    if not active:
+        add("No commits made today.\n\n" if commit_range.is_today else "No commits in this range.\n\n")
+
+    for repo in active:
+        first = _commit_time(repo["commits"][0]).strftime("%H:%M")
+        last = _commit_time(repo["commits"][-1]).strftime("%H:%M")
+        add(f"## 📁 {repo['name']} (`{repo['branch']}`)\n\n")
+        add(f"**Path:** `{repo['path']}`\n")
+        add(f"**Commits:** {len(repo['commits'])} ({first} – {last})\n\n")
+
+        for idx, commit in enumerate(repo["commits"], 1):
+            format_commit_section(
+                idx, commit, include_diffs, include_stats, skip_new_file_diffs,
+                heading="###", parts=parts
+            )
+
+        if repo["status"].strip():
+            add("### 🚧 Uncommitted Changes\n\n```\n")
+            add(repo["status"])
+            add("```\n\n")
+
+    add("## ⏱️ Collection Timing\n\n")
+    add("| Repository | Commits | Time | Result |\n")
+    add("|---|---|---|---|\n")
+    for repo in sorted(repos, key=lambda r: -r["seconds"]):
+        outcome = f"⚠️ {repo['error']}" if repo["error"] else "ok"
+        add(f"| `{repo['name']}` | {len(repo['commits'])} | {repo['seconds']:.2f}s | {outcome} |\n")
+    add("\n")
+
+    return "".join(parts)
+
+
+def register_workspace_tools(mcp: FastMCP):
+    """Register multi-repository tools with the MCP server."""
+
+    @mcp.tool()
+    async def generate_workspace_work_note(
+        ctx: Context,
+        roots: list[str],
+        include_diffs: bool = True,
+        include_stats: bool = True,
+        skip_new_file_diffs: bool = True,
+        author: Optional[str] = None,
+        max_depth: int = 3,
+        repo_timeout: float = 60.0,
+        since: Optional[str] = None,
+        until: Optional[str] = None
+    ) -> str:
+        """
+        Generate one work note for today's commits (or a date range) across
+        every git repository found under the given root directories.
+
+        Args:
+            roots: Directories to search for git repositories
+            include_diffs: Include git diffs for modified files
+            include_stats: Include file change statistics
+            skip_new_file_diffs: Skip full content of new files (recommended, default: True)
+            author: Filter commits by author (defaults to all authors)
+            max_depth: How many directory levels below each root to search
+            repo_timeout: Seconds after which a single repository is given up on
+            since: Start date, e.g. "2025-11-01" or "2 weeks ago" (defaults to today)
+            until: End date, inclusive for plain dates like "2025-11-07"
+
+        Returns:
+            A markdown note grouped by repository, with per-repository timing
+        """
+        commit_range = CommitRange.from_args(since, until)
+        await ctx.info(f"🔍 Searching for repositories under {len(roots)} root(s)...")
+        repo_paths = await discover_repositories(roots, max_depth)
+        if not repo_paths:
+            return f"❌ Error: no git repositories found under {', '.join(roots)}"
+
+        await ctx.info(f"📁 Found {len(repo_paths)} repositories, collecting commits...")
+
+        # Repositories are collected concurrently; the number of git processes
+        # is bounded globally by run_git_command's process budget.
+        tasks = [
+            asyncio.create_task(
+                collect_repository(
+                    path, author, include_diffs, skip_new_file_diffs, repo_timeout, commit_range
+                )
+            )
+            for path in repo_paths
+        ]
+        repos = []
+        for done, task in enumerate(asyncio.as_completed(tasks), 1):
+            repo = await task
+            repos.append(repo)
+            await ctx.report_progress(done, len(tasks))
+            await ctx.info(
+                f"📦 {repo['name']}: {len(repo['commits'])} commits "
+                f"(peak memory {peak_memory_mb():.0f} MiB)"
+            )
+            if repo["error"]:
+                await ctx.warning(f"⚠️ {repo['name']}: {repo['error']}")
+
+        await ctx.info("📄 Formatting workspace note...")
+        note = format_workspace_note(
+            roots, repos, include_diffs, include_stats, skip_new_file_diffs, commit_range
+        )
+
+        await ctx.info(
+            f"✨ Workspace note generated successfully! "
+            f"({len(note) / 1024:.0f} KiB, peak memory {peak_memory_mb():.0f} MiB)"
+        )
+        return note
@@ -1,22 +1,36 @@
-from core.config import settings
+import asyncio
+from typing import Optional
+
+from app.core.config import settings
 from litellm import ModelResponse, acompletion
 from loguru import logger
 
+DEFAULT_INSTRUCTIONS = "You are a helpful assistant that summarizes texts. While summarizing, ensure to retain all key points and present them concisely."
+
+# Shared by every summarizer instance, so concurrent requests queue here
+# instead of overloading the model
+_llm_slots = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+
 
 class LocalLMSummarizer:
-    async def summarize(self, text: str) -> str:
-        response: ModelResponse = await acompletion(
-            model=settings.LLM_PROVIDER_SETTINGS.model,
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a helpful assistant that summarizes texts. While summarizing, ensure to retain all key points and present them concisely.",
-                },
-                {"role": "user", "content": text},
-            ],
-            api_key=settings.LLM_PROVIDER_SETTINGS.api_key,
-            api_base=settings.LLM_PROVIDER_SETTINGS.api_base,
-        )
+    @property
+    def model(self) -> str:
+        return settings.LLM_MODEL_NAME
+
+    async def summarize(self, text: str, instructions: Optional[str] = None) -> str:
+        async with _llm_slots:
+            response: ModelResponse = await acompletion(
+                model=settings.LLM_PROVIDER_SETTINGS.model,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": instructions or DEFAULT_INSTRUCTIONS,
+                    },
+                    {"role": "user", "content": text},
+                ],
+                api_key=settings.LLM_PROVIDER_SETTINGS.api_key,
+                api_base=settings.LLM_PROVIDER_SETTINGS.api_base,
+            )
 
         if response.choices is None or len(response.choices) == 0:
             raise ValueError("No response from the model.")
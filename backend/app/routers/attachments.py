@@ -0,0 +1,50 @@
+# backend/routers/attachments.py
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import FileResponse
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_db_connection
+from app.services import attachment_service
+
+router = APIRouter(
+    prefix="/attachments",
+    tags=["Attachments"],
+)
+
+# A blob never changes under its hash, so clients and proxies may keep it for good
+_CACHE_HEADERS = {
+    "Cache-Control": "public, max-age=31536000, immutable",
+    # Uploaded content types are not trusted: no sniffing, no scripts
+    "X-Content-Type-Options": "nosniff",
+    "Content-Security-Policy": "sandbox",
+}
+
+
+@router.get("/{sha256}")
+async def download_attachment(
+    sha256: str, request: Request, conn: AsyncSession = Depends(get_db_connection)
+):
+    """
+    Download an attachment by its SHA-256. Supports `Range` requests and
+    answers `If-None-Match` with 304, since the content can never change.
+    """
+    blob = None
+    if attachment_service.is_valid_sha256(sha256):
+        blob = await attachment_service.get_blob(conn, sha256)
+    if blob is None:
+        raise HTTPException(status_code=404, detail="Attachment not found")
+
+    etag = f'"{sha256}"'
+    headers = {**_CACHE_HEADERS, "ETag": etag}
+    if_none_match = request.headers.get("if-none-match", "")
+    if if_none_match.strip() == "*" or etag in (t.strip() for t in if_none_match.split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    path = attachment_service.blob_path(conn, sha256)
+    if not path.is_file():
+        logger.error(f"Attachment {sha256} is recorded but missing from {path}")
+        raise HTTPException(status_code=404, detail="Attachment not found")
+    # Sent with the server's pathsend extension where it has one, else in chunks
+    return FileResponse(path, media_type=blob["content_type"], headers=headers)
@@ -0,0 +1,30 @@
+from dataclasses import asdict
+
+from fastapi import APIRouter, Depends, HTTPException
+from app.locallm.local_summarizer import LocalLMSummarizer
+from app.schemas.llm import DigestRequest, DigestResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_db_connection
+from app.services import digest_service
+
+router = APIRouter(prefix="/api/v1/llm/digest", tags=["LLM"])
+
+
+@router.post("/", response_model=DigestResponse)
+async def digest_notes(
+    request: DigestRequest,
+    summarizer=Depends(LocalLMSummarizer),
+    conn: AsyncSession = Depends(get_db_connection),
+):
+    """
+    Summarize several notes, given by id or by the days they were updated,
+    into one digest. Notes are read from the database; only notes changed
+    since their last digest are summarized again.
+    """
+    digest, report = await digest_service.build_digest(
+        conn, summarizer, request.note_ids, request.since, request.until
+    )
+    if digest is None:
+        raise HTTPException(status_code=404, detail="No notes match")
+    return DigestResponse(digest=digest, **asdict(report))
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends
-from locallm.local_summarizer import LocalLMSummarizer
-from schemas.llm import SummarizerRequest, SummarizerResponse
+from app.locallm.local_summarizer import LocalLMSummarizer
+from app.schemas.llm import SummarizerRequest, SummarizerResponse
 
 router = APIRouter(prefix="/api/v1/llm/summarize", tags=["LLM"])
 
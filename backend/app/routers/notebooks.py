@@ -0,0 +1,67 @@
+# backend/routers/notebooks.py
+
+import heapq
+from itertools import islice
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Query, status
+
+from app.core.database import database_path, notebooks
+from app.schemas import schemas
+from app.services import note_service as crud
+
+router = APIRouter(
+    prefix="/notebooks",
+    tags=["Notebooks"],
+)
+
+# Notes of any one notebook are passed as `?notebook=<name>` to the /notes routes.
+
+
+def _info(name: str) -> dict:
+    path = database_path(name)
+    return {
+        "name": name,
+        "open": notebooks.is_open(name),
+        "size_bytes": path.stat().st_size if path is not None and path.exists() else None,
+    }
+
+
+@router.get("", response_model=List[schemas.NotebookInfo])
+async def read_notebooks():
+    """List notebooks, the default one first."""
+    return [_info(name) for name in notebooks.names()]
+
+
+@router.post("", response_model=schemas.NotebookInfo, status_code=status.HTTP_201_CREATED)
+async def create_notebook(notebook: schemas.NotebookCreate):
+    """Create a notebook, stored in a database file of its own."""
+    try:
+        await notebooks.create(notebook.name)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return _info(notebook.name)
+
+
+@router.get("/notes", response_model=List[schemas.NotebookNote])
+async def read_notes_across_notebooks(
+    q: Optional[str] = Query(None, max_length=200),
+    limit: int = Query(50, ge=1, le=500),
+):
+    """
+    The most recently updated notes of all notebooks, optionally only those
+    containing every word of `q`. Notebooks are queried concurrently.
+    """
+    per_notebook = await notebooks.fan_out(
+        lambda conn: crud.get_recent_notes(conn, limit, q)
+    )
+    # Each list is already newest first, so merging keeps the global order
+    merged = heapq.merge(
+        *(
+            [{"notebook": name, **note} for note in notes]
+            for name, notes in per_notebook.items()
+        ),
+        key=lambda note: note["updated_at"],
+        reverse=True,
+    )
+    return list(islice(merged, limit))
@@ -1,13 +1,30 @@
 # backend/routers/notes.py
 
-from typing import List
+import hashlib
+from typing import List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from loguru import logger
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.datastructures import UploadFile as StarletteUploadFile
+from starlette.types import Message, Receive
+
+from app.core.config import settings
 
-from app.core.database import get_db_connection  # direct import for DI
+from app.core.database import get_db_connection, notebook_of  # direct import for DI
 from app.schemas import schemas
 from app.services import note_service as crud
+from app.services import attachment_service, graph_service, revision_service, similarity_service
+from app.services.note_patch import PatchError
+from app.services.title_index import title_index
 
 router = APIRouter(
     prefix="/notes",
@@ -20,37 +37,356 @@ router = APIRouter(
 # This returns an AsyncSession when awaited by FastAPI in async route handlers.
 
 
+def _etag(conn: AsyncSession, kind: str, stamp: Tuple) -> str:
+    # Ids repeat across notebooks, so the notebook is part of the tag
+    key = ":".join(str(part) for part in (notebook_of(conn), kind, *stamp))
+    return f'"{hashlib.sha256(key.encode()).hexdigest()[:32]}"'
+
+
+def _matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match", "")
+    tags = (t.strip().removeprefix("W/") for t in if_none_match.split(","))
+    return if_none_match.strip() == "*" or etag in tags
+
+
+def _validated(response: Response, etag: str) -> None:
+    # Clients may keep the response but must check it is current before reuse
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": "no-cache"},
+    )
+
+
+async def _listing(
+    request: Request, response: Response, conn: AsyncSession, is_deleted: bool
+):
+    kind = "deleted" if is_deleted else "active"
+    # Read before the notes, so the tag never stands for newer notes than sent
+    etag = _etag(conn, kind, await crud.get_listing_stamp(conn))
+    if _matches(request, etag):
+        return _not_modified(etag)
+    notes = await (crud.get_deleted_notes(conn) if is_deleted else crud.get_all_notes(conn))
+    _validated(response, etag)
+    return notes
+
+
 @router.get("", response_model=List[schemas.Note])
-async def read_notes(conn: AsyncSession = Depends(get_db_connection)):
-    """Retrieve all active notes."""
-    return await crud.get_all_notes(conn)
+async def read_notes(
+    request: Request, response: Response, conn: AsyncSession = Depends(get_db_connection)
+):
+    """Retrieve all active notes, or 304 for a current `If-None-Match`."""
+    return await _listing(request, response, conn, is_deleted=False)
 
 
 @router.get("/deleted", response_model=List[schemas.Note])
-async def read_deleted_notes(conn: AsyncSession = Depends(get_db_connection)):
-    """Retrieve all soft-deleted notes (recycle bin)."""
-    return await crud.get_deleted_notes(conn)
+async def read_deleted_notes(
+    request: Request, response: Response, conn: AsyncSession = Depends(get_db_connection)
+):
+    """Retrieve all soft-deleted notes (recycle bin), or 304 for a current `If-None-Match`."""
+    return await _listing(request, response, conn, is_deleted=True)
+
+
+@router.get("/titles/suggest", response_model=List[schemas.TitleSuggestion])
+async def suggest_titles(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(10, ge=1, le=50),
+):
+    """Fuzzy-match active note titles for the quick-switcher."""
+    return title_index.suggest(q, limit=limit)
+
+
+@router.get("/titles/stats", response_model=schemas.TitleIndexStats)
+async def read_title_index_stats():
+    """Report the size and memory use of the title index."""
+    return title_index.stats()
+
+
+@router.get("/tags", response_model=List[schemas.TagCount])
+async def read_tags(conn: AsyncSession = Depends(get_db_connection)):
+    """List tags used by active notes with their note counts."""
+    return await graph_service.get_tag_counts(conn)
+
+
+# `path` so that nested tags such as `team/backend` can be looked up
+@router.get("/tags/{tag:path}", response_model=List[schemas.NoteSummary])
+async def read_notes_by_tag(tag: str, conn: AsyncSession = Depends(get_db_connection)):
+    """Retrieve active notes carrying a tag."""
+    return await graph_service.get_notes_by_tag(conn, tag)
+
+
+@router.get("/duplicates", response_model=List[schemas.DuplicateGroup])
+async def read_duplicate_report(
+    threshold: Optional[float] = Query(None, ge=0.0, le=1.0),
+    conn: AsyncSession = Depends(get_db_connection),
+):
+    """Group active notes that are near-duplicates of each other."""
+    return await similarity_service.duplicate_report(conn, threshold=threshold)
 
 
 @router.post("", response_model=schemas.Note, status_code=status.HTTP_201_CREATED)
 async def create_new_note(
-    note: schemas.NoteCreate, conn: AsyncSession = Depends(get_db_connection)
+    note: schemas.NoteCreate,
+    response: Response,
+    warn_duplicates: bool = False,
+    conn: AsyncSession = Depends(get_db_connection),
+):
+    """
+    Create a new note.
+
+    With `warn_duplicates=true`, ids of existing near-duplicates are returned
+    in the `X-Near-Duplicates` response header.
+    """
+    created = await crud.create_note(conn=conn, note=note)
+    _validated(response, _etag(conn, "note", crud.note_stamp(created)))
+    if warn_duplicates:
+        similar = await similarity_service.find_similar(conn, created["id"])
+        if similar:
+            ids = ",".join(str(s["id"]) for s in similar)
+            logger.warning(f"Note {created['id']} is a near-duplicate of notes {ids}")
+            response.headers["X-Near-Duplicates"] = ids
+    return created
+
+
+@router.get("/{note_id}/backlinks", response_model=List[schemas.NoteSummary])
+async def read_backlinks(note_id: int, conn: AsyncSession = Depends(get_db_connection)):
+    """Retrieve active notes that link to this note with `[[Title]]`."""
+    db_note = await crud.get_note_by_id(conn, note_id)
+    if db_note is None:
+        raise HTTPException(status_code=404, detail="Note not found")
+    return await graph_service.get_backlinks(conn, db_note["title"])
+
+
+@router.get("/{note_id}/similar", response_model=List[schemas.SimilarNote])
+async def read_similar_notes(
+    note_id: int,
+    threshold: Optional[float] = Query(None, ge=0.0, le=1.0),
+    limit: int = Query(10, ge=1, le=100),
+    conn: AsyncSession = Depends(get_db_connection),
+):
+    """Retrieve active notes that are near-duplicates of the given note."""
+    db_note = await crud.get_note_by_id(conn, note_id)
+    if db_note is None:
+        raise HTTPException(status_code=404, detail="Note not found")
+    return await similarity_service.find_similar(
+        conn, note_id, threshold=threshold, limit=limit
+    )
+
+
+@router.get("/{note_id}/attachments", response_model=List[schemas.Attachment])
+async def read_attachments(note_id: int, conn: AsyncSession = Depends(get_db_connection)):
+    """List the files attached to a note."""
+    db_note = await crud.get_note_by_id(conn, note_id)
+    if db_note is None:
+        raise HTTPException(status_code=404, detail="Note not found")
+    return await attachment_service.list_attachments(conn, note_id)
+
+
+# Room for the multipart boundary and part headers around the file
+_MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+_UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                }
+            }
+        },
+    }
+}
+
+
+def _limited_receive(receive: Receive, max_bytes: int) -> Receive:
+    """Pass the request body through, failing as soon as more than `max_bytes` arrived."""
+    received = 0
+
+    async def limited() -> Message:
+        nonlocal received
+        message = await receive()
+        if message["type"] == "http.request":
+            received += len(message.get("body", b""))
+            if received > max_bytes:
+                raise attachment_service.AttachmentTooLarge(
+                    f"attachments are limited to {settings.ATTACHMENT_MAX_BYTES} bytes"
+                )
+        return message
+
+    return limited
+
+
+@router.post(
+    "/{note_id}/attachments",
+    response_model=schemas.Attachment,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra=_UPLOAD_OPENAPI,
+)
+async def upload_attachment(
+    note_id: int,
+    request: Request,
+    conn: AsyncSession = Depends(get_db_connection),
 ):
-    """Create a new note."""
-    return await crud.create_note(conn=conn, note=note)
+    """
+    Attach a file to a note (multipart upload, field `file`). Identical files
+    are stored once; reference the returned `url` from the note's content.
+    """
+    # The body is parsed here rather than by FastAPI, so that an oversized
+    # upload is refused before it is spooled to disk
+    limit = settings.ATTACHMENT_MAX_BYTES + _MULTIPART_OVERHEAD_BYTES
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > limit:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"attachments are limited to {settings.ATTACHMENT_MAX_BYTES} bytes",
+        )
+    db_note = await crud.get_note_by_id(conn, note_id)
+    if db_note is None:
+        raise HTTPException(status_code=404, detail="Note not found")
+
+    form = None
+    try:
+        form = await Request(request.scope, _limited_receive(request.receive, limit)).form(
+            max_files=1
+        )
+        file = form.get("file")
+        if not isinstance(file, StarletteUploadFile):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Expected the file in a multipart field named 'file'",
+            )
+        return await attachment_service.add_attachment(
+            conn, note_id, file.file, file.filename, file.content_type
+        )
+    except attachment_service.AttachmentTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    finally:
+        if form is not None:
+            await form.close()
+
+
+@router.delete("/{note_id}/attachments/{sha256}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_attachment(
+    note_id: int, sha256: str, conn: AsyncSession = Depends(get_db_connection)
+):
+    """Detach a file from a note; it is deleted once no note uses it."""
+    if not await attachment_service.remove_attachment(conn, note_id, sha256):
+        raise HTTPException(status_code=404, detail="Attachment not found")
+    return None
+
+
+@router.get("/{note_id}/revisions", response_model=List[schemas.NoteRevision])
+async def read_revisions(note_id: int, conn: AsyncSession = Depends(get_db_connection)):
+    """List the earlier versions of a note, newest first."""
+    db_note = await crud.get_note_by_id(conn, note_id)
+    if db_note is None:
+        raise HTTPException(status_code=404, detail="Note not found")
+    return await revision_service.list_revisions(conn, note_id)
+
+
+@router.get("/{note_id}/revisions/{version}", response_model=schemas.NoteRevisionContent)
+async def read_revision(
+    note_id: int, version: int, conn: AsyncSession = Depends(get_db_connection)
+):
+    """Retrieve an earlier version of a note with its content."""
+    revision = await revision_service.get_revision(conn, note_id, version)
+    if revision is None:
+        raise HTTPException(status_code=404, detail="Revision not found")
+    return revision
+
+
+@router.post("/{note_id}/revisions/{version}/restore", response_model=schemas.Note)
+async def restore_revision(
+    note_id: int, version: int, conn: AsyncSession = Depends(get_db_connection)
+):
+    """Bring back an earlier version of a note; it is saved as a new version."""
+    db_note = await crud.get_note_by_id(conn, note_id)
+    if db_note is None:
+        raise HTTPException(status_code=404, detail="Note not found")
+    restored = await crud.restore_revision(conn, note_id, version)
+    if restored is None:
+        raise HTTPException(status_code=404, detail="Revision not found")
+    return restored
+
+
+@router.get("/{note_id}", response_model=schemas.Note)
+async def read_note(
+    note_id: int,
+    request: Request,
+    response: Response,
+    conn: AsyncSession = Depends(get_db_connection),
+):
+    """
+    Retrieve a note, active or in the recycle bin. A current `If-None-Match`
+    ETag gets a 304 without the note's content being read.
+    """
+    if request.headers.get("if-none-match"):
+        stamp = await crud.get_note_stamp(conn, note_id)
+        if stamp is None:
+            raise HTTPException(status_code=404, detail="Note not found")
+        etag = _etag(conn, "note", stamp)
+        if _matches(request, etag):
+            return _not_modified(etag)
+    db_note = await crud.get_note_by_id(conn, note_id)
+    if db_note is None:
+        raise HTTPException(status_code=404, detail="Note not found")
+    _validated(response, _etag(conn, "note", crud.note_stamp(db_note)))
+    return db_note
 
 
 @router.put("/{note_id}", response_model=schemas.Note)
 async def update_existing_note(
     note_id: int,
     note: schemas.NoteBase,
+    response: Response,
     conn: AsyncSession = Depends(get_db_connection),
 ):
     """Update a note's title and content."""
     db_note = await crud.get_note_by_id(conn, note_id)
     if db_note is None:
         raise HTTPException(status_code=404, detail="Note not found")
-    return await crud.update_note(conn=conn, note_id=note_id, note=note)
+    updated = await crud.update_note(conn=conn, note_id=note_id, note=note)
+    if updated is not None:
+        _validated(response, _etag(conn, "note", crud.note_stamp(updated)))
+    return updated
+
+
+@router.patch("/{note_id}", response_model=schemas.NotePatchResult)
+async def patch_existing_note(
+    note_id: int,
+    patch: schemas.NotePatch,
+    conn: AsyncSession = Depends(get_db_connection),
+):
+    """
+    Change a note by sending only what changed since `base_version`: offset
+    edits or a unified diff of the content, and/or a new title.
+
+    Returns the new version without the content. Fails with 409 if the note
+    has changed since `base_version` (the response names the current
+    version) and with 422 if the patch does not apply.
+    """
+    try:
+        updated = await crud.patch_note(conn=conn, note_id=note_id, patch=patch)
+    except crud.StaleVersionError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "message": "Note has changed since base_version",
+                "current_version": e.current_version,
+            },
+        )
+    except PatchError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    if updated is None:
+        raise HTTPException(status_code=404, detail="Note not found")
+    return updated
 
 
 @router.delete("/{note_id}", status_code=status.HTTP_204_NO_CONTENT)
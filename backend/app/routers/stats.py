@@ -0,0 +1,25 @@
+# backend/routers/stats.py
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_db_connection
+from app.schemas import schemas
+from app.services import stats_service
+
+router = APIRouter(
+    prefix="/stats",
+    tags=["Stats"],
+)
+
+
+@router.get("", response_model=schemas.JournalStats)
+async def read_stats(
+    days: int = Query(30, ge=1, le=366),
+    conn: AsyncSession = Depends(get_db_connection),
+):
+    """
+    Note, word and character totals for active notes and the recycle bin,
+    and per-day activity over the last `days` days (days without any are left out).
+    """
+    return await stats_service.get_stats(conn, days)
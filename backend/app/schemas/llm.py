@@ -1,4 +1,7 @@
-from pydantic import BaseModel, Field
+from datetime import date
+from typing import List, Optional
+
+from pydantic import BaseModel, Field, model_validator
 
 
 class SummarizerRequest(BaseModel):
@@ -7,3 +10,29 @@ class SummarizerRequest(BaseModel):
 
 class SummarizerResponse(BaseModel):
     summary: str = Field(..., description="The summarized text.")
+
+
+class DigestRequest(BaseModel):
+    note_ids: Optional[List[int]] = Field(
+        None, max_length=1000, description="Notes to digest."
+    )
+    since: Optional[date] = Field(
+        None, description="Digest notes updated on or after this day (UTC)."
+    )
+    until: Optional[date] = Field(
+        None, description="With `since`, digest notes updated up to this day (UTC), inclusive."
+    )
+
+    @model_validator(mode="after")
+    def check_selection(self):
+        if (self.note_ids is None) == (self.since is None):
+            raise ValueError("Give either note_ids or a date range starting at since.")
+        return self
+
+
+class DigestResponse(BaseModel):
+    digest: str = Field(..., description="The combined summary of the notes.")
+    notes: int = Field(..., description="Notes included in the digest.")
+    summarized: int = Field(..., description="Notes summarized on their own for this digest.")
+    cached: int = Field(..., description="Notes whose cached summary was reused.")
+    prompts: int = Field(..., description="LLM requests made.")
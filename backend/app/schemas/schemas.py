@@ -1,7 +1,7 @@
 # backend/schemas.py
 
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 
 class NoteBase(BaseModel):
     title: str
@@ -15,6 +15,107 @@ class Note(NoteBase):
     created_at: str
     updated_at: str
     is_deleted: int
+    version: int
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+class TextEdit(BaseModel):
+    """Replace `length` characters at `offset` (code points of the base content) with `insert`."""
+    offset: int = Field(..., ge=0)
+    length: int = Field(0, ge=0)
+    insert: str = ""
+
+class NotePatch(BaseModel):
+    """Changes to a note made against `base_version`: edits or a unified diff, and/or a new title."""
+    base_version: int
+    title: Optional[str] = None
+    edits: Optional[List[TextEdit]] = None
+    diff: Optional[str] = None
+
+class NotePatchResult(BaseModel):
+    id: int
+    title: str
+    version: int
+    updated_at: str
+    content_length: int
+
+class Attachment(BaseModel):
+    sha256: str
+    filename: str
+    size: int
+    content_type: str
+    url: str
+
+class NotebookCreate(BaseModel):
+    name: str
+
+class NotebookInfo(BaseModel):
+    name: str
+    open: bool
+    size_bytes: Optional[int] = None
+
+class NotebookNote(BaseModel):
+    notebook: str
+    id: int
+    title: str
+    updated_at: str
+
+class StatsTotals(BaseModel):
+    notes: int
+    words: int
+    chars: int
+
+class DailyStats(BaseModel):
+    day: str
+    created: int
+    updated: int
+    words_written: int
+
+class JournalStats(BaseModel):
+    active: StatsTotals
+    recycle_bin: StatsTotals
+    days: List[DailyStats]
+
+class NoteRevision(BaseModel):
+    version: int
+    title: str
+    size: int
+    saved_at: str
+
+class NoteRevisionContent(BaseModel):
+    version: int
+    title: str
+    content: str
+    saved_at: str
+
+class SimilarNote(BaseModel):
+    id: int
+    title: str
+    similarity: float
+
+class DuplicateGroup(BaseModel):
+    notes: List[SimilarNote]
+
+
+class NoteSummary(BaseModel):
+    id: int
+    title: str
+    updated_at: str
+
+class TagCount(BaseModel):
+    tag: str
+    count: int
+
+class TitleSuggestion(BaseModel):
+    id: int
+    title: str
+    score: float
+
+class TitleIndexStats(BaseModel):
+    entries: int
+    trigrams: int
+    evicted: int
+    max_entries: int
+    max_title_chars: int
+    approx_bytes: int
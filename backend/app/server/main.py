@@ -1,32 +1,97 @@
 # backend/main.py
 
+import asyncio
+import time
 from contextlib import asynccontextmanager
 
-from core.database import create_tables
+from app.core.compression import CompressionMiddleware
+from app.core.config import settings
+from app.core.database import AsyncLocalSession, create_tables
+from app.core.database import notebooks as notebook_registry
+from app.core.workers import worker_role
+from app.locallm.utils import ollama
+from app.routers import attachments, digest, llm, notebooks, notes, stats
+from app.services import (
+    attachment_service,
+    graph_service,
+    revision_service,
+    similarity_service,
+    stats_service,
+    title_index,
+)
+from app.services.change_feed import change_feed
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from locallm.utils import ollama
 from loguru import logger
-from routers import llm, notes
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("Starting up...")
-    await create_tables()
+    # With several workers only the leader prepares the database and runs
+    # scheduled work; the others wait here until it is done
+    leader = await worker_role.start()
+    if leader:
+        await create_tables()
+        async with AsyncLocalSession() as session:
+            indexed = await similarity_service.backfill(session)
+            if indexed:
+                logger.info(f"Indexed {indexed} notes for near-duplicate detection.")
+            indexed = await graph_service.backfill(session)
+            if indexed:
+                logger.info(f"Indexed tags and links for {indexed} notes.")
+            indexed = await stats_service.backfill(session)
+            if indexed:
+                logger.info(f"Computed statistics for {indexed} notes.")
+            removed = await attachment_service.collect_garbage(session, sweep=True)
+            if removed:
+                logger.info(f"Removed {removed} unused attachment files.")
+        worker_role.ready()
+    else:
+        logger.info("Another worker prepared the database.")
+
+    async with AsyncLocalSession() as session:
+        # Changes made while the index loads are replayed, not lost
+        await change_feed.mark(session)
+        started = time.perf_counter()
+        stats = await title_index.load(session)
+        logger.info(
+            f"Title index built in {(time.perf_counter() - started) * 1000:.0f} ms: "
+            f"{stats['entries']} titles, ~{stats['approx_bytes'] // 1024} KiB."
+        )
     global ollama_process
 
-    if await ollama.is_ollama_running():
+    if not leader:
+        ollama_process = None
+    elif await ollama.is_ollama_running():
         logger.info("Ollama is already running.")
         ollama_process = None
     else:
         ollama_process = await ollama.start_ollama()
 
+    # Notebooks get the same backfills when they are first opened
+    notebook_registry.open_hooks += [
+        similarity_service.backfill,
+        graph_service.backfill,
+        stats_service.backfill,
+    ]
+    if leader:
+        # Periodic thinning only covers open notebooks
+        notebook_registry.open_hooks.append(revision_service.thin)
+    notebook_registry.start()
+    background = [asyncio.create_task(change_feed.run(prune=leader))]
+    if leader:
+        background.append(asyncio.create_task(revision_service.thin_periodically()))
+
     yield
 
     print("Shutting down...")
+    for task in background:
+        task.cancel()
+    await notebook_registry.stop()
     if ollama_process:
         await ollama.stop_ollama(ollama_process)
+    worker_role.stop()
 
 
 app = FastAPI(
@@ -36,6 +101,12 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MIN_BYTES,
+    gzip_level=settings.GZIP_LEVEL,
+    brotli_quality=settings.BROTLI_QUALITY,
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -45,7 +116,11 @@ app.add_middleware(
 )
 
 app.include_router(notes.router)
+app.include_router(attachments.router)
+app.include_router(notebooks.router)
+app.include_router(stats.router)
 app.include_router(llm.router)
+app.include_router(digest.router)
 
 
 @app.get("/", tags=["Root"])
@@ -0,0 +1,40 @@
+# backend/server/rebuild_stats.py
+
+"""
+Recompute the journal statistics from scratch, e.g. after editing the
+database by hand. Run from backend/:
+
+    python -m app.server.rebuild_stats              # the default notebook
+    python -m app.server.rebuild_stats --notebook work
+    python -m app.server.rebuild_stats --all
+"""
+
+import argparse
+import asyncio
+import sys
+
+from app.core.database import DEFAULT_NOTEBOOK, create_tables, notebooks
+from app.services import stats_service
+
+
+async def rebuild(names: list[str]) -> None:
+    await create_tables()
+    for name in names:
+        async with notebooks.session(name) as session:
+            count = await stats_service.rebuild(session)
+        print(f"{name}: statistics recomputed for {count} notes")
+    await notebooks.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    which = parser.add_mutually_exclusive_group()
+    which.add_argument("--notebook", default=DEFAULT_NOTEBOOK)
+    which.add_argument("--all", action="store_true", help="Every notebook")
+    args = parser.parse_args()
+
+    names = notebooks.names() if args.all else [args.notebook]
+    missing = [name for name in names if not notebooks.exists(name)]
+    if missing:
+        sys.exit(f"Notebook '{missing[0]}' not found")
+    asyncio.run(rebuild(names))
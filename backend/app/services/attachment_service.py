@@ -0,0 +1,257 @@
+# backend/services/attachment_service.py
+
+"""
+Content-addressed store for files attached to notes.
+
+Each distinct file is kept once, at `ATTACHMENTS_DIR/<sha[:2]>/<sha256>`
+(under `NOTEBOOKS_DIR/<notebook>.attachments/` for notebooks other than the
+default one), and recorded in `attachments`; `note_attachments` links it to
+the notes that use it under the name it was uploaded with. Blobs no note
+links to any more are removed by `collect_garbage`.
+"""
+
+import asyncio
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, List, Optional
+
+from app.core.config import settings
+from app.core.database import DEFAULT_NOTEBOOK, notebook_of, notebooks
+from app.core.workers import file_lock
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+_CHUNK_BYTES = 1024 * 1024
+_SHA256_RE = re.compile(r"[0-9a-f]{64}")
+
+# Placing, linking and collecting take turns, so a blob is never removed
+# between being moved into the store and being linked to its note
+_store_lock = asyncio.Lock()
+
+# The startup sweep leaves younger files alone: they may belong to an upload
+# still running in another worker process
+_SWEEP_MIN_AGE_SECONDS = 3600
+
+
+class AttachmentTooLarge(ValueError):
+    """The upload exceeds ATTACHMENT_MAX_BYTES."""
+
+
+def _root(conn: AsyncSession) -> Path:
+    # Each notebook has its own store, as blobs are only counted per database
+    notebook = notebook_of(conn)
+    if notebook == DEFAULT_NOTEBOOK:
+        return Path(settings.ATTACHMENTS_DIR)
+    return notebooks.root / f"{notebook}.attachments"
+
+
+def is_valid_sha256(value: str) -> bool:
+    return _SHA256_RE.fullmatch(value) is not None
+
+
+def _blob_path(root: Path, sha256: str) -> Path:
+    return root / sha256[:2] / sha256
+
+
+def blob_path(conn: AsyncSession, sha256: str) -> Path:
+    return _blob_path(_root(conn), sha256)
+
+
+def _spool_blob(root: Path, source: BinaryIO, max_bytes: int) -> tuple[str, str, int]:
+    """
+    Copy `source` to a temporary file in the store, hashing it on the way;
+    returns (temporary path, sha256, size).
+    """
+    tmp_dir = root / "tmp"
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=tmp_dir)
+    try:
+        digest = hashlib.sha256()
+        size = 0
+        with os.fdopen(fd, "wb") as out:
+            while chunk := source.read(_CHUNK_BYTES):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise AttachmentTooLarge(f"attachments are limited to {max_bytes} bytes")
+                digest.update(chunk)
+                out.write(chunk)
+        return tmp_name, digest.hexdigest(), size
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
+def _place_blob(root: Path, tmp_name: str, sha256: str) -> None:
+    target = _blob_path(root, sha256)
+    if target.exists():
+        os.unlink(tmp_name)  # same content is already stored
+    else:
+        target.parent.mkdir(exist_ok=True)
+        os.replace(tmp_name, target)
+
+
+@asynccontextmanager
+async def _exclusive(root: Path) -> AsyncIterator[None]:
+    # The asyncio lock orders this process's tasks, the file lock the worker processes
+    async with _store_lock:
+        root.mkdir(parents=True, exist_ok=True)
+        async with file_lock(root / ".lock"):
+            yield
+
+
+def _unlink_blobs(root: Path, hashes: List[str]) -> None:
+    for sha256 in hashes:
+        try:
+            _blob_path(root, sha256).unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _stray_files(root: Path, known: set[str]) -> List[Path]:
+    """Files in the store that no `attachments` row accounts for."""
+    if not root.is_dir():
+        return []
+    stray = list((root / "tmp").glob("*"))
+    for prefix in root.iterdir():
+        if prefix.is_dir() and prefix.name != "tmp":
+            stray += [path for path in prefix.iterdir() if path.name not in known]
+    cutoff = time.time() - _SWEEP_MIN_AGE_SECONDS
+    return [path for path in stray if path.stat().st_mtime < cutoff]
+
+
+def _clean_filename(filename: Optional[str]) -> str:
+    name = os.path.basename((filename or "").replace("\\", "/")).strip()
+    return name[:255] or "attachment"
+
+
+def _to_attachment(conn: AsyncSession, row) -> dict:
+    attachment = dict(row)
+    attachment["url"] = f"/attachments/{attachment['sha256']}"
+    notebook = notebook_of(conn)
+    if notebook != DEFAULT_NOTEBOOK:
+        attachment["url"] += f"?notebook={notebook}"
+    return attachment
+
+
+async def add_attachment(
+    conn: AsyncSession,
+    note_id: int,
+    source: BinaryIO,
+    filename: Optional[str],
+    content_type: Optional[str],
+) -> dict:
+    """
+    Store the file read from `source` (unless the same content is already
+    stored) and link it to the note. Raises AttachmentTooLarge.
+    """
+    filename = _clean_filename(filename)
+    if not content_type or content_type == "application/octet-stream":
+        content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    root = _root(conn)
+    # Copying and hashing run unlocked; only moving the file into place and
+    # linking it must not interleave with collect_garbage
+    tmp_name, sha256, size = await asyncio.to_thread(
+        _spool_blob, root, source, settings.ATTACHMENT_MAX_BYTES
+    )
+    try:
+        async with _exclusive(root):
+            await asyncio.to_thread(_place_blob, root, tmp_name, sha256)
+            await conn.execute(
+                text(
+                    "INSERT INTO attachments (sha256, size, content_type) "
+                    "VALUES (:sha256, :size, :content_type) ON CONFLICT(sha256) DO NOTHING"
+                ),
+                {"sha256": sha256, "size": size, "content_type": content_type},
+            )
+            await conn.execute(
+                text(
+                    "INSERT INTO note_attachments (note_id, sha256, filename) "
+                    "VALUES (:note_id, :sha256, :filename) "
+                    "ON CONFLICT(note_id, sha256) DO UPDATE SET filename = excluded.filename"
+                ),
+                {"note_id": note_id, "sha256": sha256, "filename": filename},
+            )
+            await conn.commit()
+    finally:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+    result = await conn.execute(
+        text("SELECT sha256, size, content_type FROM attachments WHERE sha256 = :sha256"),
+        {"sha256": sha256},
+    )
+    return _to_attachment(conn, {**result.mappings().one(), "filename": filename})
+
+
+async def list_attachments(conn: AsyncSession, note_id: int) -> List[dict]:
+    result = await conn.execute(
+        text(
+            "SELECT a.sha256, na.filename, a.size, a.content_type "
+            "FROM note_attachments na JOIN attachments a ON a.sha256 = na.sha256 "
+            "WHERE na.note_id = :note_id ORDER BY na.filename"
+        ),
+        {"note_id": note_id},
+    )
+    return [_to_attachment(conn, row) for row in result.mappings().all()]
+
+
+async def get_blob(conn: AsyncSession, sha256: str) -> Optional[dict]:
+    """The stored blob's size and content type, or None if it is not stored."""
+    result = await conn.execute(
+        text("SELECT sha256, size, content_type FROM attachments WHERE sha256 = :sha256"),
+        {"sha256": sha256},
+    )
+    row = result.mappings().first()
+    return dict(row) if row is not None else None
+
+
+async def remove_note_attachments(conn: AsyncSession, note_id: int) -> None:
+    """Unlink every attachment from a note. Does not commit or delete blobs."""
+    await conn.execute(
+        text("DELETE FROM note_attachments WHERE note_id = :note_id"), {"note_id": note_id}
+    )
+
+
+async def remove_attachment(conn: AsyncSession, note_id: int, sha256: str) -> bool:
+    """Unlink one attachment from a note, deleting the blob if nothing else uses it."""
+    result = await conn.execute(
+        text("DELETE FROM note_attachments WHERE note_id = :note_id AND sha256 = :sha256"),
+        {"note_id": note_id, "sha256": sha256},
+    )
+    await conn.commit()
+    if result.rowcount:
+        await collect_garbage(conn)
+    return bool(result.rowcount)
+
+
+async def collect_garbage(conn: AsyncSession, sweep: bool = False) -> int:
+    """
+    Delete blobs no note links to and return how many were removed. With
+    `sweep`, also delete files left in the store by interrupted uploads at
+    least an hour ago; only safe while this process runs no upload, i.e. at
+    startup.
+    """
+    async with _exclusive(_root(conn)):
+        result = await conn.execute(
+            text(
+                "DELETE FROM attachments WHERE sha256 NOT IN "
+                "(SELECT sha256 FROM note_attachments) RETURNING sha256"
+            )
+        )
+        orphans = list(result.scalars().all())
+        await conn.commit()
+        await asyncio.to_thread(_unlink_blobs, _root(conn), orphans)
+        if not sweep:
+            return len(orphans)
+
+        result = await conn.execute(text("SELECT sha256 FROM attachments"))
+        known = set(result.scalars().all())
+        stray = await asyncio.to_thread(_stray_files, _root(conn), known)
+        for path in stray:
+            path.unlink(missing_ok=True)
+        return len(orphans) + len(stray)
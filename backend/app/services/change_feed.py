@@ -0,0 +1,92 @@
+# backend/services/change_feed.py
+
+"""
+Keeps the in-memory title index of each worker process in step with notes
+written by the other workers.
+
+Triggers append the id of every note that is created, deleted, or has its
+title or recycle-bin state changed to `note_changes`. Each worker
+watches `PRAGMA data_version` on a connection of its own, which changes
+whenever any other connection commits, and then replays the log entries
+after the last one it has seen. Its own writes come back through the log as
+well; replaying them is harmless. A worker that fell so far behind that
+entries it had not seen were pruned rebuilds the index instead.
+"""
+
+import asyncio
+from typing import Union
+
+from app.core.config import settings
+from app.core.database import engine
+from app.services import title_index
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+# Log entries kept for workers that are catching up
+_KEEP_CHANGES = 10_000
+
+
+class ChangeFeed:
+    def __init__(self):
+        self.last_seq = 0
+
+    async def mark(self, conn: Union[AsyncSession, AsyncConnection]) -> None:
+        """Start after the latest entry; call before loading the title index."""
+        result = await conn.execute(text("SELECT COALESCE(MAX(seq), 0) FROM note_changes"))
+        self.last_seq = result.scalar_one()
+
+    async def apply(self, conn: Union[AsyncSession, AsyncConnection]) -> int:
+        """Replay entries added since the last call into the title index; returns how many."""
+        result = await conn.execute(text("SELECT MIN(seq) FROM note_changes"))
+        first = result.scalar_one()
+        if first is not None and first > self.last_seq + 1:
+            await self.mark(conn)
+            await title_index.load(conn)
+            logger.info("Rebuilt the title index after missing pruned note changes.")
+            return 0
+
+        result = await conn.execute(
+            text(
+                "SELECT c.seq, c.note_id, n.title, n.is_deleted FROM note_changes c "
+                "LEFT JOIN notes n ON n.id = c.note_id WHERE c.seq > :last ORDER BY c.seq"
+            ),
+            {"last": self.last_seq},
+        )
+        rows = result.mappings().all()
+        for row in rows:
+            if row["title"] is None or row["is_deleted"]:
+                title_index.title_index.remove(row["note_id"])
+            else:
+                title_index.title_index.add(row["note_id"], row["title"])
+        if rows:
+            self.last_seq = rows[-1]["seq"]
+        return len(rows)
+
+    async def run(self, prune: bool = False) -> None:
+        """
+        Poll for changes every CHANGE_POLL_SECONDS. With `prune`, which only
+        one worker should pass, also drop old log entries.
+        """
+        async with engine.connect() as conn:
+            seen = None
+            while True:
+                try:
+                    result = await conn.exec_driver_sql("PRAGMA data_version")
+                    version = result.scalar_one()
+                    if version != seen:
+                        seen = version
+                        await self.apply(conn)
+                        if prune:
+                            await conn.execute(
+                                text("DELETE FROM note_changes WHERE seq <= :upto"),
+                                {"upto": self.last_seq - _KEEP_CHANGES},
+                            )
+                    await conn.commit()
+                except Exception as e:
+                    await conn.rollback()
+                    logger.error(f"Applying note changes from other workers failed: {e!r}")
+                await asyncio.sleep(settings.CHANGE_POLL_SECONDS)
+
+
+change_feed = ChangeFeed()
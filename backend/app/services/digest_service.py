@@ -0,0 +1,220 @@
+# backend/services/digest_service.py
+
+"""
+Digests of many notes, summarized straight from the database.
+
+Selected notes are streamed in the order they were updated. Long notes are
+first summarized on their own, and those summaries are cached in
+`note_summaries` against the note's version, so re-running a digest only
+summarizes the notes that changed since. The notes (short ones verbatim) are
+then packed into prompts of at most DIGEST_PROMPT_TOKENS, the prompts are
+summarized concurrently, and the results are combined the same way until a
+single digest remains.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import List, Optional, Protocol, Sequence, Tuple, Union
+
+from app.core.config import settings
+from sqlalchemy import bindparam, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Part of the cache key of note summaries: change it with _NOTE_INSTRUCTIONS
+# so summaries written for the old prompt are not reused
+_NOTE_PROMPT_VERSION = "1"
+
+_NOTE_INSTRUCTIONS = (
+    "Summarize this journal note. Keep every decision, result, open question "
+    "and date, and leave out filler."
+)
+_DIGEST_INSTRUCTIONS = (
+    "These are journal notes, each starting with its title and date. Write a "
+    "digest of them: group related work, keep key points, decisions and open "
+    "items, and say which notes they come from."
+)
+_COMBINE_INSTRUCTIONS = (
+    "These are digests of consecutive parts of a journal. Combine them into one "
+    "digest, merging related points and keeping key decisions and open items."
+)
+
+_SEPARATOR = "\n\n---\n\n"
+
+
+class Summarizer(Protocol):
+    model: str
+
+    async def summarize(self, text: str, instructions: Optional[str] = None) -> str: ...
+
+
+@dataclass
+class DigestReport:
+    notes: int = 0
+    summarized: int = 0  # notes summarized for this digest
+    cached: int = 0  # notes whose cached summary was reused
+    prompts: int = 0  # LLM calls made
+
+
+def estimate_tokens(text: str) -> int:
+    # Roughly four characters per token for English prose
+    return len(text) // 4 + 1
+
+
+def _split(content: str, max_tokens: int) -> List[str]:
+    """Split text into pieces of at most `max_tokens`, at paragraph breaks where possible."""
+    max_chars = max_tokens * 4
+    pieces: List[str] = []
+    current = ""
+    for paragraph in content.split("\n\n"):
+        while len(paragraph) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(paragraph[:max_chars])
+            paragraph = paragraph[max_chars:]
+        if current and len(current) + len(paragraph) + 2 > max_chars:
+            pieces.append(current)
+            current = paragraph
+        else:
+            current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _pack(texts: Sequence[str], max_tokens: int) -> List[str]:
+    """Join consecutive texts into prompts of at most `max_tokens` (longer texts go alone)."""
+    prompts: List[str] = []
+    current: List[str] = []
+    used = 0
+    for entry in texts:
+        tokens = estimate_tokens(entry)
+        if current and used + tokens > max_tokens:
+            prompts.append(_SEPARATOR.join(current))
+            current, used = [], 0
+        current.append(entry)
+        used += tokens
+    if current:
+        prompts.append(_SEPARATOR.join(current))
+    return prompts
+
+
+async def _summarize_note(summarizer: Summarizer, content: str, report: DigestReport) -> str:
+    chunks = _split(content, settings.DIGEST_PROMPT_TOKENS)
+    report.prompts += len(chunks)
+    summaries = await asyncio.gather(
+        *(summarizer.summarize(chunk, _NOTE_INSTRUCTIONS) for chunk in chunks)
+    )
+    return "\n".join(summaries)
+
+
+def _selection(
+    note_ids: Optional[Sequence[int]], since: Optional[date], until: Optional[date]
+) -> Tuple[str, dict]:
+    if note_ids is not None:
+        return "n.id IN :ids", {"ids": list(note_ids)}
+    where, params = [], {}
+    if since is not None:
+        where.append("n.updated_at >= :since")
+        params["since"] = since.isoformat()
+    if until is not None:
+        # `until` is inclusive; timestamps sort as text
+        where.append("n.updated_at < :before")
+        params["before"] = (until + timedelta(days=1)).isoformat()
+    return " AND ".join(where) or "1 = 1", params
+
+
+async def forget_note(conn: AsyncSession, note_id: int) -> None:
+    """Drop a note's cached summary. Does not commit."""
+    await conn.execute(
+        text("DELETE FROM note_summaries WHERE note_id = :id"), {"id": note_id}
+    )
+
+
+async def build_digest(
+    conn: AsyncSession,
+    summarizer: Summarizer,
+    note_ids: Optional[Sequence[int]] = None,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+) -> Tuple[Optional[str], DigestReport]:
+    """
+    Digest of the given active notes, or of those updated from `since` to
+    `until` (inclusive dates). Returns None as the digest if no note matches.
+    """
+    generator = f"{summarizer.model}:{_NOTE_PROMPT_VERSION}"
+    where, params = _selection(note_ids, since, until)
+    statement = text(
+        "SELECT n.id, n.title, n.updated_at, n.version, s.summary AS cached, "
+        "CASE WHEN s.summary IS NULL THEN n.content END AS content "
+        "FROM notes n LEFT JOIN note_summaries s ON s.note_id = n.id "
+        "AND s.version = n.version AND s.generator = :generator "
+        f"WHERE n.is_deleted = 0 AND {where} ORDER BY n.updated_at, n.id"
+    )
+    if note_ids is not None:
+        statement = statement.bindparams(bindparam("ids", expanding=True))
+
+    report = DigestReport()
+    # In note order: each note's heading with its text, or the task summarizing it
+    entries: List[Tuple[str, Union[str, asyncio.Task]]] = []
+    fresh: List[Tuple[int, int, asyncio.Task]] = []
+    result = await conn.stream(statement, {**params, "generator": generator})
+    try:
+        async for row in result.mappings():
+            report.notes += 1
+            heading = f"# {row['title']} ({row['updated_at'][:10]})"
+            if row["cached"] is not None:
+                report.cached += 1
+                entries.append((heading, row["cached"]))
+                continue
+            content = row["content"] or ""
+            if estimate_tokens(content) <= settings.DIGEST_NOTE_SUMMARY_MIN_TOKENS:
+                entries.append((heading, content))
+                continue
+            # Summarizing starts while the remaining notes are still being read
+            task = asyncio.create_task(_summarize_note(summarizer, content, report))
+            fresh.append((row["id"], row["version"], task))
+            entries.append((heading, task))
+        await asyncio.gather(*(task for _, _, task in fresh))
+    except BaseException:
+        for _, _, task in fresh:
+            task.cancel()
+        raise
+    if not report.notes:
+        return None, report
+
+    report.summarized = len(fresh)
+    if fresh:
+        await conn.execute(
+            text(
+                "INSERT INTO note_summaries (note_id, version, generator, summary) "
+                "VALUES (:note_id, :version, :generator, :summary) "
+                "ON CONFLICT(note_id) DO UPDATE SET version = excluded.version, "
+                "generator = excluded.generator, summary = excluded.summary"
+            ),
+            [
+                {"note_id": note_id, "version": version, "generator": generator,
+                 "summary": task.result()}
+                for note_id, version, task in fresh
+            ],
+        )
+        await conn.commit()
+
+    texts = [
+        f"{heading}\n{body if isinstance(body, str) else body.result()}"
+        for heading, body in entries
+    ]
+    instructions = _DIGEST_INSTRUCTIONS
+    while True:
+        prompts = _pack(texts, settings.DIGEST_PROMPT_TOKENS)
+        report.prompts += len(prompts)
+        summaries = await asyncio.gather(
+            *(summarizer.summarize(prompt, instructions) for prompt in prompts)
+        )
+        if len(summaries) == 1:
+            return summaries[0], report
+        if instructions is _COMBINE_INSTRUCTIONS and len(summaries) >= len(texts):
+            # The summaries no longer shrink enough to fit fewer prompts
+            return "\n\n".join(summaries), report
+        texts, instructions = summaries, _COMBINE_INSTRUCTIONS
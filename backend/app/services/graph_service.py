@@ -0,0 +1,135 @@
+# backend/services/graph_service.py
+
+"""
+Tag (`#deploy`) and wiki-link (`[[Other note]]`) index for notes.
+
+Tags and links are parsed from note content on every write and stored in
+`note_tags` / `note_links`, so tag listings and backlinks are answered from
+the index tables without reading any note bodies.
+"""
+
+import re
+from typing import List
+
+from app.core.database import get_meta, set_meta
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+INDEX_META_KEY = "graph_index_version"
+INDEX_VERSION = "1"
+
+_FENCED_CODE_RE = re.compile(r"```.*?(?:```|\Z)", re.DOTALL)
+_INLINE_CODE_RE = re.compile(r"`[^`\n]*`")
+_TAG_RE = re.compile(r"(?<![\w#/&])#([A-Za-z][\w\-/]*)")
+_LINK_RE = re.compile(r"\[\[([^\[\]|#\n]+)(?:[|#][^\[\]\n]*)?\]\]")
+
+
+def normalize_tag(tag: str) -> str:
+    return tag.strip().lstrip("#").rstrip("/").lower()
+
+
+def link_key(title: str) -> str:
+    """Key used to match `[[links]]` against note titles."""
+    return " ".join(title.split()).casefold()
+
+
+def parse_tags(content: str) -> set[str]:
+    """Extract normalized tags, ignoring code blocks and inline code."""
+    prose = _INLINE_CODE_RE.sub("", _FENCED_CODE_RE.sub("", content))
+    return {t for t in (normalize_tag(m) for m in _TAG_RE.findall(prose)) if t}
+
+
+def parse_links(content: str) -> set[str]:
+    """Extract link keys of `[[Title]]`, `[[Title|alias]]` and `[[Title#heading]]`."""
+    prose = _INLINE_CODE_RE.sub("", _FENCED_CODE_RE.sub("", content))
+    return {k for k in (link_key(m) for m in _LINK_RE.findall(prose)) if k}
+
+
+async def remove_note(conn: AsyncSession, note_id: int) -> None:
+    """Drop a note's tags and outgoing links. Does not commit."""
+    await conn.execute(text("DELETE FROM note_tags WHERE note_id = :id"), {"id": note_id})
+    await conn.execute(
+        text("DELETE FROM note_links WHERE source_id = :id"), {"id": note_id}
+    )
+
+
+async def index_note(conn: AsyncSession, note_id: int, content: str) -> None:
+    """Replace a note's tags and outgoing links. Does not commit."""
+    await remove_note(conn, note_id)
+
+    tags = parse_tags(content)
+    if tags:
+        await conn.execute(
+            text("INSERT INTO note_tags (tag, note_id) VALUES (:tag, :id)"),
+            [{"tag": tag, "id": note_id} for tag in tags],
+        )
+
+    links = parse_links(content)
+    if links:
+        await conn.execute(
+            text("INSERT INTO note_links (target_key, source_id) VALUES (:key, :id)"),
+            [{"key": key, "id": note_id} for key in links],
+        )
+
+
+async def get_tag_counts(conn: AsyncSession) -> List[dict]:
+    result = await conn.execute(
+        text("""
+            SELECT t.tag AS tag, COUNT(*) AS count
+            FROM note_tags t
+            JOIN notes n ON n.id = t.note_id
+            WHERE n.is_deleted = 0
+            GROUP BY t.tag
+            ORDER BY count DESC, t.tag
+        """)
+    )
+    return [dict(r) for r in result.mappings().all()]
+
+
+async def get_notes_by_tag(conn: AsyncSession, tag: str) -> List[dict]:
+    result = await conn.execute(
+        text("""
+            SELECT n.id, n.title, n.updated_at
+            FROM note_tags t
+            JOIN notes n ON n.id = t.note_id
+            WHERE t.tag = :tag AND n.is_deleted = 0
+            ORDER BY n.updated_at DESC
+        """),
+        {"tag": normalize_tag(tag)},
+    )
+    return [dict(r) for r in result.mappings().all()]
+
+
+async def get_backlinks(conn: AsyncSession, title: str) -> List[dict]:
+    """Active notes containing a `[[link]]` to the given title."""
+    result = await conn.execute(
+        text("""
+            SELECT n.id, n.title, n.updated_at
+            FROM note_links l
+            JOIN notes n ON n.id = l.source_id
+            WHERE l.target_key = :key AND n.is_deleted = 0
+            ORDER BY n.updated_at DESC
+        """),
+        {"key": link_key(title)},
+    )
+    return [dict(r) for r in result.mappings().all()]
+
+
+async def rebuild(conn: AsyncSession) -> int:
+    """Re-parse every note into the tag and link tables."""
+    await conn.execute(text("DELETE FROM note_tags"))
+    await conn.execute(text("DELETE FROM note_links"))
+    result = await conn.execute(text("SELECT id, content FROM notes"))
+    rows = result.mappings().all()
+    for row in rows:
+        await index_note(conn, row["id"], row["content"] or "")
+    await set_meta(conn, INDEX_META_KEY, INDEX_VERSION)
+    await conn.commit()
+    return len(rows)
+
+
+async def backfill(conn: AsyncSession) -> int:
+    """Build the index once for databases created before it existed."""
+    if await get_meta(conn, INDEX_META_KEY) == INDEX_VERSION:
+        return 0
+    return await rebuild(conn)
@@ -0,0 +1,119 @@
+# backend/services/note_patch.py
+
+"""
+Applying text deltas to note content.
+
+A patch is made against one version of a note and is either a list of
+edits (replace `length` characters at `offset` with `insert`) or a unified
+diff. Offsets count Unicode code points of the base content, and every edit
+refers to the base, so edits are independent of the order they are listed in.
+"""
+
+import re
+from typing import List, Optional, Sequence
+
+from app.schemas import schemas
+
+_HUNK_HEADER_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+class PatchError(ValueError):
+    """The patch does not apply to the base content."""
+
+
+def apply_edits(content: str, edits: Sequence[schemas.TextEdit]) -> str:
+    """Apply non-overlapping edits, all positioned against `content`."""
+    ordered = sorted(edits, key=lambda e: (e.offset, e.length))
+    pieces: List[str] = []
+    position = 0
+    for edit in ordered:
+        end = edit.offset + edit.length
+        if edit.offset < position:
+            raise PatchError(f"edit at offset {edit.offset} overlaps the previous edit")
+        if end > len(content):
+            raise PatchError(
+                f"edit at offset {edit.offset} ends at {end}, past the end of the content ({len(content)})"
+            )
+        pieces.append(content[position:edit.offset])
+        pieces.append(edit.insert)
+        position = end
+    pieces.append(content[position:])
+    return "".join(pieces)
+
+
+def apply_unified_diff(content: str, diff: str) -> str:
+    """
+    Apply a unified diff (as from `diff -u` or `git diff`, headers optional).
+    Context and removed lines must match the base exactly.
+    """
+    old_lines = content.splitlines(keepends=True)
+    diff_lines = diff.splitlines(keepends=True)
+    out: List[str] = []
+    position = 0  # next unconsumed line of old_lines
+    i = 0
+    hunks = 0
+    while i < len(diff_lines):
+        header = _HUNK_HEADER_RE.match(diff_lines[i])
+        i += 1
+        if header is None:
+            continue  # ---/+++ file headers and anything outside hunks
+        hunks += 1
+        start = int(header.group(1))
+        old_count = int(header.group(2) or 1)
+        # A zero-length range names the line after which to insert
+        start = start if old_count == 0 else start - 1
+        if start < position or start > len(old_lines):
+            raise PatchError(f"hunk {hunks} starts at line {start + 1}, out of order or past the end")
+        out.extend(old_lines[position:start])
+        position = start
+
+        while i < len(diff_lines) and not diff_lines[i].startswith("@@"):
+            line = diff_lines[i]
+            i += 1
+            tag, text_value = line[:1], line[1:]
+            if tag == "\\":
+                # "\ No newline at end of file" applies to the previous line
+                _strip_newline(out if diff_lines[i - 2].startswith("+") else None)
+                continue
+            if tag in (" ", "-"):
+                expected = old_lines[position] if position < len(old_lines) else None
+                if expected is None or expected.rstrip("\r\n") != text_value.rstrip("\r\n"):
+                    raise PatchError(
+                        f"hunk {hunks} does not match the base content at line {position + 1}"
+                    )
+                if tag == " ":
+                    out.append(expected)
+                position += 1
+            elif tag == "+":
+                out.append(text_value if text_value.endswith("\n") else text_value + "\n")
+            elif line.strip() == "":
+                # Some tools drop the leading space of empty context lines
+                expected = old_lines[position] if position < len(old_lines) else None
+                if expected is None or expected.strip():
+                    raise PatchError(
+                        f"hunk {hunks} does not match the base content at line {position + 1}"
+                    )
+                out.append(expected)
+                position += 1
+            else:
+                raise PatchError(f"unexpected line in hunk {hunks}: {line[:40]!r}")
+    if not hunks:
+        raise PatchError("the diff contains no hunks")
+    out.extend(old_lines[position:])
+    return "".join(out)
+
+
+def _strip_newline(lines: Optional[List[str]]) -> None:
+    if lines and lines[-1].endswith("\n"):
+        lines[-1] = lines[-1][:-1]
+
+
+def apply_patch(content: str, patch: schemas.NotePatch) -> str:
+    """The patched content; unchanged if the patch only sets a title."""
+    if patch.edits is not None and patch.diff is not None:
+        raise PatchError("send either edits or a diff, not both")
+    if patch.edits is not None:
+        return apply_edits(content, patch.edits)
+    if patch.diff is not None:
+        return apply_unified_diff(content, patch.diff)
+    return content
@@ -1,28 +1,72 @@
 # backend/crud.py
 
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
+from app.core.database import (
+    DEFAULT_NOTEBOOK,
+    NOTES_GENERATION_KEY,
+    get_meta,
+    notebook_of,
+)
 from app.schemas import schemas
+from app.services import (
+    attachment_service,
+    digest_service,
+    graph_service,
+    note_patch,
+    revision_service,
+    similarity_service,
+    stats_service,
+)
+from app.services.title_index import title_index
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
+class StaleVersionError(Exception):
+    """A change was made against an older version of the note."""
+
+    def __init__(self, current_version: int):
+        super().__init__(f"note is at version {current_version}")
+        self.current_version = current_version
+
+
+def _tracks_titles(conn: AsyncSession) -> bool:
+    # The quick-switcher's title index covers the default notebook only
+    return notebook_of(conn) == DEFAULT_NOTEBOOK
+
+
 def _to_dict_from_mapping(mapping) -> Optional[dict]:
     if mapping is None:
         return None
     return dict(mapping)
 
 
+async def _index_note(conn: AsyncSession, note_id: int, title: str, content: str):
+    """Refresh every derived index for a note inside the current transaction."""
+    await similarity_service.index_note(conn, note_id, title, content)
+    await graph_service.index_note(conn, note_id, content)
+
+
+async def _unindex_note(conn: AsyncSession, note_id: int):
+    await similarity_service.remove_note(conn, note_id)
+    await graph_service.remove_note(conn, note_id)
+
+
 async def create_note(conn: AsyncSession, note: schemas.NoteCreate) -> dict:
     """Insert a new note and return it as a dict."""
     await conn.execute(
         text("INSERT INTO notes (title, content) VALUES (:title, :content)"),
         {"title": note.title, "content": note.content or ""},
     )
-    await conn.commit()
 
     last = await conn.execute(text("SELECT last_insert_rowid() AS id"))
     last_id = last.scalar_one()
+    await _index_note(conn, last_id, note.title, note.content or "")
+    await stats_service.record_write(conn, last_id, note.content or "", created=True)
+    await conn.commit()
+    if _tracks_titles(conn):
+        title_index.add(last_id, note.title)
     return await get_note_by_id(conn, last_id)
 
 
@@ -42,6 +86,54 @@ async def get_deleted_notes(conn: AsyncSession) -> List[dict]:
     return [dict(r) for r in rows]
 
 
+async def get_listing_stamp(conn: AsyncSession) -> Tuple:
+    """
+    Number of writes to notes so far. Triggers raise it on every insert,
+    update and delete, so it changes with any listing, deleted or not, and
+    makes its ETag.
+    """
+    return (int(await get_meta(conn, NOTES_GENERATION_KEY)),)
+
+
+def note_stamp(note: dict) -> Tuple:
+    return (note["id"], note["version"], note["updated_at"], note["is_deleted"])
+
+
+async def get_note_stamp(conn: AsyncSession, note_id: int) -> Optional[Tuple]:
+    """`note_stamp` of a note without loading its content, or None if it does not exist."""
+    result = await conn.execute(
+        text("SELECT id, version, updated_at, is_deleted FROM notes WHERE id = :id"),
+        {"id": note_id},
+    )
+    row = result.mappings().first()
+    return note_stamp(row) if row is not None else None
+
+
+async def get_recent_notes(
+    conn: AsyncSession, limit: int, query: Optional[str] = None
+) -> List[dict]:
+    """
+    Summaries of the most recently updated active notes, optionally only
+    those containing every word of `query` in their title or content.
+    """
+    where = ["is_deleted = 0"]
+    params: dict = {"limit": limit}
+    for i, term in enumerate((query or "").split()):
+        escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        params[f"term{i}"] = f"%{escaped}%"
+        where.append(
+            f"(title LIKE :term{i} ESCAPE '\\' OR content LIKE :term{i} ESCAPE '\\')"
+        )
+    result = await conn.execute(
+        text(
+            f"SELECT id, title, updated_at FROM notes WHERE {' AND '.join(where)} "
+            "ORDER BY updated_at DESC, id DESC LIMIT :limit"
+        ),
+        params,
+    )
+    return [dict(r) for r in result.mappings().all()]
+
+
 async def get_note_by_id(conn: AsyncSession, note_id: int) -> Optional[dict]:
     result = await conn.execute(
         text("SELECT * FROM notes WHERE id = :id"), {"id": note_id}
@@ -55,28 +147,126 @@ async def get_note_by_id(conn: AsyncSession, note_id: int) -> Optional[dict]:
 async def update_note(
     conn: AsyncSession, note_id: int, note: schemas.NoteBase
 ) -> Optional[dict]:
+    await revision_service.record_current(conn, note_id, note.title, note.content or "")
     await conn.execute(
-        text("UPDATE notes SET title = :title, content = :content WHERE id = :id"),
+        text(
+            "UPDATE notes SET title = :title, content = :content, version = version + 1 "
+            "WHERE id = :id"
+        ),
         {"title": note.title, "content": note.content or "", "id": note_id},
     )
+    await _index_note(conn, note_id, note.title, note.content or "")
+    await stats_service.record_write(conn, note_id, note.content or "")
+    await conn.commit()
+    updated = await get_note_by_id(conn, note_id)
+    if updated is not None and not updated["is_deleted"] and _tracks_titles(conn):
+        title_index.add(note_id, updated["title"])
+    return updated
+
+
+async def patch_note(
+    conn: AsyncSession, note_id: int, patch: schemas.NotePatch
+) -> Optional[dict]:
+    """
+    Apply a patch made against `patch.base_version` and return the note's new
+    title, version and update time, or None if the note does not exist.
+
+    Raises StaleVersionError if the note has changed since that version and
+    note_patch.PatchError if the patch does not apply.
+    """
+    result = await conn.execute(
+        text("SELECT title, content, version, updated_at FROM notes WHERE id = :id"),
+        {"id": note_id},
+    )
+    row = result.mappings().first()
+    if row is None:
+        return None
+    if row["version"] != patch.base_version:
+        raise StaleVersionError(row["version"])
+
+    title = row["title"] if patch.title is None else patch.title
+    content = note_patch.apply_patch(row["content"] or "", patch)
+    if (title, content) != (row["title"], row["content"] or ""):
+        await revision_service.record(
+            conn, note_id, row["version"], row["title"], row["content"] or "", row["updated_at"]
+        )
+
+    # Only replaces the version that was patched, should another writer get in between
+    result = await conn.execute(
+        text(
+            "UPDATE notes SET title = :title, content = :content, version = version + 1 "
+            "WHERE id = :id AND version = :base_version"
+        ),
+        {"title": title, "content": content, "id": note_id, "base_version": patch.base_version},
+    )
+    if result.rowcount != 1:
+        await conn.rollback()
+        current = await conn.execute(
+            text("SELECT version FROM notes WHERE id = :id"), {"id": note_id}
+        )
+        raise StaleVersionError(current.scalar_one())
+    await _index_note(conn, note_id, title, content)
+    await stats_service.record_write(conn, note_id, content)
     await conn.commit()
-    return await get_note_by_id(conn, note_id)
+
+    result = await conn.execute(
+        text("SELECT id, title, version, updated_at, is_deleted FROM notes WHERE id = :id"),
+        {"id": note_id},
+    )
+    updated = dict(result.mappings().one())
+    if not updated.pop("is_deleted") and _tracks_titles(conn):
+        title_index.add(note_id, updated["title"])
+    updated["content_length"] = len(content)
+    return updated
 
 
 async def soft_delete_note(conn: AsyncSession, note_id: int) -> None:
     await conn.execute(
         text("UPDATE notes SET is_deleted = 1 WHERE id = :id"), {"id": note_id}
     )
+    await stats_service.set_deleted(conn, note_id, True)
     await conn.commit()
+    if _tracks_titles(conn):
+        title_index.remove(note_id)
 
 
 async def restore_note(conn: AsyncSession, note_id: int) -> None:
     await conn.execute(
         text("UPDATE notes SET is_deleted = 0 WHERE id = :id"), {"id": note_id}
     )
+    await stats_service.set_deleted(conn, note_id, False)
     await conn.commit()
+    result = await conn.execute(
+        text("SELECT title FROM notes WHERE id = :id"), {"id": note_id}
+    )
+    title = result.scalar_one_or_none()
+    if title is not None and _tracks_titles(conn):
+        title_index.add(note_id, title)
 
 
 async def permanently_delete_note(conn: AsyncSession, note_id: int) -> None:
     await conn.execute(text("DELETE FROM notes WHERE id = :id"), {"id": note_id})
+    await _unindex_note(conn, note_id)
+    await attachment_service.remove_note_attachments(conn, note_id)
+    await stats_service.remove_note(conn, note_id)
+    await digest_service.forget_note(conn, note_id)
+    await revision_service.remove_note(conn, note_id)
     await conn.commit()
+    if _tracks_titles(conn):
+        title_index.remove(note_id)
+    await attachment_service.collect_garbage(conn)
+
+
+async def restore_revision(conn: AsyncSession, note_id: int, version: int) -> Optional[dict]:
+    """
+    Make a stored version the note's content again, as a new version (the
+    current one goes into the history). None if that version is not stored.
+    """
+    revision = await revision_service.get_revision(conn, note_id, version)
+    if revision is None:
+        return None
+    return await update_note(
+        conn,
+        note_id,
+        schemas.NoteBase(title=revision["title"], content=revision["content"]),
+    )
@@ -0,0 +1,247 @@
+# backend/services/revision_service.py
+
+"""
+Revision history of notes.
+
+Before a note is overwritten, its previous version is stored in
+`note_revisions` either as a full snapshot or as a delta against the
+note's latest snapshot. Deltas always refer to a snapshot, never to another
+delta, so any version is rebuilt from at most two rows, and any delta can be
+dropped without touching the others. A new snapshot is taken every
+REVISION_SNAPSHOT_INTERVAL revisions, or sooner once a delta grows to half
+the size of a snapshot. Notes longer than REVISION_DELTA_MAX_CHARS are
+always stored as snapshots.
+
+Old revisions are thinned on a schedule: past REVISION_HOURLY_AFTER_HOURS
+only the last revision of each hour is kept, past REVISION_DAILY_AFTER_DAYS
+the last of each day.
+"""
+
+import asyncio
+import json
+import zlib
+from difflib import SequenceMatcher
+from typing import List, Optional
+
+from app.core.config import settings
+from app.core.database import notebooks
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+SNAPSHOT = "snapshot"
+DELTA = "delta"
+
+
+def encode_delta(base: str, content: str) -> bytes:
+    """Lines of `content` as ranges copied from `base` and inserted text, compressed."""
+    base_lines = base.splitlines(keepends=True)
+    lines = content.splitlines(keepends=True)
+    ops: List[object] = []
+    # autojunk ignores lines as common as blank ones when looking for matches
+    # (they still join the matches around them); without it, notes with many
+    # repeated lines take quadratic time
+    matcher = SequenceMatcher(None, base_lines, lines)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append("".join(lines[j1:j2]))
+    return zlib.compress(json.dumps(ops, separators=(",", ":")).encode())
+
+
+def apply_delta(base: str, delta: bytes) -> str:
+    base_lines = base.splitlines(keepends=True)
+    return "".join(
+        op if isinstance(op, str) else "".join(base_lines[op[0]:op[1]])
+        for op in json.loads(zlib.decompress(delta))
+    )
+
+
+def encode_snapshot(content: str) -> bytes:
+    return zlib.compress(content.encode())
+
+
+def decode_snapshot(data: bytes) -> str:
+    return zlib.decompress(data).decode()
+
+
+def _encode_delta_from(snapshot: bytes, content: str) -> bytes:
+    return encode_delta(decode_snapshot(snapshot), content)
+
+
+async def _latest_snapshot(conn: AsyncSession, note_id: int) -> Optional[dict]:
+    result = await conn.execute(
+        text(
+            "SELECT r.version, r.data, "
+            "(SELECT COUNT(*) FROM note_revisions d "
+            " WHERE d.note_id = r.note_id AND d.base_version = r.version) AS deltas "
+            "FROM note_revisions r WHERE r.note_id = :id AND r.kind = :snapshot "
+            "ORDER BY r.version DESC LIMIT 1"
+        ),
+        {"id": note_id, "snapshot": SNAPSHOT},
+    )
+    row = result.mappings().first()
+    return dict(row) if row is not None else None
+
+
+async def record(
+    conn: AsyncSession, note_id: int, version: int, title: str, content: str, saved_at: str
+) -> None:
+    """Store a version of a note that is about to be overwritten. Does not commit."""
+    snapshot = await _latest_snapshot(conn, note_id)
+    full = encode_snapshot(content)
+    kind, base_version, data = SNAPSHOT, None, full
+    if (
+        snapshot is not None
+        and snapshot["deltas"] < settings.REVISION_SNAPSHOT_INTERVAL - 1
+        and len(content) <= settings.REVISION_DELTA_MAX_CHARS
+    ):
+        # Diffing takes long enough on big notes to stall other requests
+        delta = await asyncio.to_thread(_encode_delta_from, snapshot["data"], content)
+        if len(delta) * 2 < len(full):
+            kind, base_version, data = DELTA, snapshot["version"], delta
+    await conn.execute(
+        text(
+            "INSERT INTO note_revisions "
+            "(note_id, version, kind, base_version, title, size, data, saved_at) "
+            "VALUES (:note_id, :version, :kind, :base_version, :title, :size, :data, :saved_at) "
+            "ON CONFLICT(note_id, version) DO NOTHING"
+        ),
+        {
+            "note_id": note_id,
+            "version": version,
+            "kind": kind,
+            "base_version": base_version,
+            "title": title,
+            "size": len(content),
+            "data": data,
+            "saved_at": saved_at,
+        },
+    )
+
+
+async def record_current(conn: AsyncSession, note_id: int, title: str, content: str) -> None:
+    """
+    Store the note's current version if `title` and `content` are about to
+    replace it with something different. Does not commit.
+    """
+    result = await conn.execute(
+        text("SELECT title, content, version, updated_at FROM notes WHERE id = :id"),
+        {"id": note_id},
+    )
+    row = result.mappings().first()
+    if row is None or (row["title"] == title and (row["content"] or "") == content):
+        return
+    await record(
+        conn, note_id, row["version"], row["title"], row["content"] or "", row["updated_at"]
+    )
+
+
+async def list_revisions(conn: AsyncSession, note_id: int) -> List[dict]:
+    """Stored versions of a note, newest first, without their content."""
+    result = await conn.execute(
+        text(
+            "SELECT version, title, size, saved_at FROM note_revisions "
+            "WHERE note_id = :id ORDER BY version DESC"
+        ),
+        {"id": note_id},
+    )
+    return [dict(r) for r in result.mappings().all()]
+
+
+async def get_revision(conn: AsyncSession, note_id: int, version: int) -> Optional[dict]:
+    """A stored version with its content, rebuilt from at most one snapshot and one delta."""
+    result = await conn.execute(
+        text(
+            "SELECT r.version, r.title, r.saved_at, r.kind, r.data, s.data AS base "
+            "FROM note_revisions r LEFT JOIN note_revisions s "
+            "ON s.note_id = r.note_id AND s.version = r.base_version "
+            "WHERE r.note_id = :id AND r.version = :version"
+        ),
+        {"id": note_id, "version": version},
+    )
+    row = result.mappings().first()
+    if row is None:
+        return None
+    if row["kind"] == SNAPSHOT:
+        content = decode_snapshot(row["data"])
+    else:
+        content = apply_delta(decode_snapshot(row["base"]), row["data"])
+    return {
+        "version": row["version"],
+        "title": row["title"],
+        "saved_at": row["saved_at"],
+        "content": content,
+    }
+
+
+async def remove_note(conn: AsyncSession, note_id: int) -> None:
+    """Drop a note's history. Does not commit."""
+    await conn.execute(
+        text("DELETE FROM note_revisions WHERE note_id = :id"), {"id": note_id}
+    )
+
+
+def _slot(saved_at: str, daily: bool) -> str:
+    return saved_at[:10] if daily else saved_at[:13]
+
+
+async def thin(conn: AsyncSession) -> int:
+    """Drop old revisions beyond one per hour, or per day, and return how many."""
+    result = await conn.execute(
+        text(
+            "SELECT note_id, version, saved_at, "
+            "saved_at < strftime('%Y-%m-%dT%H:%M:%fZ', 'now', :daily_age) AS daily "
+            "FROM note_revisions "
+            "WHERE saved_at < strftime('%Y-%m-%dT%H:%M:%fZ', 'now', :hourly_age) "
+            "ORDER BY note_id, version"
+        ),
+        {
+            "hourly_age": f"-{settings.REVISION_HOURLY_AFTER_HOURS} hours",
+            "daily_age": f"-{settings.REVISION_DAILY_AFTER_DAYS} days",
+        },
+    )
+    rows = result.mappings().all()
+
+    # The last revision of each note in each hour (or day) stays
+    last_in_slot = {
+        (row["note_id"], _slot(row["saved_at"], row["daily"])): row["version"] for row in rows
+    }
+    kept = {(note_id, version) for (note_id, _), version in last_in_slot.items()}
+    drop = {(r["note_id"], r["version"]) for r in rows} - kept
+    if not drop:
+        return 0
+
+    # So do snapshots that a remaining delta is based on
+    result = await conn.execute(
+        text("SELECT note_id, version, base_version FROM note_revisions WHERE kind = :delta"),
+        {"delta": DELTA},
+    )
+    needed = {(r[0], r[2]) for r in result.all() if (r[0], r[1]) not in drop}
+    drop -= needed
+    if not drop:
+        return 0
+    await conn.execute(
+        text("DELETE FROM note_revisions WHERE note_id = :note_id AND version = :version"),
+        [{"note_id": note_id, "version": version} for note_id, version in sorted(drop)],
+    )
+    await conn.commit()
+    return len(drop)
+
+
+async def thin_periodically() -> None:
+    """
+    Thin the revisions of the open notebooks every REVISION_THIN_INTERVAL_SECONDS.
+    Closed ones are left closed, to be thinned when next opened.
+    """
+    while True:
+        await asyncio.sleep(settings.REVISION_THIN_INTERVAL_SECONDS)
+        try:
+            removed = await notebooks.fan_out(thin, notebooks.open_names())
+        except Exception as e:
+            logger.error(f"Thinning note revisions failed: {e!r}")
+            continue
+        for notebook, count in removed.items():
+            if count:
+                logger.info(f"Thinned {count} old revisions in notebook '{notebook}'.")
@@ -0,0 +1,297 @@
+# backend/services/similarity_service.py
+
+"""
+Near-duplicate note detection using MinHash signatures and LSH banding.
+
+Each note's text is reduced to a set of word shingles and summarised by a
+fixed-size MinHash signature. The signature is split into bands; notes that
+share any band bucket become candidates, and only candidates are compared.
+This keeps lookups proportional to the number of likely matches instead of
+the total number of notes.
+"""
+
+import asyncio
+import hashlib
+import random
+import re
+import struct
+import zlib
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.database import get_meta, set_meta
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+INDEX_META_KEY = "similarity_index_version"
+INDEX_VERSION = "1"
+
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+SHINGLE_SIZE = 3
+
+# Notes sharing a bucket are found with high probability once their
+# similarity exceeds roughly (1 / BANDS) ** (1 / ROWS_PER_BAND) == 0.5.
+# Thresholds below that will miss pairs.
+_MERSENNE_PRIME = (1 << 61) - 1
+_SIGNATURE_FORMAT = f"<{NUM_PERMUTATIONS}Q"
+_WORD_RE = re.compile(r"\w+")
+# Ids bound per query, below SQLite's limit on variables (999 before 3.32)
+_IDS_PER_QUERY = 500
+
+_rng = random.Random(0x5EED)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERMUTATIONS)
+]
+
+
+def _shingles(text_value: str) -> set[int]:
+    words = _WORD_RE.findall(text_value.lower())
+    if len(words) < SHINGLE_SIZE:
+        return {zlib.crc32(w.encode()) for w in words}
+    return {
+        zlib.crc32(" ".join(words[i : i + SHINGLE_SIZE]).encode())
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+
+
+def compute_signature(title: str, content: str) -> Optional[List[int]]:
+    """Return the MinHash signature of a note, or None if it has no words."""
+    shingles = _shingles(f"{title}\n{content}")
+    if not shingles:
+        return None
+    return [
+        min((a * s + b) % _MERSENNE_PRIME for s in shingles) for a, b in _PERMUTATIONS
+    ]
+
+
+def estimate_similarity(sig_a: List[int], sig_b: List[int]) -> float:
+    """Estimate the Jaccard similarity of two notes from their signatures."""
+    matches = sum(1 for x, y in zip(sig_a, sig_b) if x == y)
+    return matches / NUM_PERMUTATIONS
+
+
+def _band_buckets(signature: List[int]) -> List[int]:
+    buckets = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS_PER_BAND : (band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(
+            struct.pack(f"<{ROWS_PER_BAND}Q", *rows), digest_size=8
+        ).digest()
+        buckets.append(int.from_bytes(digest, "big", signed=True))
+    return buckets
+
+
+def _pack(signature: List[int]) -> bytes:
+    return struct.pack(_SIGNATURE_FORMAT, *signature)
+
+
+def _unpack(blob: bytes) -> List[int]:
+    return list(struct.unpack(_SIGNATURE_FORMAT, blob))
+
+
+async def remove_note(conn: AsyncSession, note_id: int) -> None:
+    """Drop a note's signature and bucket entries. Does not commit."""
+    await conn.execute(
+        text("DELETE FROM note_lsh_buckets WHERE note_id = :id"), {"id": note_id}
+    )
+    await conn.execute(
+        text("DELETE FROM note_minhash WHERE note_id = :id"), {"id": note_id}
+    )
+
+
+async def index_note(
+    conn: AsyncSession, note_id: int, title: str, content: str
+) -> Optional[List[int]]:
+    """(Re)index a note's signature. Does not commit."""
+    signature = await asyncio.to_thread(compute_signature, title, content)
+    await remove_note(conn, note_id)
+    if signature is None:
+        return None
+
+    await conn.execute(
+        text("INSERT INTO note_minhash (note_id, signature) VALUES (:id, :sig)"),
+        {"id": note_id, "sig": _pack(signature)},
+    )
+    await conn.execute(
+        text(
+            "INSERT OR IGNORE INTO note_lsh_buckets (band, bucket, note_id) "
+            "VALUES (:band, :bucket, :id)"
+        ),
+        [
+            {"band": band, "bucket": bucket, "id": note_id}
+            for band, bucket in enumerate(_band_buckets(signature))
+        ],
+    )
+    return signature
+
+
+async def _select_by_ids(conn: AsyncSession, query: str, ids: List[int]) -> list:
+    """Run `query`, whose `{ids}` is replaced by an IN list, over `ids` in chunks."""
+    rows = []
+    for start in range(0, len(ids), _IDS_PER_QUERY):
+        chunk = ids[start : start + _IDS_PER_QUERY]
+        params = {f"id{i}": note_id for i, note_id in enumerate(chunk)}
+        placeholders = ", ".join(f":{key}" for key in params)
+        result = await conn.execute(text(query.format(ids=placeholders)), params)
+        rows += result.all()
+    return rows
+
+
+async def _load_signatures(
+    conn: AsyncSession, note_ids: List[int]
+) -> Dict[int, List[int]]:
+    rows = await _select_by_ids(
+        conn, "SELECT note_id, signature FROM note_minhash WHERE note_id IN ({ids})", note_ids
+    )
+    return {row.note_id: _unpack(row.signature) for row in rows}
+
+
+async def _candidates(
+    conn: AsyncSession, signature: List[int], exclude_id: Optional[int]
+) -> List[dict]:
+    params: dict = {"exclude": exclude_id if exclude_id is not None else -1}
+    clauses = []
+    for band, bucket in enumerate(_band_buckets(signature)):
+        clauses.append(f"(b.band = :band{band} AND b.bucket = :bucket{band})")
+        params[f"band{band}"] = band
+        params[f"bucket{band}"] = bucket
+
+    result = await conn.execute(
+        text(f"""
+            SELECT DISTINCT n.id, n.title, m.signature
+            FROM note_lsh_buckets b
+            JOIN notes n ON n.id = b.note_id
+            JOIN note_minhash m ON m.note_id = b.note_id
+            WHERE ({" OR ".join(clauses)})
+              AND b.note_id != :exclude
+              AND n.is_deleted = 0
+        """),
+        params,
+    )
+    return [dict(r) for r in result.mappings().all()]
+
+
+async def find_similar_to_signature(
+    conn: AsyncSession,
+    signature: List[int],
+    exclude_id: Optional[int] = None,
+    threshold: Optional[float] = None,
+    limit: int = 10,
+) -> List[dict]:
+    """Return active notes whose estimated similarity meets the threshold."""
+    if threshold is None:
+        threshold = settings.NOTE_SIMILARITY_THRESHOLD
+
+    matches = []
+    for candidate in await _candidates(conn, signature, exclude_id):
+        score = estimate_similarity(signature, _unpack(candidate["signature"]))
+        if score >= threshold:
+            matches.append(
+                {"id": candidate["id"], "title": candidate["title"], "similarity": score}
+            )
+
+    matches.sort(key=lambda m: (-m["similarity"], m["id"]))
+    return matches[:limit]
+
+
+async def find_similar(
+    conn: AsyncSession,
+    note_id: int,
+    threshold: Optional[float] = None,
+    limit: int = 10,
+) -> List[dict]:
+    """Return notes that are near-duplicates of an indexed note."""
+    signature = (await _load_signatures(conn, [note_id])).get(note_id)
+    if signature is None:
+        return []
+    return await find_similar_to_signature(
+        conn, signature, exclude_id=note_id, threshold=threshold, limit=limit
+    )
+
+
+async def duplicate_report(
+    conn: AsyncSession, threshold: Optional[float] = None
+) -> List[dict]:
+    """Group active notes into clusters of near-duplicates."""
+    if threshold is None:
+        threshold = settings.NOTE_SIMILARITY_THRESHOLD
+
+    result = await conn.execute(
+        text("""
+            SELECT DISTINCT b1.note_id AS a, b2.note_id AS b
+            FROM note_lsh_buckets b1
+            JOIN note_lsh_buckets b2
+              ON b2.band = b1.band AND b2.bucket = b1.bucket AND b2.note_id > b1.note_id
+            JOIN notes n1 ON n1.id = b1.note_id AND n1.is_deleted = 0
+            JOIN notes n2 ON n2.id = b2.note_id AND n2.is_deleted = 0
+        """)
+    )
+    pairs = [(row.a, row.b) for row in result]
+    signatures = await _load_signatures(conn, sorted({i for pair in pairs for i in pair}))
+
+    parent: Dict[int, int] = {}
+    best: Dict[int, float] = {}
+
+    def find(x: int) -> int:
+        while parent.setdefault(x, x) != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for a, b in pairs:
+        score = estimate_similarity(signatures[a], signatures[b])
+        if score < threshold:
+            continue
+        parent[find(a)] = find(b)
+        best[a] = max(best.get(a, 0.0), score)
+        best[b] = max(best.get(b, 0.0), score)
+
+    groups: Dict[int, List[int]] = {}
+    for note_id in best:
+        groups.setdefault(find(note_id), []).append(note_id)
+    if not groups:
+        return []
+
+    rows = await _select_by_ids(
+        conn, "SELECT id, title FROM notes WHERE id IN ({ids})", sorted(best)
+    )
+    titles = {row.id: row.title for row in rows}
+
+    report = [
+        {
+            "notes": [
+                {"id": i, "title": titles.get(i, ""), "similarity": best[i]}
+                for i in sorted(members)
+            ]
+        }
+        for members in groups.values()
+    ]
+    report.sort(key=lambda g: -len(g["notes"]))
+    return report
+
+
+async def backfill(conn: AsyncSession) -> int:
+    """
+    Index notes that have no signature yet, once for databases created
+    before the index existed. Returns how many were indexed.
+    """
+    if await get_meta(conn, INDEX_META_KEY) == INDEX_VERSION:
+        return 0
+    result = await conn.execute(
+        text(
+            "SELECT id, title, content FROM notes "
+            "WHERE id NOT IN (SELECT note_id FROM note_minhash)"
+        )
+    )
+    indexed = 0
+    for row in result.mappings().all():
+        if await index_note(conn, row["id"], row["title"], row["content"] or ""):
+            indexed += 1
+    # Notes without words get no signature; the marker keeps them from
+    # being picked up again on every start
+    await set_meta(conn, INDEX_META_KEY, INDEX_VERSION)
+    await conn.commit()
+    return indexed
@@ -0,0 +1,214 @@
+# backend/services/stats_service.py
+
+"""
+Journal statistics kept current by `note_service` writes.
+
+- `note_stats`: word and character counts of each note, and whether it is
+  in the recycle bin
+- `journal_totals`: note, word and character totals for active notes and
+  for the recycle bin
+- `journal_daily_stats`: notes created and updated, and words written, per
+  UTC day
+
+Every write adjusts these by the difference it makes, so reading them never
+touches note bodies and costs the same however large the journal grows.
+"""
+
+from typing import Optional
+
+from app.core.database import get_meta, set_meta
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+INDEX_META_KEY = "stats_index_version"
+INDEX_VERSION = "1"
+
+_TODAY = "strftime('%Y-%m-%d', 'now')"
+
+
+def count_words(content: str) -> int:
+    return len(content.split())
+
+
+async def _bump_totals(
+    conn: AsyncSession, is_deleted: int, notes: int, words: int, chars: int
+) -> None:
+    await conn.execute(
+        text(
+            "INSERT INTO journal_totals (is_deleted, notes, words, chars) "
+            "VALUES (:is_deleted, :notes, :words, :chars) "
+            "ON CONFLICT(is_deleted) DO UPDATE SET notes = notes + excluded.notes, "
+            "words = words + excluded.words, chars = chars + excluded.chars"
+        ),
+        {"is_deleted": is_deleted, "notes": notes, "words": words, "chars": chars},
+    )
+
+
+async def _bump_today(
+    conn: AsyncSession, created: int = 0, updated: int = 0, words_written: int = 0
+) -> None:
+    await conn.execute(
+        text(
+            "INSERT INTO journal_daily_stats (day, created, updated, words_written) "
+            f"VALUES ({_TODAY}, :created, :updated, :words_written) "
+            "ON CONFLICT(day) DO UPDATE SET created = created + excluded.created, "
+            "updated = updated + excluded.updated, "
+            "words_written = words_written + excluded.words_written"
+        ),
+        {"created": created, "updated": updated, "words_written": words_written},
+    )
+
+
+async def _note_stats(conn: AsyncSession, note_id: int) -> Optional[dict]:
+    result = await conn.execute(
+        text("SELECT words, chars, is_deleted FROM note_stats WHERE note_id = :id"),
+        {"id": note_id},
+    )
+    row = result.mappings().first()
+    return dict(row) if row is not None else None
+
+
+async def record_write(
+    conn: AsyncSession, note_id: int, content: str, created: bool = False
+) -> None:
+    """Count a note's content after it was created or updated. Does not commit."""
+    old = await _note_stats(conn, note_id)
+    if old is None:
+        result = await conn.execute(
+            text("SELECT is_deleted FROM notes WHERE id = :id"), {"id": note_id}
+        )
+        is_deleted = result.scalar_one_or_none()
+        if is_deleted is None:
+            return
+        old = {"words": 0, "chars": 0, "is_deleted": is_deleted}
+        new_note = 1
+    else:
+        new_note = 0
+
+    words, chars = count_words(content), len(content)
+    await conn.execute(
+        text(
+            "INSERT INTO note_stats (note_id, words, chars, is_deleted) "
+            "VALUES (:id, :words, :chars, :is_deleted) "
+            "ON CONFLICT(note_id) DO UPDATE SET words = excluded.words, chars = excluded.chars"
+        ),
+        {"id": note_id, "words": words, "chars": chars, "is_deleted": old["is_deleted"]},
+    )
+    await _bump_totals(
+        conn, old["is_deleted"], new_note, words - old["words"], chars - old["chars"]
+    )
+    await _bump_today(
+        conn,
+        created=int(created),
+        updated=int(not created),
+        words_written=max(0, words - old["words"]),
+    )
+
+
+async def set_deleted(conn: AsyncSession, note_id: int, is_deleted: bool) -> None:
+    """Move a note's counts into or out of the recycle bin totals. Does not commit."""
+    old = await _note_stats(conn, note_id)
+    if old is None or old["is_deleted"] == int(is_deleted):
+        return
+    await conn.execute(
+        text("UPDATE note_stats SET is_deleted = :is_deleted WHERE note_id = :id"),
+        {"id": note_id, "is_deleted": int(is_deleted)},
+    )
+    await _bump_totals(conn, old["is_deleted"], -1, -old["words"], -old["chars"])
+    await _bump_totals(conn, int(is_deleted), 1, old["words"], old["chars"])
+
+
+async def remove_note(conn: AsyncSession, note_id: int) -> None:
+    """Drop a note's counts. Does not commit."""
+    old = await _note_stats(conn, note_id)
+    if old is None:
+        return
+    await conn.execute(text("DELETE FROM note_stats WHERE note_id = :id"), {"id": note_id})
+    await _bump_totals(conn, old["is_deleted"], -1, -old["words"], -old["chars"])
+
+
+async def rebuild(conn: AsyncSession) -> int:
+    """
+    Recompute every statistic from the notes. Past days can only be
+    reconstructed from each note's creation and last update, so the daily
+    counts of earlier edits are lost.
+    """
+    await conn.execute(text("DELETE FROM note_stats"))
+    await conn.execute(text("DELETE FROM journal_totals"))
+    await conn.execute(text("DELETE FROM journal_daily_stats"))
+    result = await conn.execute(
+        text("SELECT id, content, is_deleted, created_at, updated_at FROM notes")
+    )
+    rows = result.mappings().all()
+
+    per_note = []
+    totals = {0: [0, 0, 0], 1: [0, 0, 0]}
+    days: dict[str, list[int]] = {}
+    for row in rows:
+        content = row["content"] or ""
+        words, chars = count_words(content), len(content)
+        per_note.append(
+            {"id": row["id"], "words": words, "chars": chars, "is_deleted": row["is_deleted"]}
+        )
+        bucket = totals[1 if row["is_deleted"] else 0]
+        bucket[0] += 1
+        bucket[1] += words
+        bucket[2] += chars
+        created_day = days.setdefault(row["created_at"][:10], [0, 0, 0])
+        created_day[0] += 1
+        created_day[2] += words
+        if row["updated_at"] > row["created_at"]:
+            days.setdefault(row["updated_at"][:10], [0, 0, 0])[1] += 1
+
+    if per_note:
+        await conn.execute(
+            text(
+                "INSERT INTO note_stats (note_id, words, chars, is_deleted) "
+                "VALUES (:id, :words, :chars, :is_deleted)"
+            ),
+            per_note,
+        )
+    for is_deleted, (notes, words, chars) in totals.items():
+        await _bump_totals(conn, is_deleted, notes, words, chars)
+    if days:
+        await conn.execute(
+            text(
+                "INSERT INTO journal_daily_stats (day, created, updated, words_written) "
+                "VALUES (:day, :created, :updated, :words_written)"
+            ),
+            [
+                {"day": day, "created": c, "updated": u, "words_written": w}
+                for day, (c, u, w) in days.items()
+            ],
+        )
+    await set_meta(conn, INDEX_META_KEY, INDEX_VERSION)
+    await conn.commit()
+    return len(rows)
+
+
+async def backfill(conn: AsyncSession) -> int:
+    """Compute the statistics once for databases created before they existed."""
+    if await get_meta(conn, INDEX_META_KEY) == INDEX_VERSION:
+        return 0
+    return await rebuild(conn)
+
+
+async def get_stats(conn: AsyncSession, days: int) -> dict:
+    """Totals for active notes and the recycle bin, and the last `days` days with activity."""
+    result = await conn.execute(
+        text("SELECT is_deleted, notes, words, chars FROM journal_totals")
+    )
+    totals = {row["is_deleted"]: row for row in result.mappings().all()}
+    empty = {"notes": 0, "words": 0, "chars": 0}
+    result = await conn.execute(
+        text(
+            "SELECT day, created, updated, words_written FROM journal_daily_stats "
+            "WHERE day > date('now', :since) ORDER BY day DESC"
+        ),
+        {"since": f"-{days} days"},
+    )
+    return {
+        "active": {k: totals[0][k] for k in empty} if 0 in totals else empty,
+        "recycle_bin": {k: totals[1][k] for k in empty} if 1 in totals else empty,
+        "days": [dict(row) for row in result.mappings().all()],
+    }
@@ -0,0 +1,205 @@
+# backend/services/title_index.py
+
+"""
+In-memory trigram index over active note titles for the quick-switcher.
+
+Each title word is split into padded trigrams ("  de", " dep", "dep", ...),
+so prefixes and small typos still share most of their trigrams with the
+title. The index is built in the app lifespan and kept current by
+`note_service` after every committed mutation.
+"""
+
+import bisect
+import heapq
+import sys
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+from app.core.config import settings
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def _normalize(value: str) -> List[str]:
+    return "".join(ch if ch.isalnum() else " " for ch in value.lower()).split()
+
+
+def _word_trigrams(word: str, complete: bool = True) -> List[str]:
+    padded = f"  {word} " if complete else f"  {word}"
+    return [padded[i : i + 3] for i in range(len(padded) - 2)]
+
+
+def _title_trigrams(normalized: str) -> List[str]:
+    return list(dict.fromkeys(t for w in normalized.split() for t in _word_trigrams(w)))
+
+
+# Bounds the number of ids considered per query so that very unselective
+# queries ("a", "the") stay cheap.
+_CANDIDATE_LIMIT = 2000
+_EMPTY = array("I")
+
+
+class TitleIndex:
+    def __init__(self, max_title_chars: int, max_entries: int):
+        self.max_title_chars = max_title_chars
+        self.max_entries = max_entries
+        # Insertion order doubles as recency: updates move a note to the end.
+        self._titles: Dict[int, str] = {}
+        self._normalized: Dict[int, str] = {}
+        # Posting lists are packed 32-bit id arrays; much smaller than sets.
+        self._postings: Dict[str, array] = {}
+        # Sorted (normalized title, id) pairs answer exact prefix queries.
+        self._sorted: List[Tuple[str, int]] = []
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._titles)
+
+    def clear(self) -> None:
+        self._titles.clear()
+        self._normalized.clear()
+        self._postings.clear()
+        self._sorted.clear()
+        self.evicted = 0
+
+    def build(self, rows: Iterable[Tuple[int, str]]) -> None:
+        """Replace the index contents, oldest rows first."""
+        self.clear()
+        for note_id, title in rows:
+            self._insert(note_id, title)
+        self._sorted = sorted((n, i) for i, n in self._normalized.items())
+        self._evict()
+
+    def add(self, note_id: int, title: str) -> None:
+        """Insert or replace a note's title."""
+        self.remove(note_id)
+        self._insert(note_id, title)
+        bisect.insort(self._sorted, (self._normalized[note_id], note_id))
+        self._evict()
+
+    def _insert(self, note_id: int, title: str) -> None:
+        title = title[: self.max_title_chars]
+        normalized = " ".join(_normalize(title))
+
+        self._titles[note_id] = title
+        self._normalized[note_id] = normalized
+        for trigram in _title_trigrams(normalized):
+            ids = self._postings.get(trigram)
+            if ids is None:
+                ids = self._postings[sys.intern(trigram)] = array("I")
+            ids.append(note_id)
+
+    def _evict(self) -> None:
+        while len(self._titles) > self.max_entries:
+            self.remove(next(iter(self._titles)))
+            self.evicted += 1
+
+    def remove(self, note_id: int) -> None:
+        if self._titles.pop(note_id, None) is None:
+            return
+        normalized = self._normalized.pop(note_id)
+        pos = bisect.bisect_left(self._sorted, (normalized, note_id))
+        if pos < len(self._sorted) and self._sorted[pos] == (normalized, note_id):
+            del self._sorted[pos]
+        for trigram in _title_trigrams(normalized):
+            ids = self._postings.get(trigram)
+            if ids is not None:
+                ids.remove(note_id)
+                if not ids:
+                    del self._postings[trigram]
+
+    def suggest(self, query: str, limit: int = 10) -> List[dict]:
+        """Rank titles against a (possibly partial, possibly misspelt) query."""
+        words = _normalize(query)
+        if not words:
+            return []
+
+        phrase = " ".join(words)
+        word_prefix = " " + words[-1]
+        query_trigrams = [t for w in words[:-1] for t in _word_trigrams(w)]
+        query_trigrams += _word_trigrams(words[-1], complete=False)
+        query_trigrams = list(dict.fromkeys(query_trigrams))
+
+        def score(note_id: int, matched: int) -> float:
+            normalized = self._normalized[note_id]
+            value = matched / len(query_trigrams)
+            # Overlap relative to title length (~ its trigram count) favours
+            # tighter matches.
+            value += 0.25 * matched / (len(normalized) + 1)
+            if normalized.startswith(phrase):
+                value += 1.0
+            elif word_prefix in f" {normalized}":
+                value += 0.5
+            return value
+
+        # Titles starting with the query contain every query trigram and
+        # always outrank everything else, so take them straight from the
+        # sorted list when there are enough of them.
+        start = bisect.bisect_left(self._sorted, (phrase, -1))
+        prefixed = []
+        for normalized, note_id in self._sorted[start : start + _CANDIDATE_LIMIT]:
+            if not normalized.startswith(phrase):
+                break
+            prefixed.append(note_id)
+        if len(prefixed) >= limit:
+            matched = len(query_trigrams)
+            shortest = heapq.nsmallest(limit, prefixed, key=lambda i: len(self._normalized[i]))
+            return self._results([(score(i, matched), i) for i in shortest])
+
+        # Otherwise count trigram hits, rarest trigrams first. Trigrams too
+        # common to fit the candidate budget only add to existing counts.
+        postings = sorted(
+            (self._postings.get(t, _EMPTY) for t in query_trigrams), key=len
+        )
+        hits: Counter = Counter()
+        for ids in postings:
+            if not hits:
+                hits.update(ids[:_CANDIDATE_LIMIT])
+            elif len(hits) + len(ids) <= _CANDIDATE_LIMIT:
+                hits.update(ids)
+            else:
+                hits.update(filter(hits.__contains__, ids))
+        if not hits:
+            return []
+
+        shortlist = hits.most_common(max(limit * 20, 200))
+        best = heapq.nlargest(limit, ((score(i, m), i) for i, m in shortlist))
+        return self._results(best)
+
+    def _results(self, best: List[Tuple[float, int]]) -> List[dict]:
+        return [
+            {"id": note_id, "title": self._titles[note_id], "score": round(value, 4)}
+            for value, note_id in best
+        ]
+
+    def stats(self) -> dict:
+        """Entry counts and an estimate of the memory held by the index."""
+        size = sys.getsizeof(self._titles) + sys.getsizeof(self._normalized)
+        size += sys.getsizeof(self._postings)
+        size += sum(sys.getsizeof(t) for t in self._titles.values())
+        size += sum(sys.getsizeof(t) for t in self._normalized.values())
+        size += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in self._postings.items())
+        return {
+            "entries": len(self._titles),
+            "trigrams": len(self._postings),
+            "evicted": self.evicted,
+            "max_entries": self.max_entries,
+            "max_title_chars": self.max_title_chars,
+            "approx_bytes": size,
+        }
+
+
+title_index = TitleIndex(
+    max_title_chars=settings.TITLE_INDEX_MAX_TITLE_CHARS,
+    max_entries=settings.TITLE_INDEX_MAX_ENTRIES,
+)
+
+
+async def load(conn: AsyncSession) -> dict:
+    """Rebuild the shared index from the active notes and return its stats."""
+    result = await conn.execute(
+        text("SELECT id, title FROM notes WHERE is_deleted = 0 ORDER BY updated_at")
+    )
+    title_index.build((row.id, row.title) for row in result)
+    return title_index.stats()
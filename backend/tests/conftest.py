@@ -0,0 +1,36 @@
+# backend/tests/conftest.py
+
+import os
+import tempfile
+from contextlib import asynccontextmanager
+
+# Settings are read when the app modules are imported, so point them at a
+# scratch directory first
+_data_dir = tempfile.mkdtemp(prefix="journal-tests-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_data_dir}/journal.db"
+os.environ["NOTEBOOKS_DIR"] = os.path.join(_data_dir, "notebooks")
+os.environ["ATTACHMENTS_DIR"] = os.path.join(_data_dir, "attachments")
+os.environ["GIT_TRACKER_DATA_DIR"] = os.path.join(_data_dir, "git_work_tracker")
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+
+import pytest  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    """The notes API on a fresh database, shared by all tests (one event loop)."""
+    from app.core.database import create_tables
+    from app.routers import attachments, notes
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await create_tables()
+        yield
+
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(notes.router)
+    app.include_router(attachments.router)
+    with TestClient(app) as test_client:
+        yield test_client
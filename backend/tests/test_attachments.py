@@ -0,0 +1,63 @@
+# backend/tests/test_attachments.py
+
+from app.core.config import settings
+
+
+def _note(client) -> int:
+    return client.post("/notes", json={"title": "With files", "content": ""}).json()["id"]
+
+
+def test_upload_round_trip(client):
+    note_id = _note(client)
+    response = client.post(
+        f"/notes/{note_id}/attachments",
+        files={"file": ("hello.txt", b"hello world", "text/plain")},
+    )
+    assert response.status_code == 201
+    attachment = response.json()
+    assert attachment["size"] == 11
+    assert [a["sha256"] for a in client.get(f"/notes/{note_id}/attachments").json()] == [
+        attachment["sha256"]
+    ]
+
+
+def test_download_range(client):
+    note_id = _note(client)
+    sha256 = client.post(
+        f"/notes/{note_id}/attachments",
+        files={"file": ("range.txt", b"0123456789", "text/plain")},
+    ).json()["sha256"]
+
+    response = client.get(f"/attachments/{sha256}", headers={"Range": "bytes=2-5"})
+    assert response.status_code == 206
+    assert response.content == b"2345"
+
+
+def test_oversized_upload_is_refused_while_streaming(client, monkeypatch):
+    monkeypatch.setattr(settings, "ATTACHMENT_MAX_BYTES", 1024)
+    note_id = _note(client)
+
+    def chunks():
+        # No Content-Length: the limit has to be enforced on the stream
+        yield b"--b\r\nContent-Disposition: form-data; name=\"file\"; filename=\"big\"\r\n\r\n"
+        for _ in range(100):
+            yield b"x" * 1024
+        yield b"\r\n--b--\r\n"
+
+    response = client.post(
+        f"/notes/{note_id}/attachments",
+        content=chunks(),
+        headers={"Content-Type": "multipart/form-data; boundary=b"},
+    )
+    assert response.status_code == 413
+    assert client.get(f"/notes/{note_id}/attachments").json() == []
+
+
+def test_oversized_content_length_is_refused(client, monkeypatch):
+    monkeypatch.setattr(settings, "ATTACHMENT_MAX_BYTES", 1024)
+    note_id = _note(client)
+    response = client.post(
+        f"/notes/{note_id}/attachments",
+        files={"file": ("big.bin", b"x" * 200_000, "application/octet-stream")},
+    )
+    assert response.status_code == 413
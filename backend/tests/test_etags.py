@@ -0,0 +1,20 @@
+# backend/tests/test_etags.py
+
+
+def test_listing_etag_changes_on_delete_and_restore(client):
+    first = client.post("/notes", json={"title": "First", "content": "a"}).json()
+    second = client.post("/notes", json={"title": "Second", "content": "b"}).json()
+    client.delete(f"/notes/{second['id']}")
+
+    before = {path: client.get(path).headers["etag"] for path in ("/notes", "/notes/deleted")}
+    for path, etag in before.items():
+        assert client.get(path, headers={"If-None-Match": etag}).status_code == 304
+
+    # Same number of notes in each listing afterwards, just swapped
+    client.delete(f"/notes/{first['id']}")
+    client.put(f"/notes/{second['id']}/restore")
+
+    for path, etag in before.items():
+        response = client.get(path, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
@@ -0,0 +1,69 @@
+# backend/tests/test_git_tracker.py
+
+import asyncio
+import subprocess
+
+from git_work_tracker.tools import git_tracker, watcher
+
+
+def _git(repo, *args):
+    subprocess.run(["git", *args], cwd=repo, check=True, capture_output=True)
+
+
+def _init(repo):
+    _git(repo, "init", "-q")
+    _git(repo, "config", "user.name", "Test")
+    _git(repo, "config", "user.email", "test@example.com")
+
+
+def _commit(repo, message):
+    (repo / "log.txt").write_text(message)
+    _git(repo, "add", "-A")
+    _git(repo, "commit", "-q", "-m", message)
+
+
+def test_commits_with_changes_with_one_git_process(tmp_path, monkeypatch):
+    _init(tmp_path)
+    for i in range(3):
+        (tmp_path / "notes.txt").write_text(f"line {i}\n" * (i + 1))
+        (tmp_path / f"new{i}.txt").write_text("added\n")
+        _git(tmp_path, "add", "-A")
+        _git(tmp_path, "commit", "-q", "-m", f"Change {i}")
+    monkeypatch.setattr(git_tracker, "_git_slots", asyncio.Semaphore(1))
+
+    commits = asyncio.run(
+        asyncio.wait_for(git_tracker.get_commits_with_changes(str(tmp_path)), timeout=30)
+    )
+
+    assert [c["message"] for c in commits] == ["Change 2", "Change 1", "Change 0"]
+    # New files are listed, but their patches left out
+    assert "new2.txt" in commits[0]["new_files"]
+    assert "notes.txt" in commits[0]["diff"]
+    assert "new2.txt" not in commits[0]["diff"]
+
+
+def test_watcher_refreshes_during_a_paused_rebase(tmp_path, monkeypatch):
+    _init(tmp_path)
+    _commit(tmp_path, "First")
+    monkeypatch.setattr(watcher, "WATCH_POLL_SECONDS", 0.05)
+    monkeypatch.setattr(watcher, "WATCH_DEBOUNCE_SECONDS", 0.1)
+    monkeypatch.setattr(watcher, "WATCH_MAX_DELAY_SECONDS", 0.5)
+
+    async def main():
+        repo_watcher = watcher.RepoWatcher(str(tmp_path), str(tmp_path / ".git"))
+        repo_watcher._task = asyncio.create_task(repo_watcher._run())
+        try:
+            await asyncio.wait_for(repo_watcher.ready.wait(), timeout=30)
+            assert repo_watcher.commit_count == 1
+            # As left by a rebase stopped at a conflict
+            (tmp_path / ".git" / "rebase-merge").mkdir()
+            _commit(tmp_path, "Second")
+            for _ in range(100):
+                if repo_watcher.commit_count == 2:
+                    break
+                await asyncio.sleep(0.05)
+            assert repo_watcher.commit_count == 2
+        finally:
+            repo_watcher.stop()
+
+    asyncio.run(main())
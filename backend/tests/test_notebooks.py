@@ -0,0 +1,56 @@
+# backend/tests/test_notebooks.py
+
+import asyncio
+
+from app.core.database import NotebookRegistry, notebook_of
+from sqlalchemy import text
+
+
+def test_concurrent_create_of_one_name(tmp_path):
+    registry = NotebookRegistry(tmp_path, idle_seconds=300, max_open=16)
+
+    async def main():
+        try:
+            return await asyncio.gather(
+                registry.create("work"), registry.create("work"), return_exceptions=True
+            )
+        finally:
+            await registry.stop()
+
+    results = asyncio.run(main())
+    assert sum(isinstance(r, ValueError) for r in results) == 1
+    assert registry.names() == ["default", "work"]
+
+
+def test_slow_open_hook_does_not_hold_up_other_notebooks(tmp_path):
+    registry = NotebookRegistry(tmp_path, idle_seconds=300, max_open=16)
+
+    async def main():
+        entered, release = asyncio.Event(), asyncio.Event()
+
+        async def hook(session):
+            if notebook_of(session) == "slow":
+                entered.set()
+                await release.wait()
+
+        await registry.create("slow")
+        await registry.create("fast")
+        await registry.stop()
+        registry.open_hooks.append(hook)
+
+        async def count(name):
+            async with registry.session(name) as session:
+                return (await session.execute(text("SELECT COUNT(*) FROM notes"))).scalar_one()
+
+        slow = asyncio.create_task(count("slow"))
+        await entered.wait()
+        try:
+            assert await asyncio.wait_for(count("fast"), timeout=5) == 0
+            assert not slow.done()
+            release.set()
+            assert await asyncio.wait_for(slow, timeout=5) == 0
+        finally:
+            release.set()
+            await registry.stop()
+
+    asyncio.run(main())
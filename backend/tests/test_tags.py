@@ -0,0 +1,13 @@
+# backend/tests/test_tags.py
+
+
+def test_nested_tag_lookup(client):
+    created = client.post(
+        "/notes", json={"title": "Deploy", "content": "Moved the queue #team/backend"}
+    ).json()
+    client.post("/notes", json={"title": "Other", "content": "Unrelated #team"})
+
+    for path in ("/notes/tags/team/backend", "/notes/tags/team%2Fbackend"):
+        response = client.get(path)
+        assert response.status_code == 200
+        assert [n["id"] for n in response.json()] == [created["id"]]
@@ -7,6 +7,8 @@ const axios = require('axios');
 
 const isDev = process.env.NODE_ENV !== 'production';
 const backendPort = 8000;
+// Worker processes for the backend; more than one is not supported on Windows
+const backendWorkers = parseInt(process.env.JOURNAL_BACKEND_WORKERS || '1', 10);
 const backendUrl = `http://127.0.0.1:${backendPort}`;
 
 // MCP Server configuration
@@ -28,6 +30,9 @@ const startPythonBackend = () => {
   // In production, we'll need to run a packaged executable.
   const command = 'uv';
   const args = ['run', 'uvicorn', 'app.server.main:app', '--port', `${backendPort}`];
+  if (backendWorkers > 1) {
+    args.push('--workers', `${backendWorkers}`);
+  }
 
   pythonProcess = spawn(command, args, {
     // The CWD must be the backend directory where pyproject.toml is